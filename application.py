@@ -1,9 +1,21 @@
-from flask import Flask, render_template, request
-from pipeline.prediction_pipeline import hybrid_recommendation_system
-from utils.db_utils import get_recommendations_from_db, save_recommendations_to_db
+import os
+from flask import Flask, render_template, request, jsonify
+from pipeline.prediction_pipeline import (
+    hybrid_recommendation_system, hybrid_recommendation_details, hybrid_recommendation_batch
+)
+from utils.cache import get_cached_recommendations, cache_recommendations, get_recommendation_cache
+from utils.serialization import scoring_params, serialize_recommendations
+from utils.write_behind import get_writer
+from utils.recommender_store import get_store
+
+# Upper bound on user ids accepted by one multi-user API request
+MAX_BATCH_USERS = int(os.environ.get("MAX_BATCH_USERS", 1000))
 
 app = Flask(__name__)
 
+# Load all serving artifacts once, before the first request arrives
+get_store()
+
 @app.route('/', methods=['GET', 'POST'])
 def home():
     recommendations = None
@@ -12,7 +24,7 @@ def home():
     if request.method == 'POST':
         try:
             user_id = int(request.form["userID"])
-            recommendations = get_recommendations_from_db(user_id)
+            recommendations = get_cached_recommendations(user_id)
 
             if recommendations is None:
                 recommendations = hybrid_recommendation_system(user_id)
@@ -20,7 +32,8 @@ def home():
                 if not recommendations:
                     error_message = f"User ID {user_id} not found or has no recommendations."
                 else:
-                    save_recommendations_to_db(user_id, recommendations)
+                    cache_recommendations(user_id, recommendations)
+                    get_writer().put(user_id, recommendations)
 
         except ValueError:
             error_message = "Invalid input. Please enter a valid User ID."
@@ -29,5 +42,72 @@ def home():
 
     return render_template('index.html', recommendations=recommendations, error_message=error_message)
 
+
+# ---------------------------------------------------
+# JSON API
+# ---------------------------------------------------
+@app.route('/api/recommendations/<int:user_id>', methods=['GET'])
+def api_user_recommendations(user_id):
+    try:
+        params = scoring_params(request.args)
+    except ValueError:
+        return jsonify({"error": "Invalid scoring parameters."}), 400
+
+    try:
+        recommendations = hybrid_recommendation_details(user_id, **params)
+    except Exception as e:
+        return jsonify({"error": f"An unexpected error occurred: {str(e)}"}), 500
+
+    if not recommendations:
+        return jsonify({"error": f"User ID {user_id} not found or has no recommendations."}), 404
+
+    return jsonify({"user_id": user_id, **params, "recommendations": serialize_recommendations(recommendations)})
+
+
+@app.route('/api/recommendations', methods=['POST'])
+def api_batch_recommendations():
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict):
+        return jsonify({"error": "The request body must be a JSON object."}), 400
+
+    try:
+        user_ids = payload.get("user_ids", [])
+        if not isinstance(user_ids, list):
+            raise TypeError("user_ids is not a list")
+        user_ids = [int(user_id) for user_id in user_ids]
+    except (TypeError, ValueError):
+        return jsonify({"error": "user_ids must be a list of integers."}), 400
+
+    try:
+        params = scoring_params(payload)
+    except (TypeError, ValueError):
+        return jsonify({"error": "Invalid scoring parameters."}), 400
+
+    if not user_ids:
+        return jsonify({"error": "user_ids must be a non-empty list of integers."}), 400
+    if len(user_ids) > MAX_BATCH_USERS:
+        return jsonify({"error": f"At most {MAX_BATCH_USERS} user_ids per request."}), 400
+
+    try:
+        results = hybrid_recommendation_batch(user_ids, with_scores=True, **params)
+    except Exception as e:
+        return jsonify({"error": f"An unexpected error occurred: {str(e)}"}), 500
+
+    return jsonify({
+        **params,
+        "results": [
+            {"user_id": user_id, "recommendations": serialize_recommendations(results.get(user_id, []))}
+            for user_id in user_ids
+        ],
+    })
+
+
+@app.route('/api/cache/stats', methods=['GET'])
+def api_cache_stats():
+    """Size and hit/miss counters of this worker's in-process recommendation cache"""
+    return jsonify({"pid": os.getpid(), **get_recommendation_cache().stats()})
+
+
 if __name__ == "__main__":
-    app.run(debug=True, host="0.0.0.0", port=5000)
+    # Development server only; production runs under gunicorn (see gunicorn.conf.py)
+    app.run(debug=os.environ.get("FLASK_DEBUG") == "1", threaded=True, host="0.0.0.0", port=5000)
@@ -0,0 +1,104 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from aiohttp import web
+from pipeline.prediction_pipeline import hybrid_recommendation_system
+from utils.cache import get_cached_recommendations, cache_recommendations, get_recommendation_cache
+from utils.serialization import scoring_params, is_default_scoring
+from utils.single_flight import SingleFlight
+from utils.write_behind import get_writer
+from utils.recommender_store import get_store
+from src.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Threads running the blocking parts (Postgres calls, scoring) off the event loop
+EXECUTOR_THREADS = int(os.environ.get("ASYNC_EXECUTOR_THREADS", 8))
+
+
+class AsyncRecommender:
+    """
+    Event-loop front end for the recommender.
+
+    Concurrent requests for the same (user, scoring parameters) share one in-flight
+    cache lookup and, on a miss, one computation. Database calls and scoring run in
+    a thread pool so a slow Postgres call never stalls the event loop.
+    """
+
+    def __init__(self, executor_threads=EXECUTOR_THREADS):
+        self.executor = ThreadPoolExecutor(max_workers=executor_threads, thread_name_prefix="recommender")
+        self.single_flight = SingleFlight()
+
+    async def _run(self, fn, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, partial(fn, *args, **kwargs))
+
+    async def _lookup_or_compute(self, user_id, params):
+        recommendations = await self._run(get_cached_recommendations, user_id, **params)
+        if recommendations is not None:
+            return recommendations, "cache"
+
+        recommendations = await self._run(hybrid_recommendation_system, user_id, **params)
+        if recommendations:
+            cache_recommendations(user_id, recommendations, **params)
+            # Postgres rows are keyed by user_id only, so they hold default-param results alone
+            if is_default_scoring(**params):
+                await self._run(get_writer().put, user_id, recommendations)
+        return recommendations, "computed"
+
+    async def recommendations(self, user_id, user_weight=0.5, content_weight=0.5, top_n=10):
+        """Return (recommendations, source), source being either 'cache' or 'computed'"""
+        params = {"user_weight": user_weight, "content_weight": content_weight, "top_n": top_n}
+        key = (user_id, user_weight, content_weight, top_n)
+        return await self.single_flight.do(key, lambda: self._lookup_or_compute(user_id, params))
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+
+
+# ---------------------------------------------------
+# Routes
+# ---------------------------------------------------
+async def user_recommendations(request):
+    try:
+        user_id = int(request.match_info["user_id"])
+        params = scoring_params(request.query)
+    except ValueError:
+        return web.json_response({"error": "Invalid user ID or scoring parameters."}, status=400)
+
+    try:
+        recommendations, source = await request.app["recommender"].recommendations(user_id, **params)
+    except Exception as e:
+        logger.error(f"Failed to serve recommendations for user {user_id}: {e}")
+        return web.json_response({"error": f"An unexpected error occurred: {str(e)}"}, status=500)
+
+    if not recommendations:
+        return web.json_response({"error": f"User ID {user_id} not found or has no recommendations."}, status=404)
+
+    return web.json_response({"user_id": user_id, **params, "source": source, "recommendations": recommendations})
+
+
+async def cache_stats(request):
+    """Size and hit/miss counters of the in-process recommendation cache"""
+    return web.json_response({"pid": os.getpid(), **get_recommendation_cache().stats()})
+
+
+async def _on_cleanup(app):
+    app["recommender"].close()
+
+
+def create_app():
+    # Load all serving artifacts once, before the first request arrives
+    get_store()
+
+    app = web.Application()
+    app["recommender"] = AsyncRecommender()
+    app.router.add_get("/api/recommendations/{user_id}", user_recommendations)
+    app.router.add_get("/api/cache/stats", cache_stats)
+    app.on_cleanup.append(_on_cleanup)
+    return app
+
+
+if __name__ == "__main__":
+    web.run_app(create_app(), host="0.0.0.0", port=int(os.environ.get("PORT", 5000)))
@@ -0,0 +1,141 @@
+"""
+Stage-by-stage timing of DataProcessor on a synthetic animelist, plus a comparison
+of the vectorised scale / encode / anime-name stages with the row-by-row versions
+they replaced (asserting both produce identical output).
+
+Usage:
+    python -m benchmarks.preprocessing_benchmark --users 20000 --ratings-per-user 200 --animes 15000
+"""
+import argparse
+import os
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+from src.data_processing import DataProcessor
+
+
+def make_ratings(n_users, ratings_per_user, n_animes, seed=42):
+    rng = np.random.default_rng(seed)
+    counts = rng.poisson(ratings_per_user, size=n_users)
+    return pd.DataFrame({
+        "user_id": np.repeat(np.arange(n_users), counts),
+        "anime_id": rng.integers(1, n_animes + 1, size=counts.sum()),
+        "rating": rng.integers(0, 11, size=counts.sum()),
+    })
+
+
+def make_animes(n_animes, seed=42):
+    rng = np.random.default_rng(seed)
+    ids = np.arange(1, n_animes + 1)
+    english = pd.Series([f"English {i}" for i in ids], dtype=object)
+    english[rng.random(n_animes) < 0.4] = np.nan
+    return pd.DataFrame({"anime_id": ids, "Name": [f"Anime {i}" for i in ids], "English name": english})
+
+
+# ---------------------------------------------------
+# Previous row-by-row implementations
+# ---------------------------------------------------
+def legacy_scale_ratings(rating_df):
+    min_rating, max_rating = rating_df["rating"].min(), rating_df["rating"].max()
+    return rating_df["rating"].apply(lambda x: (x - min_rating) / (max_rating - min_rating))
+
+
+def legacy_encode(ids):
+    unique_ids = ids.unique().tolist()
+    encoded = {x: i for i, x in enumerate(unique_ids)}
+    decoded = {i: x for i, x in enumerate(unique_ids)}
+    return ids.map(encoded), encoded, decoded
+
+
+def legacy_anime_names(df):
+    def get_anime_name(anime_id):
+        try:
+            row = df[df['anime_id'] == anime_id]
+            eng_name = row['English name'].values[0]
+            return row['Name'].values[0] if pd.isna(eng_name) else eng_name
+        except (IndexError, KeyError):
+            return f"Unknown Anime (ID: {anime_id})"
+
+    return df["anime_id"].apply(get_anime_name)
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, (time.perf_counter() - start) * 1e3
+
+
+def run_stages(input_file, output_dir, min_rating, test_size):
+    """Time each in-memory DataProcessor stage in pipeline order"""
+    processor = DataProcessor(input_file, output_dir)
+    stages = [
+        ("load_data", lambda: processor.load_data(usecols=["user_id", "anime_id", "rating"])),
+        ("filter_users", lambda: processor.filter_users(min_rating=min_rating)),
+        ("drop_duplicates", processor.drop_duplicates),
+        ("scale_ratings", processor.scale_ratings),
+        ("encode_data", processor.encode_data),
+        ("split_data", lambda: processor.split_data(test_size=test_size)),
+    ]
+    return [(name, timed(stage)[1]) for name, stage in stages]
+
+
+def compare_rewrites(ratings, animes, name_rows):
+    results = []
+
+    legacy, legacy_ms = timed(legacy_scale_ratings, ratings)
+    processor = DataProcessor.__new__(DataProcessor)
+    processor.rating_df = ratings.copy()
+    _, new_ms = timed(processor.scale_ratings)
+    assert np.array_equal(legacy.values, processor.rating_df["rating"].values), "scale_ratings differs"
+    results.append(("scale_ratings", legacy_ms, new_ms))
+
+    (user_codes, user_encoded, _), legacy_ms = timed(legacy_encode, ratings["user_id"])
+    (anime_codes, anime_encoded, _), anime_ms = timed(legacy_encode, ratings["anime_id"])
+    processor.rating_df = ratings.copy()
+    _, new_ms = timed(processor.encode_data)
+    assert np.array_equal(user_codes.values, processor.rating_df["user"].values), "user codes differ"
+    assert np.array_equal(anime_codes.values, processor.rating_df["anime"].values), "anime codes differ"
+    assert list(user_encoded) == processor.user_encoder.ids.tolist(), "user encoder differs"
+    assert list(anime_encoded) == processor.anime_encoder.ids.tolist(), "anime encoder differs"
+    results.append(("encode_data", legacy_ms + anime_ms, new_ms))
+
+    # The legacy name lookup is quadratic, so it only runs on the first name_rows animes
+    subset = animes.head(name_rows)
+    legacy, legacy_ms = timed(legacy_anime_names, subset)
+    new, new_ms = timed(DataProcessor.anime_names, subset)
+    assert legacy.equals(new), "anime names differ"
+    results.append((f"anime_names ({len(subset)} rows)", legacy_ms, new_ms))
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=20_000)
+    parser.add_argument("--ratings-per-user", type=int, default=200)
+    parser.add_argument("--animes", type=int, default=15_000)
+    parser.add_argument("--min-rating", type=int, default=150)
+    parser.add_argument("--test-size", type=int, default=10_000)
+    parser.add_argument("--name-rows", type=int, default=3_000)
+    args = parser.parse_args()
+
+    ratings = make_ratings(args.users, args.ratings_per_user, args.animes)
+    animes = make_animes(args.animes)
+    print(f"Synthetic dataset: {len(ratings)} ratings, {args.users} users, {args.animes} animes")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        input_file = os.path.join(tmp_dir, "animelist.csv")
+        ratings.to_csv(input_file, index=False)
+
+        print(f"\n{'stage':<20} {'ms':>10}")
+        for name, ms in run_stages(input_file, os.path.join(tmp_dir, "processed"), args.min_rating, args.test_size):
+            print(f"{name:<20} {ms:>10.1f}")
+
+    print(f"\n{'rewritten stage':<28} {'row-by-row ms':>14} {'vectorised ms':>14} {'speedup':>8}")
+    for name, legacy_ms, new_ms in compare_rewrites(ratings, animes, args.name_rows):
+        print(f"{name:<28} {legacy_ms:>14.1f} {new_ms:>14.1f} {legacy_ms / new_ms:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
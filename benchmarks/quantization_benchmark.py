@@ -0,0 +1,57 @@
+"""
+Memory, scoring latency and top-k overlap of the float16 and int8
+QuantizedEmbeddings against float32 weights, over a range of scoring block sizes.
+
+Usage:
+    python -m benchmarks.quantization_benchmark --rows 1000000 --dim 128 --block-rows 1024 4096 16384
+"""
+import argparse
+import timeit
+import numpy as np
+from utils.quantization import QuantizedEmbeddings, PRECISIONS, topk_overlap_report
+
+
+def make_weights(rows, dim, seed=42):
+    rng = np.random.default_rng(seed)
+    weights = rng.standard_normal((rows, dim), dtype=np.float32)
+    weights /= np.linalg.norm(weights, axis=1, keepdims=True)
+    return weights
+
+
+def best_ms(fn, repeats):
+    return min(timeit.repeat(fn, number=1, repeat=repeats)) * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--dim", type=int, default=128)
+    parser.add_argument("--batch", type=int, default=32, help="queries per batched scoring call")
+    parser.add_argument("--block-rows", type=int, nargs="+", default=[1024, 4096, 16384])
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--overlap-queries", type=int, default=200)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    weights = make_weights(args.rows, args.dim)
+    query, queries = weights[0], weights[:args.batch].T
+
+    print(f"{args.rows} rows x {args.dim} dims, batch of {args.batch} queries")
+    print(f"\n{'precision':<10} {'block rows':>10} {'MB':>8} {'1 query ms':>11} {'batch ms':>9} {'overlap@k':>10}")
+    print(f"{'float32':<10} {'-':>10} {weights.nbytes / 2**20:>8.1f} "
+          f"{best_ms(lambda: weights @ query, args.repeats):>11.2f} "
+          f"{best_ms(lambda: weights @ queries, args.repeats):>9.2f} {1.0:>10.3f}")
+
+    for precision in PRECISIONS:
+        quantized = QuantizedEmbeddings.quantize(weights, precision)
+        overlap = topk_overlap_report(weights, quantized, k=args.k, n_queries=args.overlap_queries)["overlap"]
+
+        for block_rows in args.block_rows:
+            quantized.block_rows = block_rows
+            print(f"{precision:<10} {block_rows:>10} {quantized.nbytes / 2**20:>8.1f} "
+                  f"{best_ms(lambda: quantized @ query, args.repeats):>11.2f} "
+                  f"{best_ms(lambda: quantized @ queries, args.repeats):>9.2f} {overlap:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Scaling of ShardedSearch from 1 to N cores against single-process exact search on
+a synthetic user_weights matrix, checking every run returns the exact top-k.
+
+Each configuration uses as many shards as worker processes. BLAS threading in the
+workers competes with the pool, so pin it for a clean per-core curve.
+
+Usage:
+    OMP_NUM_THREADS=1 python -m benchmarks.sharded_search_benchmark --rows 1000000 --dim 128 --max-cores 8
+"""
+import argparse
+import os
+import tempfile
+import time
+import numpy as np
+from utils.sharded_search import ShardedSearch
+from utils.similarity import block_top_k
+
+
+def make_weights(rows, dim, path, seed=42):
+    """Write the matrix to ``path`` and map it back, as the store serves user_weights"""
+    rng = np.random.default_rng(seed)
+    weights = rng.standard_normal((rows, dim), dtype=np.float32)
+    weights /= np.linalg.norm(weights, axis=1, keepdims=True)
+    np.save(path, weights)
+    return np.load(path, mmap_mode="r")
+
+
+def timed(fn, repeats):
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return result, best * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--dim", type=int, default=128)
+    parser.add_argument("--k", type=int, default=11, help="neighbours kept (n + 1 in the helpers)")
+    parser.add_argument("--batch", type=int, default=64, help="queries per batched search")
+    parser.add_argument("--max-cores", type=int, default=os.cpu_count())
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        run(args, make_weights(args.rows, args.dim, os.path.join(tmp_dir, "user_weights.npy")))
+
+
+def run(args, weights):
+    queries = weights[:args.batch]
+
+    expected, single_ms = timed(lambda: block_top_k(queries[:1], weights, args.k), args.repeats)
+    expected_batch, batch_ms = timed(lambda: block_top_k(queries, weights, args.k), args.repeats)
+    print(f"{args.rows} rows x {args.dim} dims, k={args.k}, batch of {args.batch} queries")
+    print(f"\n{'cores':>5} {'1 query ms':>11} {'speedup':>8} {'batch ms':>9} {'speedup':>8}")
+    print(f"{'base':>5} {single_ms:>11.2f} {1:>7.1f}x {batch_ms:>9.2f} {1:>7.1f}x")
+
+    for cores in range(1, args.max_cores + 1):
+        with ShardedSearch(weights, n_shards=cores, workers=cores) as search:
+            search.search(queries[0], args.k)  # start and warm up the pool
+
+            (ids, _), sharded_single_ms = timed(lambda: search.search(queries[0], args.k), args.repeats)
+            (batch_ids, _), sharded_batch_ms = timed(lambda: search.search(queries, args.k), args.repeats)
+
+            assert np.array_equal(np.sort(ids), np.sort(expected[0][0])), "sharded search differs"
+            assert np.array_equal(np.sort(batch_ids, axis=1), np.sort(expected_batch[0], axis=1)), \
+                "sharded batch search differs"
+
+        print(f"{cores:>5} {sharded_single_ms:>11.2f} {single_ms / sharded_single_ms:>7.1f}x "
+              f"{sharded_batch_ms:>9.2f} {batch_ms / sharded_batch_ms:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Compare the full-argsort neighbour selection previously used by the similarity
+helpers with the argpartition-based ``top_k``.
+
+Usage:
+    python -m benchmarks.topk_benchmark --sizes 10000 100000 1000000 --dim 128
+"""
+import argparse
+import timeit
+import numpy as np
+from utils.similarity import top_k
+
+
+def argsort_select(dists, n, neg=False):
+    """Previous behaviour: sort every score, keep the n closest"""
+    sorted_dists = np.argsort(dists)
+    return sorted_dists[:n] if neg else sorted_dists[-n:]
+
+
+def run(sizes, dim, n, repeats, seed=42):
+    rng = np.random.default_rng(seed)
+    results = []
+
+    for size in sizes:
+        weights = rng.standard_normal((size, dim), dtype=np.float32)
+        weights /= np.linalg.norm(weights, axis=1, keepdims=True)
+        dists = weights @ weights[0]
+
+        for neg in (False, True):
+            expected = set(argsort_select(dists, n, neg).tolist())
+            assert set(top_k(dists, n, neg).tolist()) == expected, "top_k disagrees with argsort"
+
+            argsort_s = min(timeit.repeat(lambda: argsort_select(dists, n, neg), number=1, repeat=repeats))
+            top_k_s = min(timeit.repeat(lambda: top_k(dists, n, neg), number=1, repeat=repeats))
+            dot_s = min(timeit.repeat(lambda: weights @ weights[0], number=1, repeat=repeats))
+
+            results.append({
+                "rows": size,
+                "neg": neg,
+                "dot_ms": dot_s * 1e3,
+                "argsort_ms": argsort_s * 1e3,
+                "top_k_ms": top_k_s * 1e3,
+                "speedup": argsort_s / top_k_s,
+            })
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--dim", type=int, default=128)
+    parser.add_argument("--n", type=int, default=11, help="neighbours kept (n + 1 in the helpers)")
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'neg':>5} {'dot ms':>9} {'argsort ms':>11} {'top_k ms':>9} {'speedup':>8}")
+    for r in run(args.sizes, args.dim, args.n, args.repeats):
+        print(f"{r['rows']:>10} {str(r['neg']):>5} {r['dot_ms']:>9.2f} {r['argsort_ms']:>11.2f} "
+              f"{r['top_k_ms']:>9.2f} {r['speedup']:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
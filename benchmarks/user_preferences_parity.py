@@ -0,0 +1,83 @@
+"""
+Parity check of the precomputed UserPreferenceIndex against the per-request
+percentile computation get_user_preferences used before, plus the per-call
+latency of both. Exits non-zero on any mismatch.
+
+Runs against the processed artifacts of the current working directory.
+
+Usage:
+    python -m benchmarks.user_preferences_parity --users 5000
+"""
+import argparse
+import sys
+import time
+import numpy as np
+from utils.helpers import get_user_preferences
+from utils.recommender_store import get_store
+from utils.user_preferences import UserPreferenceIndex
+
+
+def legacy_top_rated(ratings_index, user_code):
+    """Previous behaviour: threshold and sorted top-rated ids computed per call"""
+    anime_ids, ratings = ratings_index.get(user_code)
+    threshold = np.percentile(ratings, 75)
+    top_rated = ratings >= threshold
+    return threshold, anime_ids[top_rated][np.argsort(-ratings[top_rated], kind="stable")]
+
+
+def legacy_user_preferences(store, user_id):
+    _, top_anime_ids = legacy_top_rated(store.user_ratings_index, store.user_encoder.get(user_id))
+    df = store.anime_df
+    return df[df["anime_id"].isin(top_anime_ids)][["eng_version", "Genres"]]
+
+
+def check(store, user_codes):
+    """Return the encoded users whose precomputed entry differs from the per-call result"""
+    index = UserPreferenceIndex.build(store.user_ratings_index)
+    mismatches = []
+    for user_code in user_codes:
+        if store.user_ratings_index.indptr[user_code] == store.user_ratings_index.indptr[user_code + 1]:
+            continue
+        threshold, top_anime_ids = legacy_top_rated(store.user_ratings_index, user_code)
+        if threshold != index.thresholds[user_code] or not np.array_equal(top_anime_ids, index.get(user_code)):
+            mismatches.append(user_code)
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=None, help="users to check; defaults to all")
+    parser.add_argument("--timed-users", type=int, default=200)
+    args = parser.parse_args()
+
+    store = get_store()
+    n_users = store.user_ratings_index.n_users
+    user_codes = np.arange(n_users if args.users is None else min(args.users, n_users))
+
+    mismatches = check(store, user_codes)
+    print(f"Checked {len(user_codes)} users: {len(mismatches)} mismatches")
+
+    user_ids = store.user_encoder.decode(user_codes[:args.timed_users]).tolist()
+    frames_differ = 0
+    legacy_s, new_s = 0.0, 0.0
+    for user_id in user_ids:
+        start = time.perf_counter()
+        expected = legacy_user_preferences(store, user_id)
+        legacy_s += time.perf_counter() - start
+
+        start = time.perf_counter()
+        actual = get_user_preferences(user_id, store=store)
+        new_s += time.perf_counter() - start
+
+        frames_differ += actual is None or not expected.equals(actual)
+
+    print(f"get_user_preferences frames differing: {frames_differ} of {len(user_ids)}")
+    print(f"per call: percentile {legacy_s / len(user_ids) * 1e3:.3f} ms, "
+          f"precomputed {new_s / len(user_ids) * 1e3:.3f} ms")
+
+    if mismatches or frames_differ:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -19,19 +19,33 @@ ANIME_CSV = r"artifacts/raw/anime.csv"
 ANIME_SYNOPSIS_CSV =r"artifacts/raw/anime_with_synopsis.csv"
 
 
-X_TRAIN_ARRAY = os.path.join(PROCESSED_DIR,"X_train.array.pkl")
-X_TEST_ARRAY = os.path.join(PROCESSED_DIR,"X_test.array.pkl")
-Y_TRAIN = os.path.join(PROCESSED_DIR,"y_train.array.pkl")
-Y_TEST = os.path.join(PROCESSED_DIR,"y_test.array.pkl")
+# Fixed-length (user, anime, rating) binary record shards read by the tf.data pipeline
+TRAIN_SHARDS_DIR = os.path.join(PROCESSED_DIR,"train_shards")
+TEST_SHARDS_DIR = os.path.join(PROCESSED_DIR,"test_shards")
 
-RATING_DF = os.path.join(PROCESSED_DIR,"rating_df.csv")
-DF = os.path.join(PROCESSED_DIR,"anime_df.csv")
-SYNOPSIS_DF =os.path.join(PROCESSED_DIR,"synopsis_df.csv")
+# Parquet dataset directory: the full run's part plus one part per incremental run
+RATING_DF = os.path.join(PROCESSED_DIR,"rating_df.parquet")
+DF = os.path.join(PROCESSED_DIR,"anime_df.parquet")
+SYNOPSIS_DF =os.path.join(PROCESSED_DIR,"synopsis_df.parquet")
+USER_RATINGS_INDEX = os.path.join(PROCESSED_DIR,"user_ratings_index.npz")
+USER_PREFERENCES_INDEX = os.path.join(PROCESSED_DIR,"user_preferences.npz")
+TOP_RATED_MATRIX = os.path.join(PROCESSED_DIR,"top_rated_matrix.npz")
+ANIME_METADATA = os.path.join(PROCESSED_DIR,"anime_metadata.pkl")
 
-USER2USER_ENCODED =r"artifacts/processed/user2user_encoded.pkl"
-USER2USER_DECODED = r"artifacts/processed/user2user_decoded.pkl"
+# Ratings of users below the activity threshold (append-only records + per-user counts),
+# the input offset incremental runs resume from, and where their writes are staged
+PENDING_RATINGS = os.path.join(PROCESSED_DIR,"pending_ratings.bin")
+PENDING_COUNTS = os.path.join(PROCESSED_DIR,"pending_counts.npz")
+PROCESSING_WATERMARK = os.path.join(PROCESSED_DIR,"watermark.json")
+PROCESSING_STAGING_DIR = os.path.join(PROCESSED_DIR,"staging")
+# Kept ratings of a chunked full run, hash-partitioned by user until each bucket is processed
+STREAM_BUCKETS_DIR = os.path.join(PROCESSED_DIR,"stream_buckets")
+
+USER_ENCODER = os.path.join(PROCESSED_DIR,"user_encoder.npz")
+ANIME_ENCODER = os.path.join(PROCESSED_DIR,"anime_encoder.npz")
 
-ANIME2ANIME_ENCODED = r"artifacts/processed/anime2anime_encoded.pkl"
+# Dict encodings written by older pipelines, read only as a fallback
+USER2USER_DECODED = r"artifacts/processed/user2user_decoded.pkl"
 ANIME2ANIME_DECODED =r"artifacts/processed/anime2anime_decoded.pkl"
 
 
@@ -41,4 +55,20 @@ WEIGHTS_DIR = r"artifacts/weights"
 MODEL_PATH = os.path.join(MODEL_DIR,"model.h5")
 ANIME_WEIGHTS_PATH = os.path.join(WEIGHTS_DIR,"anime_weights.pkl")
 USER_WEIGHTS_PATH  = os.path.join(WEIGHTS_DIR,"user_weights.pkl")
+ANIME_WEIGHTS_NPY = os.path.join(WEIGHTS_DIR,"anime_weights.npy")
+USER_WEIGHTS_NPY = os.path.join(WEIGHTS_DIR,"user_weights.npy")
+ANIME_WEIGHTS_FLOAT16 = os.path.join(WEIGHTS_DIR,"anime_weights_float16.npy")
+ANIME_WEIGHTS_INT8 = os.path.join(WEIGHTS_DIR,"anime_weights_int8.npy")
+USER_WEIGHTS_FLOAT16 = os.path.join(WEIGHTS_DIR,"user_weights_float16.npy")
+USER_WEIGHTS_INT8 = os.path.join(WEIGHTS_DIR,"user_weights_int8.npy")
+ANIME_ANN_INDEX_PATH = os.path.join(WEIGHTS_DIR,"anime_ann_index.npz")
+USER_ANN_INDEX_PATH = os.path.join(WEIGHTS_DIR,"user_ann_index.npz")
+ANIME_NEIGHBOURS_PATH = os.path.join(WEIGHTS_DIR,"anime_neighbours.npz")
+USER_NEIGHBOURS_PATH = os.path.join(WEIGHTS_DIR,"user_neighbours.npz")
 CHECKPOINT_FILE_PATH = r"artifacts/model_checkpoint/weights.weights.h5"
+
+
+## Batch Scoring
+BATCH_DIR = r"artifacts/batch"
+BATCH_RECOMMENDATIONS_DIR = os.path.join(BATCH_DIR,"recommendations")
+BATCH_CHECKPOINT_PATH = os.path.join(BATCH_DIR,"checkpoint.json")
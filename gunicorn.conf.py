@@ -0,0 +1,33 @@
+# Production serving: gunicorn -c gunicorn.conf.py application:app
+import gc
+import multiprocessing
+import os
+
+bind = os.environ.get("BIND", "0.0.0.0:5000")
+
+# Each worker process serves `threads` requests concurrently
+workers = int(os.environ.get("WEB_WORKERS", multiprocessing.cpu_count()))
+threads = int(os.environ.get("WEB_THREADS", 4))
+worker_class = "gthread"
+timeout = int(os.environ.get("WEB_TIMEOUT", 60))
+
+# Import the app (and load every model artifact) once in the master; forked
+# workers then share those pages copy-on-write instead of each loading a copy
+preload_app = True
+
+
+def when_ready(server):
+    # Move the preloaded objects out of the GC's tracked generations so collections
+    # in the workers don't touch (and copy) the shared pages
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    # Sharded search pools belong to one process: each worker starts its own before
+    # its request threads do (the master never starts one). The pools map the same
+    # weight files, and are sized so all of them together use about one process per core
+    from utils.recommender_store import get_store
+    search = get_store().user_search
+    if search is not None:
+        search.workers = max(1, min(search.workers, multiprocessing.cpu_count() // server.cfg.workers))
+        search.start()
@@ -0,0 +1,183 @@
+import argparse
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from src.logger import get_logger
+from src.custom_exception import CustomException
+from pipeline.prediction_pipeline import hybrid_recommendation_batch
+from utils.db_utils import save_recommendations_batch_to_db
+from utils.recommender_store import get_store
+from utils.serialization import is_default_scoring
+from config.path_config import *
+
+logger = get_logger(__name__)
+
+
+# ---------------------------------------------------
+# Worker side
+# ---------------------------------------------------
+def _init_worker():
+    """Load artifacts once per worker (a no-op when inherited from the parent on fork)"""
+    get_store()
+
+
+def _score_block(block_id, user_ids, user_weight, content_weight, top_n):
+    results = hybrid_recommendation_batch(user_ids, user_weight=user_weight,
+                                          content_weight=content_weight, top_n=top_n)
+    return block_id, results
+
+
+# ---------------------------------------------------
+# Sinks
+# ---------------------------------------------------
+class PostgresSink:
+    """
+    Writes each scored block to user_recommendations with one multi-row INSERT.
+    Those rows are keyed by user_id alone, so only default-param runs may use it.
+    """
+
+    def write(self, block_id, results):
+        now = datetime.now()
+        rows = [(user_id, recommendations, now) for user_id, recommendations in results.items() if recommendations]
+        if rows:
+            save_recommendations_batch_to_db(rows)
+
+
+class ParquetSink:
+    """Writes each scored block to its own part file, so re-running a block overwrites it"""
+
+    def __init__(self, output_dir):
+        self.output_dir = output_dir
+        os.makedirs(output_dir, exist_ok=True)
+
+    def write(self, block_id, results):
+        frame = pd.DataFrame({
+            "user_id": list(results.keys()),
+            "recommended_animes": list(results.values()),
+        })
+        frame.to_parquet(os.path.join(self.output_dir, f"part-{block_id:05d}.parquet"), index=False)
+
+
+# ---------------------------------------------------
+# Checkpoints
+# ---------------------------------------------------
+class Checkpoint:
+    """
+    Set of completed block ids, persisted atomically after every block. It only
+    resumes a run over the same users, block size and scoring parameters.
+    """
+
+    def __init__(self, path, user_ids, block_size, params):
+        self.path = path
+        self.meta = {
+            "n_users": len(user_ids),
+            "user_ids_sha1": hashlib.sha1(np.asarray(user_ids, dtype=np.int64).tobytes()).hexdigest(),
+            "block_size": block_size,
+            "params": params,
+        }
+        self.completed = set()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+        if os.path.exists(path):
+            with open(path, "r") as f:
+                state = json.load(f)
+            if state.get("meta") == self.meta:
+                self.completed = set(state["completed"])
+                logger.info(f"Resuming from checkpoint {path}: {len(self.completed)} blocks done.")
+            else:
+                logger.info(f"Checkpoint {path} was written for a different run, starting over.")
+
+    def mark_done(self, block_id):
+        self.completed.add(block_id)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"meta": self.meta, "completed": sorted(self.completed)}, f)
+        os.replace(tmp_path, self.path)
+
+
+class BatchScoringPipeline:
+    """Scores many users in blocks on a process pool and streams the results to a sink"""
+
+    def __init__(self, sink, checkpoint_path, block_size=1000, workers=None,
+                 user_weight=0.5, content_weight=0.5, top_n=10):
+        self.sink = sink
+        self.checkpoint_path = checkpoint_path
+        self.block_size = block_size
+        self.workers = workers or os.cpu_count()
+        self.user_weight = user_weight
+        self.content_weight = content_weight
+        self.top_n = top_n
+
+        if isinstance(sink, PostgresSink) and not is_default_scoring(user_weight, content_weight, top_n):
+            raise ValueError("user_recommendations rows carry no scoring parameters; "
+                             "write runs with non-default parameters to parquet")
+
+    def run(self, user_ids=None):
+        try:
+            # Load once in the parent so forked workers share the artifacts copy-on-write
+            store = get_store()
+            user_ids = np.sort(store.user_encoder.ids).tolist() if user_ids is None else sorted(user_ids)
+
+            blocks = [user_ids[i:i + self.block_size] for i in range(0, len(user_ids), self.block_size)]
+            params = {"user_weight": self.user_weight, "content_weight": self.content_weight, "top_n": self.top_n}
+            checkpoint = Checkpoint(self.checkpoint_path, user_ids, self.block_size, params)
+            pending = [block_id for block_id in range(len(blocks)) if block_id not in checkpoint.completed]
+            logger.info(f"Scoring {len(user_ids)} users: {len(pending)} of {len(blocks)} blocks pending.")
+
+            with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker) as executor:
+                futures = [
+                    executor.submit(_score_block, block_id, blocks[block_id],
+                                    self.user_weight, self.content_weight, self.top_n)
+                    for block_id in pending
+                ]
+                for future in as_completed(futures):
+                    block_id, results = future.result()
+                    self.sink.write(block_id, results)
+                    checkpoint.mark_done(block_id)
+                    logger.info(f"Block {block_id} done ({len(checkpoint.completed)}/{len(blocks)}).")
+
+            logger.info("Batch scoring completed successfully.")
+
+        except Exception as e:
+            logger.error(f"Batch scoring failed: {e}")
+            raise CustomException("Batch scoring failed", e)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute hybrid recommendations for many users.")
+    parser.add_argument("--output", choices=["postgres", "parquet"], default="postgres")
+    parser.add_argument("--output-dir", default=BATCH_RECOMMENDATIONS_DIR, help="parquet output directory")
+    parser.add_argument("--checkpoint", default=BATCH_CHECKPOINT_PATH)
+    parser.add_argument("--user-ids-file", help="file with one user id per line; defaults to every known user")
+    parser.add_argument("--block-size", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--user-weight", type=float, default=0.5)
+    parser.add_argument("--content-weight", type=float, default=0.5)
+    parser.add_argument("--top-n", type=int, default=10)
+    args = parser.parse_args()
+
+    user_ids = None
+    if args.user_ids_file:
+        with open(args.user_ids_file, "r") as f:
+            user_ids = [int(line) for line in f if line.strip()]
+
+    sink = ParquetSink(args.output_dir) if args.output == "parquet" else PostgresSink()
+
+    pipeline = BatchScoringPipeline(
+        sink=sink,
+        checkpoint_path=args.checkpoint,
+        block_size=args.block_size,
+        workers=args.workers,
+        user_weight=args.user_weight,
+        content_weight=args.content_weight,
+        top_n=args.top_n,
+    )
+    pipeline.run(user_ids)
+
+
+if __name__ == "__main__":
+    main()
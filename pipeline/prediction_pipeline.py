@@ -1,5 +1,95 @@
 from config.path_config import *
 from utils.helpers import *
+from utils.similarity import top_k
+from utils.recommender_store import get_store
+
+
+# Collaborative candidates whose content neighbours are added to the fusion
+N_SEEDS = 10
+
+
+def _watched_codes(user_id, store):
+    """Encoded ids of every anime the user has rated, None for users without ratings"""
+    watched = store.user_ratings(user_id)
+    if watched is None or len(watched[0]) == 0:
+        print(f"Error: User {user_id} has not watched any animes")
+        return None
+    codes = store.anime_encoder.encode(watched[0])
+    return codes[codes >= 0]
+
+
+def _scale_to_max(scores):
+    """Divide by the largest score so it becomes 1; left as is when nothing is positive"""
+    peak = scores.max(initial=0.0)
+    return scores / peak if peak > 0 else scores
+
+
+def _fuse_scores(candidate_codes, counts, content_codes, content_similarities, watched_codes,
+                 user_weight, content_weight, top_n, store):
+    """
+    Fuse collaborative and content scores into dense float32 vectors indexed by
+    encoded anime id, then pick the ``top_n`` best with argpartition.
+
+    The collaborative signal is the number of similar users rating an anime highly
+    and the content signal its summed similarity to the seeds it neighbours (up to
+    N_SEEDS terms). Each is divided by its maximum, so the best anime of either
+    signal scores 1 and equal weights give both equal pull. Watched animes, and
+    animes neither signal proposes, are masked out.
+
+    Returns a list of dicts with the combined ``score`` and its ``user_score`` and
+    ``content_score`` parts, best first.
+    """
+    n_animes = store.top_rated.n_animes
+
+    user_scores = np.zeros(n_animes, dtype=np.float32)
+    user_scores[candidate_codes] = counts
+    user_scores = _scale_to_max(user_scores)
+
+    content_scores = np.bincount(content_codes, weights=content_similarities, minlength=n_animes).astype(np.float32)
+    content_scores = _scale_to_max(content_scores)
+
+    scores = user_weight * user_scores + content_weight * content_scores
+
+    proposed = np.zeros(n_animes, dtype=bool)
+    proposed[candidate_codes] = True
+    proposed[content_codes] = True
+    proposed[watched_codes] = False
+    scores[~proposed] = -np.inf
+
+    best = top_k(scores, top_n)
+    best = best[np.isfinite(scores[best])]
+
+    # Resolve encoded ids -> names only for the winners
+    anime_ids = store.anime_encoder.decode(best)
+    found = store.anime_catalog.positions(anime_ids) >= 0
+    best, names = best[found], store.anime_catalog.lookup(anime_ids[found])["eng_version"].values
+
+    return [
+        {"anime_name": name, "score": float(scores[code]),
+         "user_score": float(user_weight * user_scores[code]), "content_score": float(content_weight * content_scores[code])}
+        for name, code in zip(names, best)
+    ]
+
+
+def _seed_codes(candidate_codes, store):
+    """The best N_SEEDS candidates with an embedding; animes encoded after training have none yet"""
+    seeds = candidate_codes[:N_SEEDS]
+    return seeds[seeds < len(store.anime_weights)]
+
+
+def _content_neighbours(seed_codes, store, n=10):
+    """
+    (closest, similarities, keep) for the ``n`` content neighbours of each encoded
+    seed; ``keep`` drops the seed itself and animes missing from the catalog.
+    """
+    seed_codes = np.asarray(seed_codes, dtype=np.int64)
+    if len(seed_codes) == 0:
+        empty = np.empty((0, n + 1), dtype=np.int64)
+        return empty, empty.astype(np.float32), empty.astype(bool)
+
+    closest, similarities = similar_anime_codes(seed_codes, n + 1, store=store)
+    recommendable = store.anime_catalog.positions(store.anime_encoder.decode(closest)) >= 0
+    return closest, similarities, recommendable & (closest != seed_codes[:, None])
 
 
 def hybrid_recommendation_system(user_id, user_weight=0.5, content_weight=0.5, top_n=10):
@@ -15,31 +105,98 @@ def hybrid_recommendation_system(user_id, user_weight=0.5, content_weight=0.5, t
     Returns:
         List[str]: Top-N recommended anime names.
     """
-    similar_users =find_similar_users(user_id,USER_WEIGHTS_PATH,USER2USER_ENCODED,USER2USER_DECODED)
-    user_pref = get_user_preferences(user_id,RATING_DF, DF)
-    user_recommended_animes =get_user_recommendations(similar_users,user_pref,DF, SYNOPSIS_DF,RATING_DF)
-    user_recommended_anime_list = user_recommended_animes["anime_name"].tolist()
+    recommendations = hybrid_recommendation_details(user_id, user_weight, content_weight, top_n)
+    return [recommendation["anime_name"] for recommendation in recommendations]
+
+
+def hybrid_recommendation_details(user_id, user_weight=0.5, content_weight=0.5, top_n=10, store=None):
+    """
+    Same recommendations as hybrid_recommendation_system, with their scores.
+
+    Collaborative candidates are the animes the similar users rate highly; the
+    content neighbours of the best N_SEEDS of them are added, and both signals are
+    fused over the whole catalogue (see _fuse_scores).
+
+    Returns:
+        List[dict]: ``anime_name``, combined ``score`` and its ``user_score`` and
+        ``content_score`` parts for each recommendation, best first.
+    """
+    store = get_store() if store is None else store
+
+    similar_users =find_similar_users(user_id, store=store)
+    if similar_users is None:
+        return []
+    watched_codes = _watched_codes(user_id, store)
+    if watched_codes is None:
+        return []
+
+    candidate_codes, counts = user_candidate_counts(user_id, similar_users, store=store)
 
-    # Content-based recommendations
-    content_recommended_animes = []
+    # Content neighbours of the best collaborative candidates
+    closest, similarities, keep = _content_neighbours(_seed_codes(candidate_codes, store), store)
 
+    return _fuse_scores(candidate_codes, counts, closest[keep], similarities[keep],
+                        watched_codes, user_weight, content_weight, top_n, store)
 
-    for anime in user_recommended_anime_list:
-        similar_animes = find_similar_animes(anime, ANIME_WEIGHTS_PATH, ANIME2ANIME_ENCODED, ANIME2ANIME_DECODED, DF)
 
-        if similar_animes is not None and not similar_animes.empty:
-            content_recommended_animes.extend(similar_animes["anime_name"].tolist())
-        else:
-            print(f"No similar anime found {anime}")
+def hybrid_recommendation_batch(user_ids, user_weight=0.5, content_weight=0.5, top_n=10, store=None,
+                                with_scores=False):
+    """
+    Hybrid recommendations for many users at once.
+
+    Similar users for the whole batch come from block-wise matrix multiplies and the
+    content neighbours of every distinct seed anime from a single batched lookup;
+    each user's scores are then fused as in hybrid_recommendation_details.
+
+    Args:
+        user_ids (Iterable[int]): The user IDs to get recommendations for.
+        user_weight (float): Weight for user-based recommendations.
+        content_weight (float): Weight for content-based recommendations.
+        top_n (int): Number of top recommendations to return.
+        store (RecommenderStore): Artifacts to score with, defaults to the process-wide store.
+        with_scores (bool): Return the scored dicts of hybrid_recommendation_details instead of names.
+
+    Returns:
+        Dict[int, List[str]]: Recommended anime names per user; empty for unknown users.
+    """
+    store = get_store() if store is None else store
+    user_ids = list(user_ids)
+
+    similar_users_by_user = find_similar_users_batch(user_ids, store=store)
 
-    combined_scores = {}
+    candidates = {}
+    for user_id in user_ids:
+        similar_users = similar_users_by_user.get(user_id)
+        if similar_users is None:
+            continue
+        watched_codes = _watched_codes(user_id, store)
+        if watched_codes is None:
+            continue
+        try:
+            candidate_codes, counts = user_candidate_counts(user_id, similar_users, store=store)
+            candidates[user_id] = (candidate_codes, counts, watched_codes)
+        except Exception as e:
+            print(f"Error scoring user {user_id}: {str(e)}")
 
-    for anime in user_recommended_anime_list:
-        combined_scores[anime] = combined_scores.get(anime,0) + user_weight
+    # Content neighbours of every distinct seed, computed once for the batch
+    seed_codes = np.unique(np.concatenate(
+        [_seed_codes(codes, store) for codes, *_ in candidates.values()] + [np.empty(0, dtype=np.int64)]
+    ))
+    closest, similarities, keep = _content_neighbours(seed_codes, store)
 
-    for anime in content_recommended_animes:
-        combined_scores[anime] = combined_scores.get(anime,0) + content_weight
+    results = {}
+    for user_id in user_ids:
+        if user_id not in candidates:
+            results[user_id] = []
+            continue
 
-    sorted_animes = sorted(combined_scores.items() , key=lambda x:x[1] , reverse=True)
+        candidate_codes, counts, watched_codes = candidates[user_id]
+        rows = np.searchsorted(seed_codes, _seed_codes(candidate_codes, store))
+        recommendations = _fuse_scores(candidate_codes, counts, closest[rows][keep[rows]],
+                                       similarities[rows][keep[rows]], watched_codes,
+                                       user_weight, content_weight, top_n, store)
+        results[user_id] = recommendations if with_scores else [
+            recommendation["anime_name"] for recommendation in recommendations
+        ]
 
-    return [anime for anime , score in sorted_animes[:10]]
+    return results
@@ -1,18 +1,47 @@
 from src.data_processing import DataProcessor
 from src.model_training import ModelTraining
 from utils.common_function import read_yaml, read_json_credentials
+from utils.record_shards import ROWS_PER_SHARD
 from config.path_config import *
 
 
 def main():
-    data_processor = DataProcessor(ANIMELIST_CSV, PROCESSED_DIR)
-    data_processor.run()
+    config = read_yaml(CONFIG_PATH) or {}
+
+    processing_config = config.get("data_processing", {})
+    data_processor = DataProcessor(
+        ANIMELIST_CSV, PROCESSED_DIR,
+        chunk_size=processing_config.get("chunk_size"),
+        rows_per_shard=processing_config.get("rows_per_shard", ROWS_PER_SHARD)
+    )
+    if processing_config.get("incremental", False):
+        data_processor.run_incremental()
+    else:
+        data_processor.run()
 
     model_trainer = ModelTraining(PROCESSED_DIR)
     model = model_trainer.train_model()
 
     model_trainer.save_model_weights(model=model)
 
+    quantization_config = config.get("quantization", {})
+    if quantization_config.get("enabled", True):
+        model_trainer.export_quantized_weights(
+            precisions=quantization_config.get("precisions", ["float16", "int8"])
+        )
+
+    neighbours_config = config.get("neighbours", {})
+    if neighbours_config.get("enabled", True):
+        model_trainer.build_neighbour_tables(k=neighbours_config.get("k", 50))
+
+    ann_config = config.get("ann", {})
+    if ann_config.get("enabled", True):
+        model_trainer.build_ann_indexes(
+            n_lists=ann_config.get("n_lists"),
+            n_probe=ann_config.get("n_probe", 8),
+            min_recall=ann_config.get("min_recall", 0.9),
+        )
+
 
 if __name__ == "__main__":
     main()
@@ -1,32 +1,79 @@
+import argparse
+import io
+import json
 import os
+import shutil
 import sys
+from datetime import datetime
 import pandas as pd
 import numpy as np
-import joblib
 from sklearn.model_selection import train_test_split
 from src.logger import get_logger
 from src.custom_exception import CustomException
+from utils.ratings_index import UserRatingsIndex
+from utils.anime_catalog import AnimeCatalog
+from utils.id_encoder import IdEncoder
+from utils.user_preferences import UserPreferenceIndex
+from utils.top_rated import TopRatedMatrix, recommendable_anime_ids
+from utils.record_shards import write_record_shards, list_record_shards, ROWS_PER_SHARD
+from utils.pending_ratings import PendingRatings, PENDING_DTYPE
+from utils.staged_writes import StagedWrites
+from utils.csr import take_rows, stack_rows
+from utils.common_function import load_data
 from config.path_config import *
 
 logger = get_logger(__name__)
 
+# On-disk dtypes of the processed tables; ids fit in int32 and scaled ratings in float32
+RAW_RATING_DTYPES = {"user_id": np.int32, "anime_id": np.int32, "rating": np.uint8}
+RATING_DTYPES = {"user_id": np.int32, "anime_id": np.int32, "rating": np.float32, "user": np.int32, "anime": np.int32}
+ANIME_DTYPES = {"anime_id": np.int32, "Score": np.float32, "Genres": "category", "Episodes": np.float32,
+                "Type": "category", "Members": np.int32, "Premiered": "category"}
+SYNOPSIS_DTYPES = {"MAL_ID": np.int32, "Genres": "category"}
+
+
+def hash_ids(*columns, seed=0):
+    """Well-mixed uint64 hash of each row of integer id columns (splitmix64 finalizer)"""
+    hashed = np.full(len(columns[0]), seed, dtype=np.uint64)
+    for column in columns:
+        hashed ^= np.asarray(column).astype(np.uint64)
+        hashed ^= hashed >> np.uint64(30)
+        hashed *= np.uint64(0xBF58476D1CE4E5B9)
+        hashed ^= hashed >> np.uint64(27)
+        hashed *= np.uint64(0x94D049BB133111EB)
+        hashed ^= hashed >> np.uint64(31)
+    return hashed
+
 
 class DataProcessor:
-    def __init__(self, input_file, output_dir):
+    def __init__(self, input_file, output_dir, chunk_size=None, rows_per_shard=ROWS_PER_SHARD):
         self.input_file = input_file
         self.output_dir = output_dir
+        # Rows per chunk when parsing the ratings CSV; None parses the whole file at once
+        self.chunk_size = chunk_size
+        self.rows_per_shard = rows_per_shard
 
         self.rating_df = None
         self.anime_df = None
+        # Raw ratings of users below the activity threshold, kept for incremental runs:
+        # a frame after filter_users, an append-only PendingRatings file once streamed
+        self.pending_df = None
+        self.pending = None
+        self.min_rating = None
+        self.rating_range = None
+        # Kept ratings and their user buckets in a chunked run
+        self.kept_rows = None
+        self.n_buckets = None
+        self.offset = None
+        self.user_ratings_index = None
+        self.user_preferences = None
         self.x_train_array = None
         self.x_test_array = None
         self.y_train = None
         self.y_test = None
 
-        self.user2user_encoded = {}
-        self.user2user_decoded = {}
-        self.anime2anime_encoded = {}
-        self.anime2anime_decoded = {}
+        self.user_encoder = IdEncoder()
+        self.anime_encoder = IdEncoder()
 
         os.makedirs(self.output_dir, exist_ok=True)
         logger.info("DataProcessor initialized.")
@@ -37,7 +84,8 @@ class DataProcessor:
     def load_data(self, usecols):
         """Load ratings CSV with specified columns"""
         try:
-            self.rating_df = pd.read_csv(self.input_file, low_memory=True, usecols=usecols)
+            dtypes = {col: dtype for col, dtype in RAW_RATING_DTYPES.items() if col in usecols}
+            self.rating_df = pd.read_csv(self.input_file, low_memory=True, usecols=usecols, dtype=dtypes)
             logger.info("Data loaded successfully.")
         except Exception as e:
             logger.error(f"Failed to load data: {e}")
@@ -47,7 +95,10 @@ class DataProcessor:
         """Filter users with at least `min_rating` interactions"""
         try:
             user_counts = self.rating_df["user_id"].value_counts() # type: ignore
-            self.rating_df = self.rating_df[self.rating_df["user_id"].isin(user_counts[user_counts >= min_rating].index)].copy() # type: ignore
+            kept = self.rating_df["user_id"].isin(user_counts[user_counts >= min_rating].index) # type: ignore
+            self.pending_df = self.rating_df[~kept] # type: ignore
+            self.rating_df = self.rating_df[kept].copy() # type: ignore
+            self.min_rating = min_rating
             logger.info("Filtered users with at least %d ratings.", min_rating)
         except Exception as e:
             logger.error(f"Failed to filter users: {e}")
@@ -64,6 +115,179 @@ class DataProcessor:
             logger.error(f"Failed to drop duplicates: {e}")
             raise CustomException("Failed to drop duplicates", sys)
 
+    # ---------------------------------------------------
+    # 1b. Streaming Load (ratings larger than RAM)
+    # ---------------------------------------------------
+    def _read_chunks(self, usecols):
+        dtypes = {col: dtype for col, dtype in RAW_RATING_DTYPES.items() if col in usecols}
+        return pd.read_csv(self.input_file, usecols=usecols, dtype=dtypes, chunksize=self.chunk_size)
+
+    def count_users(self, usecols):
+        """First pass: per-user rating counts and rating range, one chunk at a time"""
+        try:
+            counts, min_ratings, max_ratings = [], [], []
+            for chunk in self._read_chunks(usecols):
+                grouped = chunk.groupby("user_id")["rating"]
+                counts.append(grouped.size())
+                min_ratings.append(grouped.min())
+                max_ratings.append(grouped.max())
+
+            # Users may span chunk boundaries, so reduce the per-chunk aggregates once more
+            counts = pd.concat(counts).groupby(level=0).sum()
+            min_ratings = pd.concat(min_ratings).groupby(level=0).min()
+            max_ratings = pd.concat(max_ratings).groupby(level=0).max()
+
+            logger.info(f"Counted ratings of {len(counts)} users in chunks of {self.chunk_size} rows.")
+            return counts, min_ratings, max_ratings
+        except Exception as e:
+            logger.error(f"Failed to count user ratings: {e}")
+            raise CustomException("Failed to count user ratings", sys)
+
+    def stream_data(self, usecols, min_rating=400):
+        """
+        Second pass of a chunked run: the rows of users below the threshold are
+        appended to the pending file and the kept rows spilled, as raw records, into
+        buckets hash-partitioned by user_id, one chunk at a time. There are about as
+        many buckets as chunks, so that process_buckets can take one bucket at a time.
+        """
+        counts, min_ratings, max_ratings = self.count_users(usecols)
+
+        try:
+            kept_users = counts.index[counts >= min_rating]
+            self.kept_rows = int(counts[kept_users].sum())
+            self.rating_range = (min_ratings[kept_users].min(), max_ratings[kept_users].max())
+            self.min_rating = min_rating
+            self.n_buckets = max(1, -(-self.kept_rows // self.chunk_size))
+            logger.info(f"Keeping {len(kept_users)} users with at least {min_rating} ratings "
+                        f"({self.kept_rows} ratings in {self.n_buckets} buckets).")
+
+            shutil.rmtree(STREAM_BUCKETS_DIR, ignore_errors=True)
+            os.makedirs(STREAM_BUCKETS_DIR)
+            self.pending = PendingRatings.create(PENDING_RATINGS)
+            for chunk in self._read_chunks(usecols):
+                kept = chunk["user_id"].isin(kept_users).values
+                self.pending.append(chunk[~kept])
+
+                records = np.empty(int(kept.sum()), dtype=PENDING_DTYPE)
+                for name in PENDING_DTYPE.names:
+                    records[name] = chunk[name].values[kept]
+                buckets = hash_ids(records["user_id"]) % np.uint64(self.n_buckets)
+                order = np.argsort(buckets, kind="stable")
+                bounds = np.searchsorted(buckets[order], np.arange(self.n_buckets + 1))
+                for bucket in np.flatnonzero(np.diff(bounds)):
+                    with open(self._bucket_path(bucket), "ab") as f:
+                        records[order[bounds[bucket]:bounds[bucket + 1]]].tofile(f)
+
+            logger.info(f"Filtered {self.kept_rows} ratings into buckets -> {STREAM_BUCKETS_DIR}")
+        except Exception as e:
+            logger.error(f"Failed to stream ratings: {e}")
+            raise CustomException("Failed to stream ratings", sys)
+
+    @staticmethod
+    def _bucket_path(bucket):
+        return os.path.join(STREAM_BUCKETS_DIR, f"bucket-{bucket:05d}.bin")
+
+    def process_buckets(self, test_size=10000, random_state=43):
+        """
+        Chunked equivalent of drop_duplicates through build_user_preferences, one
+        bucket at a time.
+
+        A user's ratings all sit in one bucket, so each bucket is deduplicated, scaled
+        and encoded on its own; its users take the next block of codes. Rows go to the
+        test set by a hash of (user_id, anime_id), which keeps about ``test_size`` of
+        them overall, and each bucket is shuffled before its train/test shards and its
+        part of the rating table are written. The per-user indexes are built per
+        bucket and stacked, so only they grow with the data.
+        """
+        try:
+            self.anime_encoder = IdEncoder()
+            self.user_encoder = IdEncoder()
+            min_value, max_value = self.rating_range
+            test_fraction = test_size / max(self.kept_rows, 1)
+            rng = np.random.default_rng(random_state)
+
+            for shard_dir in [TRAIN_SHARDS_DIR, TEST_SHARDS_DIR]:
+                for stale in list_record_shards(shard_dir):
+                    os.remove(stale)
+            if os.path.isdir(RATING_DF):
+                shutil.rmtree(RATING_DF)
+            elif os.path.exists(RATING_DF):
+                os.remove(RATING_DF)
+            os.makedirs(RATING_DF)
+
+            ratings_parts, preference_parts = [], []
+            n_rows = n_duplicates = n_test = 0
+            for bucket in range(self.n_buckets):
+                path = self._bucket_path(bucket)
+                records = np.fromfile(path, dtype=PENDING_DTYPE) if os.path.exists(path) else np.empty(0, PENDING_DTYPE)
+                rating_df = pd.DataFrame({name: records[name] for name in PENDING_DTYPE.names}).drop_duplicates()
+                n_duplicates += len(records) - len(rating_df)
+                del records
+
+                first_code = len(self.user_encoder)
+                rating_df = rating_df.assign(
+                    rating=((rating_df["rating"] - min_value) / (max_value - min_value)).astype(np.float32),
+                    user=self.user_encoder.extend(rating_df["user_id"].values).astype(np.int32),
+                    anime=self.anime_encoder.extend(rating_df["anime_id"].values).astype(np.int32),
+                )
+
+                rating_df = rating_df.iloc[rng.permutation(len(rating_df))].reset_index(drop=True)
+
+                # Built from the shuffled rows, so each user's ratings follow the table's order
+                index = UserRatingsIndex.from_ratings(
+                    rating_df["user"].values - first_code, rating_df["anime_id"].values, rating_df["rating"].values,
+                    n_users=len(self.user_encoder) - first_code
+                )
+                ratings_parts.append(index)
+                preference_parts.append(UserPreferenceIndex.build(index))
+
+                draws = hash_ids(rating_df["user_id"].values, rating_df["anime_id"].values, seed=random_state)
+                test = (draws >> np.uint64(11)) / float(1 << 53) < test_fraction
+
+                prefix = f"part-b{bucket:05d}"
+                for shard_dir, rows in [(TRAIN_SHARDS_DIR, ~test), (TEST_SHARDS_DIR, test)]:
+                    write_record_shards(rating_df["user"].values[rows], rating_df["anime"].values[rows],
+                                        rating_df["rating"].values[rows], shard_dir, self.rows_per_shard, prefix=prefix)
+                rating_df.astype(RATING_DTYPES).to_parquet(os.path.join(RATING_DF, f"part-{bucket:05d}.parquet"), index=False)
+
+                n_rows += len(rating_df)
+                n_test += int(test.sum())
+                if os.path.exists(path):
+                    os.remove(path)
+
+            shutil.rmtree(STREAM_BUCKETS_DIR)
+            logger.info(f"Dropped duplicates: {n_duplicates} removed.")
+            logger.info(f"Ratings scaled from ({min_value}, {max_value}) to (0, 1).")
+            logger.info(f"Wrote {n_rows} ratings: {n_rows - n_test} train, {n_test} test, {self.n_buckets} parts.")
+        except Exception as e:
+            logger.error(f"Failed to process rating buckets: {e}")
+            raise CustomException("Failed to process rating buckets", sys)
+
+        try:
+            for name, encoder in {"user_encoder": self.user_encoder, "anime_encoder": self.anime_encoder}.items():
+                path = os.path.join(self.output_dir, f"{name}.npz")
+                encoder.save(path)
+                logger.info(f"Saved: {name} -> {path}")
+
+            self.user_ratings_index = UserRatingsIndex(
+                indptr=stack_rows([part.indptr for part in ratings_parts]),
+                anime_ids=np.concatenate([part.anime_ids for part in ratings_parts]),
+                ratings=np.concatenate([part.ratings for part in ratings_parts]),
+            )
+            del ratings_parts
+            self.user_ratings_index.save(USER_RATINGS_INDEX)
+            logger.info(f"User ratings index built for {self.user_ratings_index.n_users} users.")
+
+            self.user_preferences = UserPreferenceIndex(
+                indptr=stack_rows([part.indptr for part in preference_parts]),
+                anime_ids=np.concatenate([part.anime_ids for part in preference_parts]),
+                thresholds=np.concatenate([part.thresholds for part in preference_parts]),
+            )
+            self.user_preferences.save(USER_PREFERENCES_INDEX)
+        except Exception as e:
+            logger.error(f"Failed to save bucket artifacts: {e}")
+            raise CustomException("Failed to save bucket artifacts", sys)
+
     # ---------------------------------------------------
     # 2. Preprocessing
     # ---------------------------------------------------
@@ -73,9 +297,8 @@ class DataProcessor:
             min_rating = self.rating_df["rating"].min() # type: ignore
             max_rating = self.rating_df["rating"].max() # type: ignore
 
-            self.rating_df["rating"] = self.rating_df["rating"].apply( # type: ignore
-                lambda x: (x - min_rating) / (max_rating - min_rating)
-            )
+            self.rating_df["rating"] = (self.rating_df["rating"] - min_rating) / (max_rating - min_rating) # type: ignore
+            self.rating_range = (min_rating, max_rating)
 
             logger.info(f"Ratings scaled from ({min_rating}, {max_rating}) to (0, 1).")
         except Exception as e:
@@ -85,20 +308,17 @@ class DataProcessor:
     def encode_data(self):
         """Map user and anime IDs to continuous integer encodings"""
         try:
-            user_ids = self.rating_df["user_id"].unique().tolist() # type: ignore
-            self.user2user_encoded = {x: i for i, x in enumerate(user_ids)}
-            self.user2user_decoded = {i: x for i, x in enumerate(user_ids)}
-            self.rating_df["user"] = self.rating_df["user_id"].map(self.user2user_encoded) # type: ignore
+            # Codes follow the order of first appearance, like unique()
+            self.user_encoder, user_codes = IdEncoder.factorize(self.rating_df["user_id"]) # type: ignore
+            self.rating_df["user"] = user_codes # type: ignore
             logger.info("Encoded user IDs.")
         except Exception as e:
             logger.error(f"Failed to encode user IDs: {e}")
             raise CustomException("Failed encoding user IDs", sys)
 
         try:
-            anime_ids = self.rating_df["anime_id"].unique().tolist() # type: ignore
-            self.anime2anime_encoded = {x: i for i, x in enumerate(anime_ids)}
-            self.anime2anime_decoded = {i: x for i, x in enumerate(anime_ids)}
-            self.rating_df["anime"] = self.rating_df["anime_id"].map(self.anime2anime_encoded) # type: ignore
+            self.anime_encoder, anime_codes = IdEncoder.factorize(self.rating_df["anime_id"]) # type: ignore
+            self.rating_df["anime"] = anime_codes # type: ignore
             logger.info("Encoded anime IDs.")
         except Exception as e:
             logger.error(f"Failed to encode anime IDs: {e}")
@@ -146,27 +366,28 @@ class DataProcessor:
         """Save encoded maps and training/test data"""
         try:
             # Save encodings
-            encoded_maps = {
-                "user2user_encoded": self.user2user_encoded,
-                "user2user_decoded": self.user2user_decoded,
-                "anime2anime_encoded": self.anime2anime_encoded,
-                "anime2anime_decoded": self.anime2anime_decoded
+            encoders = {
+                "user_encoder": self.user_encoder,
+                "anime_encoder": self.anime_encoder,
             }
 
-            for name, data in encoded_maps.items():
-                path = os.path.join(self.output_dir, f"{name}.pkl")
-                joblib.dump(data, path)
+            for name, encoder in encoders.items():
+                path = os.path.join(self.output_dir, f"{name}.npz")
+                encoder.save(path)
                 logger.info(f"Saved: {name} -> {path}")
 
-            # Save training data
-            joblib.dump(self.x_train_array, X_TRAIN_ARRAY)
-            joblib.dump(self.x_test_array, X_TEST_ARRAY)
-            joblib.dump(self.y_train, Y_TRAIN)
-            joblib.dump(self.y_test, Y_TEST)
-            logger.info("Train/test arrays saved.")
-
-            # Save ratings DataFrame
-            self.rating_df.to_csv(RATING_DF, index=False)
+            # Save training data as binary record shards
+            write_record_shards(*self.x_train_array, self.y_train, TRAIN_SHARDS_DIR, self.rows_per_shard)
+            write_record_shards(*self.x_test_array, self.y_test, TEST_SHARDS_DIR, self.rows_per_shard)
+            logger.info("Train/test shards saved.")
+
+            # Save ratings DataFrame as the first part of the dataset incremental runs add to
+            if os.path.isdir(RATING_DF):
+                shutil.rmtree(RATING_DF)
+            elif os.path.exists(RATING_DF):
+                os.remove(RATING_DF)
+            os.makedirs(RATING_DF)
+            self.rating_df.astype(RATING_DTYPES).to_parquet(os.path.join(RATING_DF, "part-00000.parquet"), index=False)
             logger.info(f"Ratings DataFrame saved -> {RATING_DF}")
 
             logger.info("All artifacts saved successfully.")
@@ -174,9 +395,41 @@ class DataProcessor:
             logger.error(f"Failed to save artifacts: {e}")
             raise CustomException("Failed to save artifacts", sys)
 
+    def build_user_index(self):
+        """Save ratings grouped per user so serving can slice a user's history"""
+        try:
+            index = UserRatingsIndex.from_ratings(
+                self.rating_df["user"].values, # type: ignore
+                self.rating_df["anime_id"].values, # type: ignore
+                self.rating_df["rating"].values, # type: ignore
+                n_users=len(self.user_encoder)
+            )
+            index.save(USER_RATINGS_INDEX)
+            self.user_ratings_index = index
+            logger.info(f"User ratings index built for {index.n_users} users.")
+        except Exception as e:
+            logger.error(f"Failed to build user ratings index: {e}")
+            raise CustomException("Failed to build user ratings index", sys)
+
+    def build_user_preferences(self):
+        """Save each user's rating threshold and top-rated animes, computed once for serving"""
+        try:
+            self.user_preferences = UserPreferenceIndex.build(self.user_ratings_index)
+            self.user_preferences.save(USER_PREFERENCES_INDEX)
+        except Exception as e:
+            logger.error(f"Failed to build user preferences: {e}")
+            raise CustomException("Failed to build user preferences", sys)
+
     # ---------------------------------------------------
     # 5. Process Anime Metadata
     # ---------------------------------------------------
+    @staticmethod
+    def anime_names(df):
+        """English name of each row's anime, falling back to its Name (first row per anime_id)"""
+        first_rows = df.drop_duplicates(subset="anime_id").set_index("anime_id")
+        names = first_rows["English name"].fillna(first_rows["Name"])
+        return df["anime_id"].map(names)
+
     def process_anime_data(self):
         """Prepare anime metadata and save"""
         try:
@@ -186,21 +439,18 @@ class DataProcessor:
             df.replace("Unknown", np.nan, inplace=True)
             df["anime_id"] = df["MAL_ID"]
 
-            def get_anime_name(anime_id):
-                try:
-                    row = df[df['anime_id'] == anime_id]
-                    eng_name = row['English name'].values[0]
-                    return row['Name'].values[0] if pd.isna(eng_name) else eng_name
-                except (IndexError, KeyError):
-                    return f"Unknown Anime (ID: {anime_id})"
-
-            df["eng_version"] = df["anime_id"].apply(get_anime_name)
+            df["eng_version"] = self.anime_names(df)
 
             df.sort_values(by="Score", ascending=False, na_position="last", inplace=True)
             df = df[["anime_id", "eng_version", "Score", "Genres", "Episodes", "Type", "Members", "Premiered"]]
+            df = df.assign(Episodes=pd.to_numeric(df["Episodes"], errors="coerce")).astype(ANIME_DTYPES)
+            synopsis_df = synopsis_df.astype(SYNOPSIS_DTYPES)
+
+            df.to_parquet(DF, index=False)
+            synopsis_df.to_parquet(SYNOPSIS_DF, index=False)
 
-            df.to_csv(DF, index=False)
-            synopsis_df.to_csv(SYNOPSIS_DF, index=False)
+            AnimeCatalog.from_frames(df, synopsis_df).save(ANIME_METADATA)
+            self.anime_df = df
 
             logger.info("Anime metadata and synopsis saved successfully.")
         except Exception as e:
@@ -208,19 +458,227 @@ class DataProcessor:
             raise CustomException("Failed to process anime data", sys)
 
 
+    def build_top_rated_matrix(self):
+        """Save each user's top-rated animes as a sparse matrix for collaborative scoring"""
+        try:
+            matrix = TopRatedMatrix.build(
+                self.user_preferences, self.anime_encoder, recommendable_anime_ids(self.anime_df)
+            )
+            matrix.save(TOP_RATED_MATRIX)
+        except Exception as e:
+            logger.error(f"Failed to build top-rated matrix: {e}")
+            raise CustomException("Failed to build top-rated matrix", sys)
+
+    # ---------------------------------------------------
+    # 6. Incremental Updates
+    # ---------------------------------------------------
+    def _state(self, offset):
+        return {
+            "input_file": os.path.abspath(self.input_file),
+            "offset": int(offset),
+            "pending_bytes": int(self.pending.size), # type: ignore
+            "min_rating": int(self.min_rating), # type: ignore
+            "rating_range": [float(value) for value in self.rating_range], # type: ignore
+            "updated_at": datetime.now().isoformat(),
+        }
+
+    def save_state(self, offset):
+        """Save the pending users' counts and the watermark the next incremental run resumes from"""
+        try:
+            if self.pending is None:
+                self.pending = PendingRatings.create(PENDING_RATINGS)
+                self.pending.append(self.pending_df)
+            self.pending.save_counts(PENDING_COUNTS)
+            logger.info(f"{len(self.pending)} pending ratings saved -> {PENDING_RATINGS}")
+
+            tmp_path = f"{PROCESSING_WATERMARK}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(self._state(offset), f)
+            os.replace(tmp_path, PROCESSING_WATERMARK)
+            logger.info(f"Watermark saved at byte {offset} -> {PROCESSING_WATERMARK}")
+        except Exception as e:
+            logger.error(f"Failed to save processing state: {e}")
+            raise CustomException("Failed to save processing state", sys)
+
+    def load_watermark(self):
+        """Return the state saved by the last run, or None when the input cannot be resumed"""
+        # Finish (or discard) the writes of an incremental run that was interrupted
+        StagedWrites.recover(PROCESSING_STAGING_DIR)
+        if not os.path.exists(PROCESSING_WATERMARK):
+            return None
+
+        with open(PROCESSING_WATERMARK, "r") as f:
+            state = json.load(f)
+
+        if state.get("input_file") != os.path.abspath(self.input_file):
+            logger.info(f"Watermark was written for {state.get('input_file')}, not {self.input_file}.")
+            return None
+        if "pending_bytes" not in state:
+            logger.info("Watermark predates the pending ratings file, a full run is needed.")
+            return None
+        if os.path.getsize(self.input_file) < state["offset"]:
+            logger.info(f"{self.input_file} is shorter than the watermark, it was rewritten.")
+            return None
+        return state
+
+    def read_new_rows(self, offset, usecols):
+        """Ratings appended to the input after byte ``offset``, up to the last complete line"""
+        try:
+            header = pd.read_csv(self.input_file, nrows=0).columns.tolist()
+            with open(self.input_file, "rb") as f:
+                f.seek(offset)
+                data = f.read()
+
+            end = data.rfind(b"\n") + 1
+            dtypes = {col: dtype for col, dtype in RAW_RATING_DTYPES.items() if col in usecols}
+            if end == 0:
+                return pd.DataFrame({col: pd.Series(dtype=dtypes[col]) for col in usecols}), offset
+
+            new_rows = pd.read_csv(io.BytesIO(data[:end]), header=None, names=header, usecols=usecols, dtype=dtypes)
+            logger.info(f"Read {len(new_rows)} ratings appended after byte {offset}.")
+            return new_rows, offset + end
+        except Exception as e:
+            logger.error(f"Failed to read new ratings: {e}")
+            raise CustomException("Failed to read new ratings", sys)
+
+    def update_data(self, state, usecols):
+        """
+        Incremental equivalent of the load, filter, deduplicate, scale and encode stages
+        for the rows appended since the watermark. Known users keep every new rating;
+        pending users are admitted once their ratings reach the threshold, with all of
+        them. Existing codes never change: new users and animes get the next free codes
+        and ratings are scaled with the range of the full run. Leaves the new, shuffled
+        ratings in ``rating_df``.
+        """
+        try:
+            new_rows, self.offset = self.read_new_rows(state["offset"], usecols)
+            self.min_rating = state["min_rating"]
+            self.rating_range = tuple(state["rating_range"])
+
+            self.user_encoder = IdEncoder.load(USER_ENCODER)
+            self.anime_encoder = IdEncoder.load(ANIME_ENCODER)
+            self.pending = PendingRatings.load(PENDING_RATINGS, PENDING_COUNTS, state["pending_bytes"])
+
+            known = self.user_encoder.encode(new_rows["user_id"].values) >= 0
+            self.pending.append(new_rows[~known])
+            admitted = self.pending.admit(self.min_rating)
+
+            rating_df = pd.concat([new_rows[known], admitted], ignore_index=True).drop_duplicates()
+            logger.info(f"{len(rating_df)} new ratings kept, {len(self.pending)} ratings pending.")
+        except Exception as e:
+            logger.error(f"Failed to filter new ratings: {e}")
+            raise CustomException("Failed to filter new ratings", sys)
+
+        try:
+            min_value, max_value = self.rating_range
+            if len(rating_df) and (rating_df["rating"].min() < min_value or rating_df["rating"].max() > max_value):
+                logger.warning(f"New ratings fall outside ({min_value}, {max_value}); run a full rebuild to rescale.")
+            scaled = (rating_df["rating"] - min_value) / (max_value - min_value)
+            rating_df = rating_df.assign(rating=scaled.astype(np.float32))
+
+            # Drop ratings the processed table already holds, looked up in the users' index rows
+            self.user_ratings_index = UserRatingsIndex.load(USER_RATINGS_INDEX)
+            codes = self.user_encoder.encode(rating_df["user_id"].values)
+            users = np.unique(codes[codes >= 0])
+            indptr, positions = take_rows(self.user_ratings_index.indptr, users)
+            existing = pd.DataFrame({
+                "user_id": np.repeat(self.user_encoder.decode(users), np.diff(indptr)).astype(np.int32),
+                "anime_id": self.user_ratings_index.anime_ids[positions].astype(np.int32),
+                "rating": self.user_ratings_index.ratings[positions].astype(np.float32),
+            }).drop_duplicates()
+            seen = rating_df.merge(existing, how="left", indicator=True)["_merge"].values == "both"
+            rating_df = rating_df[~seen]
+
+            rating_df = rating_df.assign(
+                user=self.user_encoder.extend(rating_df["user_id"].values).astype(np.int32),
+                anime=self.anime_encoder.extend(rating_df["anime_id"].values).astype(np.int32),
+            )
+            self.rating_df = rating_df.sample(frac=1, random_state=43).reset_index(drop=True)
+            logger.info(f"Encoded {len(self.rating_df)} new ratings: {len(self.user_encoder)} users, {len(self.anime_encoder)} animes.")
+        except Exception as e:
+            logger.error(f"Failed to scale and encode new ratings: {e}")
+            raise CustomException("Failed to scale and encode new ratings", sys)
+
+    def save_updates(self, start_offset):
+        """
+        Add the new ratings to the processed artifacts: extra training shards (the test
+        set is kept as it is), a new part of the rating table, and the rows of the
+        touched users in the per-user indexes. Every artifact is written to the staging
+        directory first and moved into place only once all writes succeeded, the
+        watermark last, so a failed run leaves the previous state to resume from.
+        """
+        try:
+            users = self.rating_df["user"].values # type: ignore
+            staged = StagedWrites(PROCESSING_STAGING_DIR)
+
+            if len(users):
+                self.user_ratings_index = self.user_ratings_index.update( # type: ignore
+                    users, self.rating_df["anime_id"].values, self.rating_df["rating"].values, # type: ignore
+                    n_users=len(self.user_encoder)
+                )
+                self.user_preferences = UserPreferenceIndex.load(USER_PREFERENCES_INDEX).update(self.user_ratings_index, users)
+                self.anime_df = load_data(DF)
+                top_rated = TopRatedMatrix.load(TOP_RATED_MATRIX).update(
+                    self.user_preferences, self.anime_encoder, recommendable_anime_ids(self.anime_df), users
+                )
+                logger.info(f"Per-user indexes updated for {len(np.unique(users))} users.")
+
+                self.user_encoder.save(staged.stage(USER_ENCODER))
+                self.anime_encoder.save(staged.stage(ANIME_ENCODER))
+
+                # Named after the input offset, so the shards of different runs never collide
+                shard_dir = os.path.join(PROCESSING_STAGING_DIR, "train_shards")
+                for path in write_record_shards(
+                    users, self.rating_df["anime"].values, self.rating_df["rating"].values, # type: ignore
+                    shard_dir, self.rows_per_shard, prefix=f"part-delta{start_offset:015d}"
+                ):
+                    staged.add(path, os.path.join(TRAIN_SHARDS_DIR, os.path.basename(path)))
+
+                part_path = os.path.join(RATING_DF, f"part-delta{start_offset:015d}.parquet")
+                self.rating_df.astype(RATING_DTYPES).to_parquet(staged.stage(part_path), index=False) # type: ignore
+
+                self.user_ratings_index.save(staged.stage(USER_RATINGS_INDEX))
+                self.user_preferences.save(staged.stage(USER_PREFERENCES_INDEX))
+                top_rated.save(staged.stage(TOP_RATED_MATRIX))
+
+            self.pending.save_counts(staged.stage(PENDING_COUNTS)) # type: ignore
+            with open(staged.stage(PROCESSING_WATERMARK), "w") as f:
+                json.dump(self._state(self.offset), f)
+
+            staged.commit()
+            logger.info(f"Added {len(users)} ratings; watermark moved to byte {self.offset}.")
+        except Exception as e:
+            logger.error(f"Failed to save incremental updates: {e}")
+            raise CustomException("Failed to save incremental updates", sys)
+
     def run(self):
         """Executes the full data processing pipeline"""
         try:
             logger.info("Starting data processing pipeline...")
-
-            self.load_data(usecols=['user_id', 'anime_id', 'rating'])
-            self.filter_users()
-            self.drop_duplicates()
-            self.scale_ratings()
-            self.encode_data()
-            self.split_data()
-            self.save_artifacts()
+            # Rows appended while this run reads the file are left to the next incremental run
+            offset = os.path.getsize(self.input_file)
+            # The artifacts are about to be replaced: until the new watermark is saved, an
+            # incremental run must not resume from the old one
+            StagedWrites.recover(PROCESSING_STAGING_DIR)
+            if os.path.exists(PROCESSING_WATERMARK):
+                os.remove(PROCESSING_WATERMARK)
+
+            if self.chunk_size:
+                self.stream_data(usecols=['user_id', 'anime_id', 'rating'])
+                self.process_buckets()
+            else:
+                self.load_data(usecols=['user_id', 'anime_id', 'rating'])
+                self.filter_users()
+                self.drop_duplicates()
+                self.scale_ratings()
+                self.encode_data()
+                self.split_data()
+                self.save_artifacts()
+                self.build_user_index()
+                self.build_user_preferences()
             self.process_anime_data()
+            self.build_top_rated_matrix()
+            self.save_state(offset)
 
             logger.info("Successfully completed the data processing pipeline.")
 
@@ -231,6 +689,35 @@ class DataProcessor:
             logger.error(f"Pipeline failed due to an unexpected error: {str(e)}")
             raise CustomException("Unexpected error in run()", sys)
 
+    def run_incremental(self):
+        """Process only the ratings appended since the last run, or everything when there is no usable watermark"""
+        state = self.load_watermark()
+        if state is None:
+            logger.info("No usable watermark, running the full data processing pipeline.")
+            return self.run()
+
+        try:
+            logger.info(f"Starting incremental data processing from byte {state['offset']}...")
+
+            self.update_data(state, usecols=['user_id', 'anime_id', 'rating'])
+            self.save_updates(state["offset"])
+
+            logger.info("Successfully completed the incremental data processing.")
+
+        except CustomException as e:
+            logger.error(f"Incremental run failed due to a handled exception: {str(e)}")
+
+        except Exception as e:
+            logger.error(f"Incremental run failed due to an unexpected error: {str(e)}")
+            raise CustomException("Unexpected error in run_incremental()", sys)
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Process the raw ratings and anime metadata.")
+    parser.add_argument("--incremental", action="store_true", help="only process ratings appended since the last run")
+    args = parser.parse_args()
+
     data_processor= DataProcessor(ANIMELIST_CSV,PROCESSED_DIR)
-    data_processor.run()
+    if args.incremental:
+        data_processor.run_incremental()
+    else:
+        data_processor.run()
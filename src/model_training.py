@@ -2,6 +2,7 @@ import os
 import comet_ml
 import joblib
 import numpy as np
+import tensorflow as tf
 from tensorflow.keras.callbacks import (
     ModelCheckpoint, LearningRateScheduler, EarlyStopping
 )
@@ -9,6 +10,11 @@ from tensorflow.keras.callbacks import (
 from src.logger import get_logger
 from src.custom_exception import CustomException
 from src.base_model import BaseModel
+from utils.ann_index import IVFIndex, recall_at_k
+from utils.neighbour_table import NeighbourTable
+from utils.id_encoder import IdEncoder
+from utils.quantization import QuantizedEmbeddings, topk_overlap_report
+from utils.record_shards import RECORD_BYTES, list_record_shards
 from config.path_config import *
 
 logger = get_logger(__name__)
@@ -25,16 +31,52 @@ class ModelTraining:
             workspace="ahmadmajde22"
         )
 
-    def load_data(self):
-        """Loads preprocessed training and test data from joblib files."""
+    @staticmethod
+    def _decode_records(records):
+        """Split a batch of raw 12-byte records into model inputs and ratings"""
+        fields = tf.io.decode_raw(records, tf.int32)
+        inputs = {"user": fields[:, 0:1], "anime": fields[:, 1:2]}
+        return inputs, tf.bitcast(fields[:, 2], tf.float32)
+
+    def make_dataset(self, shard_dir, batch_size, shuffle=False, shuffle_buffer=1_000_000):
+        """
+        Stream the record shards of ``shard_dir`` through tf.data: shards are read in
+        parallel and interleaved, shuffled in a bounded buffer, batched, decoded a
+        whole batch at a time and prefetched, so memory does not grow with the data.
+        """
+        paths = list_record_shards(shard_dir)
+        if not paths:
+            raise FileNotFoundError(f"No record shards found in {shard_dir}")
+
+        files = tf.data.Dataset.from_tensor_slices(paths)
+        if shuffle:
+            files = files.shuffle(len(paths), reshuffle_each_iteration=True)
+
+        dataset = files.interleave(
+            lambda path: tf.data.FixedLengthRecordDataset(path, RECORD_BYTES),
+            cycle_length=min(len(paths), os.cpu_count() or 1),
+            num_parallel_calls=tf.data.AUTOTUNE,
+            deterministic=not shuffle,
+        )
+        # Record count from the shard sizes, so Keras knows the epoch length up front
+        n_records = sum(os.path.getsize(path) for path in paths) // RECORD_BYTES
+        dataset = dataset.apply(tf.data.experimental.assert_cardinality(n_records))
+
+        if shuffle:
+            dataset = dataset.shuffle(shuffle_buffer, reshuffle_each_iteration=True)
+
+        dataset = dataset.batch(batch_size)
+        dataset = dataset.map(self._decode_records, num_parallel_calls=tf.data.AUTOTUNE)
+        return dataset.prefetch(tf.data.AUTOTUNE)
+
+    def load_data(self, batch_size, shuffle_buffer=1_000_000):
+        """Builds the training and validation datasets from the processed record shards."""
         try:
-            X_train_array = joblib.load(X_TRAIN_ARRAY)
-            X_test_array = joblib.load(X_TEST_ARRAY)
-            y_train = joblib.load(Y_TRAIN)
-            y_test = joblib.load(Y_TEST)
+            train_dataset = self.make_dataset(TRAIN_SHARDS_DIR, batch_size, shuffle=True, shuffle_buffer=shuffle_buffer)
+            test_dataset = self.make_dataset(TEST_SHARDS_DIR, batch_size)
 
-            logger.info("Data loaded successfully for model training.")
-            return X_train_array, X_test_array, y_train, y_test
+            logger.info("Data pipelines built successfully for model training.")
+            return train_dataset, test_dataset
 
         except Exception as e:
             logger.error("Error occurred while loading the data.")
@@ -43,12 +85,9 @@ class ModelTraining:
     def train_model(self):
         """Constructs, compiles, and trains the model with callbacks."""
         try:
-            # Load data
-            X_train_array, X_test_array, y_train, y_test = self.load_data()
-
             # Load encoded users and animes
-            n_users = len(joblib.load(USER2USER_ENCODED))
-            n_animes = len(joblib.load(ANIME2ANIME_ENCODED))
+            n_users = len(IdEncoder.load(USER_ENCODER))
+            n_animes = len(IdEncoder.load(ANIME_ENCODER))
 
             # Initialize base model
             base_model = BaseModel(config_path=CONFIG_PATH)
@@ -64,6 +103,10 @@ class ModelTraining:
 
             batch_size = base_model.config["model"]["batch_size"]  # type: ignore
             epochs = base_model.config["model"]["epochs"]  # type: ignore
+            shuffle_buffer = base_model.config["model"].get("shuffle_buffer", 1_000_000)  # type: ignore
+
+            # Load data
+            train_dataset, test_dataset = self.load_data(batch_size, shuffle_buffer=shuffle_buffer)
 
             def lrfn(epoch):
                 if epoch < rampup_epochs:
@@ -101,12 +144,10 @@ class ModelTraining:
 
             # Train the model
             history = model.fit(
-                x=X_train_array,
-                y=y_train,
-                batch_size=batch_size,
+                train_dataset,
                 epochs=epochs,
                 verbose=1,
-                validation_data=(X_test_array, y_test),
+                validation_data=test_dataset,
                 callbacks=callbacks
             )
 
@@ -164,6 +205,10 @@ class ModelTraining:
             joblib.dump(user_weights, USER_WEIGHTS_PATH)
             joblib.dump(anime_weights, ANIME_WEIGHTS_PATH)
 
+            # Raw .npy copies (fixed header + contiguous float32 rows) that serving memory-maps
+            np.save(USER_WEIGHTS_NPY, np.ascontiguousarray(user_weights, dtype=np.float32))
+            np.save(ANIME_WEIGHTS_NPY, np.ascontiguousarray(anime_weights, dtype=np.float32))
+
             self.experiment.log_asset(MODEL_PATH)
             self.experiment.log_asset(ANIME_WEIGHTS_PATH)
             self.experiment.log_asset(USER_WEIGHTS_PATH)
@@ -176,6 +221,92 @@ class ModelTraining:
             logger.error("Failed to save the model.")
             raise CustomException("Error saving the model to disk", e)
 
+    def export_quantized_weights(self, precisions=("float16", "int8"), report_k=10, report_queries=1000):
+        """
+        Write compact float16 / per-row int8 copies of the saved weights and report
+        their top-k overlap with full-precision search.
+        """
+        try:
+            paths = {
+                ("user", "float16"): USER_WEIGHTS_FLOAT16,
+                ("user", "int8"): USER_WEIGHTS_INT8,
+                ("anime", "float16"): ANIME_WEIGHTS_FLOAT16,
+                ("anime", "int8"): ANIME_WEIGHTS_INT8,
+            }
+            for name, weights_path in [("user", USER_WEIGHTS_PATH), ("anime", ANIME_WEIGHTS_PATH)]:
+                weights = joblib.load(weights_path)
+                for precision in precisions:
+                    quantized = QuantizedEmbeddings.quantize(weights, precision)
+                    quantized.save(paths[(name, precision)])
+
+                    report = topk_overlap_report(weights, quantized, k=report_k, n_queries=report_queries)
+                    logger.info(f"{name} {precision} embeddings top-{report_k} overlap: {report}")
+                    self.experiment.log_metric(f"{name}_{precision}_overlap_at_{report_k}", report["overlap"])
+
+            logger.info("Quantized weights exported successfully.")
+
+        except Exception as e:
+            logger.error("Failed to export quantized weights.")
+            raise CustomException("Error exporting quantized weights", e)
+
+    def build_ann_indexes(self, n_lists=None, n_probe=8, recall_k=10, recall_queries=1000, min_recall=0.9):
+        """
+        Build IVF nearest-neighbour indexes over the saved user and anime weights and
+        measure their recall@k against exact search. Serving prefers an index whenever
+        its file exists, so one below ``min_recall`` is not saved (and a stale one is
+        removed), leaving serving on exact search.
+        """
+        try:
+            for name, weights_path, index_path in [
+                ("user", USER_WEIGHTS_PATH, USER_ANN_INDEX_PATH),
+                ("anime", ANIME_WEIGHTS_PATH, ANIME_ANN_INDEX_PATH),
+            ]:
+                weights = joblib.load(weights_path)
+                index = IVFIndex.build(weights, n_lists=n_lists, n_probe=n_probe)
+
+                report = recall_at_k(index, weights, k=recall_k, n_queries=recall_queries)
+                logger.info(f"{name} ANN index recall@{recall_k}: {report}")
+
+                self.experiment.log_metric(f"{name}_ann_recall_at_{recall_k}", report["recall"])
+                self.experiment.log_metric(f"{name}_ann_latency_ms", report["ann_ms"])
+                self.experiment.log_metric(f"{name}_exact_latency_ms", report["exact_ms"])
+
+                if report["recall"] < min_recall:
+                    logger.warning(f"{name} ANN index recall@{recall_k} {report['recall']:.3f} is below "
+                                   f"{min_recall}; not saving it, serving uses exact search. Raise n_probe.")
+                    if os.path.exists(index_path):
+                        os.remove(index_path)
+                    continue
+
+                index.save(index_path)
+
+            logger.info("ANN indexes built successfully.")
+
+        except Exception as e:
+            logger.error("Failed to build the ANN indexes.")
+            raise CustomException("Error building ANN indexes", e)
+
+    def build_neighbour_tables(self, k=50, max_block_bytes=256 << 20):
+        """
+        Precompute the top-k most similar users and animes for every row of the
+        saved weights, so serving answers similarity queries by lookup.
+        """
+        try:
+            for name, weights_path, table_path in [
+                ("user", USER_WEIGHTS_PATH, USER_NEIGHBOURS_PATH),
+                ("anime", ANIME_WEIGHTS_PATH, ANIME_NEIGHBOURS_PATH),
+            ]:
+                weights = joblib.load(weights_path)
+                table = NeighbourTable.build(weights, k=k, max_block_bytes=max_block_bytes)
+                table.save(table_path)
+                logger.info(f"{name} neighbour table saved with top-{table.k} neighbours.")
+
+            logger.info("Neighbour tables built successfully.")
+
+        except Exception as e:
+            logger.error("Failed to build the neighbour tables.")
+            raise CustomException("Error building neighbour tables", e)
+
 
 if __name__ == "__main__":
     model_trainer = ModelTraining(PROCESSED_DIR)
@@ -0,0 +1,59 @@
+import importlib
+import sys
+import pytest
+import utils.recommender_store as recommender_store
+from utils.serialization import scoring_params, DEFAULT_SCORING_PARAMS
+
+
+@pytest.mark.parametrize("source", [
+    {"top_n": "0"},
+    {"top_n": "-3"},
+    {"user_weight": "nan"},
+    {"content_weight": "inf"},
+    {"user_weight": "-inf"},
+    {"top_n": "ten"},
+])
+def test_scoring_params_rejects_invalid_values(source):
+    with pytest.raises(ValueError):
+        scoring_params(source)
+
+
+def test_scoring_params_defaults_and_casts():
+    assert scoring_params({}) == DEFAULT_SCORING_PARAMS
+    assert scoring_params({"user_weight": "1", "content_weight": "0", "top_n": "3"}) == {
+        "user_weight": 1.0, "content_weight": 0.0, "top_n": 3
+    }
+
+
+@pytest.fixture
+def client(monkeypatch):
+    # The app loads the serving artifacts on import; these requests never reach them
+    monkeypatch.setattr(recommender_store, "get_store", lambda: None)
+    sys.modules.pop("application", None)
+    application = importlib.import_module("application")
+    yield application.app.test_client()
+    sys.modules.pop("application", None)
+
+
+@pytest.mark.parametrize("body", [[1, 2, 3], 42, "user_ids", None])
+def test_batch_rejects_non_object_bodies(client, body):
+    response = client.post("/api/recommendations", json=body)
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize("body", [
+    {"user_ids": "123"},
+    {"user_ids": [1, "x"]},
+    {"user_ids": []},
+    {"user_ids": [1], "top_n": 0},
+    {"user_ids": [1], "user_weight": float("nan")},
+    {"user_ids": [1], "content_weight": None},
+])
+def test_batch_rejects_invalid_fields(client, body):
+    response = client.post("/api/recommendations", json=body)
+    assert response.status_code == 400
+
+
+def test_user_route_rejects_invalid_params(client):
+    assert client.get("/api/recommendations/1?top_n=0").status_code == 400
+    assert client.get("/api/recommendations/1?user_weight=inf").status_code == 400
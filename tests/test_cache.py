@@ -0,0 +1,33 @@
+import utils.cache as cache
+from utils.cache import TTLCache
+
+
+def test_stats_count_hits_misses_and_expiry(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now[0])
+    ttl_cache = TTLCache(maxsize=2, ttl=10)
+
+    ttl_cache.set("a", 1)
+    assert ttl_cache.get("a") == 1
+    assert ttl_cache.get("b") is None
+    now[0] += 11
+    assert ttl_cache.get("a") is None
+
+    # Least recently used entries are evicted beyond maxsize
+    for key in "xyz":
+        ttl_cache.set(key, key)
+    assert ttl_cache.get("x") is None
+
+    assert ttl_cache.stats() == {"size": 2, "maxsize": 2, "hits": 1, "misses": 3, "hit_rate": 0.25}
+
+
+def test_database_only_answers_default_params(monkeypatch):
+    lookups = []
+    monkeypatch.setattr(cache, "_cache", TTLCache())
+    monkeypatch.setattr(cache, "get_recommendations_from_db", lambda user_id: lookups.append(user_id) or ["row"])
+
+    assert cache.get_cached_recommendations(7, top_n=5) is None
+    assert cache.get_cached_recommendations(7) == ["row"]
+    # The default-param row is now served from memory
+    assert cache.get_cached_recommendations(7) == ["row"]
+    assert lookups == [7]
@@ -0,0 +1,77 @@
+import os
+import numpy as np
+import pytest
+from src.data_processing import DataProcessor
+from utils.common_function import load_data
+from utils.id_encoder import IdEncoder
+from utils.ratings_index import UserRatingsIndex
+from utils.user_preferences import UserPreferenceIndex
+from utils.record_shards import read_record_shards
+from config.path_config import *
+from tests.test_incremental_processing import MIN_RATING, append_rows, assert_matches_rebuild, write_raw_data
+
+
+def run_chunked(chunk_size=200):
+    """DataProcessor.run's chunked path with thresholds that suit the small synthetic data"""
+    processor = DataProcessor(ANIMELIST_CSV, PROCESSED_DIR, chunk_size=chunk_size, rows_per_shard=100)
+    offset = os.path.getsize(ANIMELIST_CSV)
+    processor.stream_data(usecols=["user_id", "anime_id", "rating"], min_rating=MIN_RATING)
+    processor.process_buckets(test_size=50)
+    processor.process_anime_data()
+    processor.build_top_rated_matrix()
+    processor.save_state(offset)
+    return processor
+
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+    # Artifact paths are relative to the working directory
+    monkeypatch.chdir(tmp_path)
+    os.makedirs(PROCESSED_DIR)
+    rows = write_raw_data(np.random.default_rng(5), n_users=80)
+    append_rows(rows, header=True)
+    return rows
+
+
+def test_chunked_run_writes_every_part_per_bucket(workspace):
+    processor = run_chunked()
+    assert processor.n_buckets > 1
+    assert len(os.listdir(RATING_DF)) == processor.n_buckets
+    assert not os.path.exists(STREAM_BUCKETS_DIR)
+
+    # The kept rows are those of the in-memory path: active users, deduplicated, scaled
+    counts = workspace["user_id"].value_counts()
+    expected = workspace[workspace["user_id"].isin(counts.index[counts >= MIN_RATING])].drop_duplicates()
+    rating_df = load_data(RATING_DF)
+    low, high = workspace["rating"].min(), workspace["rating"].max()
+    np.testing.assert_array_equal(
+        np.sort(rating_df["anime_id"].values * 1000 + np.rint(rating_df["rating"].values * (high - low) + low)),
+        np.sort(expected["anime_id"].values * 1000 + expected["rating"].values),
+    )
+    assert sorted(IdEncoder.load(USER_ENCODER).ids.tolist()) == sorted(expected["user_id"].unique().tolist())
+
+    train, test = read_record_shards(TRAIN_SHARDS_DIR), read_record_shards(TEST_SHARDS_DIR)
+    assert len(train) + len(test) == len(rating_df)
+    assert 0 < len(test) < 150
+
+    index = UserRatingsIndex.load(USER_RATINGS_INDEX)
+    rebuilt = UserRatingsIndex.from_ratings(
+        rating_df["user"].values, rating_df["anime_id"].values, rating_df["rating"].values, n_users=index.n_users
+    )
+    np.testing.assert_array_equal(index.indptr, rebuilt.indptr)
+    np.testing.assert_array_equal(index.anime_ids, rebuilt.anime_ids)
+    np.testing.assert_array_equal(index.ratings, rebuilt.ratings)
+    np.testing.assert_array_equal(
+        UserPreferenceIndex.load(USER_PREFERENCES_INDEX).thresholds, UserPreferenceIndex.build(index).thresholds
+    )
+
+
+def test_incremental_runs_continue_from_a_chunked_run(workspace):
+    half = len(workspace) // 2
+    os.remove(ANIMELIST_CSV)
+    append_rows(workspace.iloc[:half], header=True)
+    run_chunked()
+
+    append_rows(workspace.iloc[half:])
+    DataProcessor(ANIMELIST_CSV, PROCESSED_DIR).run_incremental()
+    assert_matches_rebuild(workspace)
@@ -0,0 +1,117 @@
+import sqlite3
+from datetime import datetime
+from types import SimpleNamespace
+import pytest
+import utils.db_utils as db_utils
+from utils.db_utils import ConnectionPool, GET_RECOMMENDATIONS, SAVE_RECOMMENDATIONS
+
+
+@pytest.fixture
+def sqlite_pool(tmp_path):
+    """A SQLite stand-in for the Postgres pool, installed as the process-wide pool"""
+    pool = ConnectionPool(sqlite3, maxconn=2, timeout=0.1, database=str(tmp_path / "recommendations.db"))
+    with pool.connection() as conn:
+        conn.execute("CREATE TABLE user_recommendations (user_id INTEGER, recommended_animes TEXT, timestamp TIMESTAMP)")
+        conn.commit()
+
+    previous = db_utils.set_pool(pool)
+    yield pool
+    db_utils.set_pool(previous)
+    pool.closeall()
+
+
+def test_save_and_read_back_on_sqlite(sqlite_pool):
+    db_utils.save_recommendations_to_db(1, ["Naruto", "Bleach"])
+    db_utils.save_recommendations_batch_to_db([
+        (2, ["One Piece"], datetime(2024, 1, 1)),
+        (2, ["Monster"], datetime(2024, 1, 2)),
+    ])
+
+    assert db_utils.get_recommendations_from_db(1) == ["Naruto", "Bleach"]
+    # The newest row of a user wins
+    assert db_utils.get_recommendations_from_db(2) == ["Monster"]
+    assert db_utils.get_recommendations_from_db(3) is None
+
+
+def test_pool_reuses_and_bounds_connections(sqlite_pool):
+    with sqlite_pool.connection() as first:
+        pass
+    with sqlite_pool.connection() as again:
+        assert again is first
+
+        with sqlite_pool.connection():
+            with pytest.raises(TimeoutError):
+                with sqlite_pool.connection():
+                    pass
+
+
+def test_unhealthy_idle_connection_is_replaced(sqlite_pool):
+    sqlite_pool.health_check_interval = 0
+    with sqlite_pool.connection() as conn:
+        pass
+    conn.close()
+
+    with sqlite_pool.connection() as replacement:
+        assert replacement is not conn
+        replacement.execute("SELECT 1")
+
+
+def test_connection_errors_are_retried(sqlite_pool):
+    attempts = []
+
+    def operation(conn, pool):
+        attempts.append(conn)
+        if len(attempts) == 1:
+            raise sqlite3.OperationalError("server closed the connection")
+        return "done"
+
+    assert db_utils.run_with_retry(operation) == "done"
+    assert len(attempts) == 2
+
+    with pytest.raises(sqlite3.OperationalError):
+        db_utils.run_with_retry(lambda conn, pool: (_ for _ in ()).throw(sqlite3.OperationalError("down")))
+
+
+class FakeCursor:
+    def __init__(self, connection):
+        self.connection = connection
+
+    def execute(self, sql, params=None):
+        self.connection.statements.append(" ".join(sql.split()))
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self):
+        self.statements = []
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def test_statements_are_prepared_once_per_postgres_connection():
+    driver = SimpleNamespace(
+        __name__="psycopg2", paramstyle="pyformat", connect=FakeConnection,
+        OperationalError=ConnectionError, InterfaceError=ConnectionError,
+    )
+    pool = ConnectionPool(driver)
+
+    with pool.connection() as conn:
+        cur = conn.cursor()
+        pool.execute(cur, GET_RECOMMENDATIONS, (1,))
+        pool.execute(cur, GET_RECOMMENDATIONS, (2,))
+        pool.execute(cur, SAVE_RECOMMENDATIONS, (1, ["a"], datetime.now()))
+
+    prepares = [sql for sql in conn.statements if sql.startswith("PREPARE")]
+    assert [sql.split()[1] for sql in prepares] == ["get_recommendations", "save_recommendations"]
+    assert "WHERE user_id = $1" in prepares[0]
+    assert conn.statements.count("EXECUTE get_recommendations (%s)") == 2
+    assert "EXECUTE save_recommendations (%s, %s, %s)" in conn.statements
@@ -0,0 +1,201 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from src.data_processing import DataProcessor
+from utils.common_function import load_data
+from utils.id_encoder import IdEncoder
+from utils.ratings_index import UserRatingsIndex
+from utils.user_preferences import UserPreferenceIndex
+from utils.top_rated import TopRatedMatrix, recommendable_anime_ids
+from utils.record_shards import read_record_shards
+from config.path_config import *
+
+MIN_RATING = 15
+
+
+@pytest.fixture
+def ratings():
+    """Synthetic (user code, anime id, rating) triples; ratings on a 0.1 grid so users have ties"""
+    rng = np.random.default_rng(7)
+    counts = rng.integers(1, 25, size=40)
+    users = np.repeat(np.arange(len(counts)), counts)
+    rng.shuffle(users)
+    anime_ids = rng.choice(np.arange(100, 400, 10), size=len(users)).astype(np.int32)
+    values = (rng.integers(0, 11, size=len(users)) / 10).astype(np.float32)
+    return users, anime_ids, values
+
+
+def assert_same_ratings_index(got, expected):
+    np.testing.assert_array_equal(got.indptr, expected.indptr)
+    np.testing.assert_array_equal(got.anime_ids, expected.anime_ids)
+    np.testing.assert_array_equal(got.ratings, expected.ratings)
+
+
+def assert_same_preferences(got, expected):
+    np.testing.assert_array_equal(got.indptr, expected.indptr)
+    np.testing.assert_array_equal(got.anime_ids, expected.anime_ids)
+    np.testing.assert_array_equal(got.thresholds, expected.thresholds)
+
+
+def test_incremental_update_matches_rebuild(ratings):
+    users, anime_ids, values = ratings
+    n_old = len(users) * 2 // 3
+    # Rows from existing users plus two users that only appear in the update
+    new_users = np.concatenate([users[n_old:], [40, 41, 41]])
+    new_anime_ids = np.concatenate([anime_ids[n_old:], [100, 110, 120]]).astype(np.int32)
+    new_values = np.concatenate([values[n_old:], [0.5, 0.2, 0.9]]).astype(np.float32)
+
+    old_index = UserRatingsIndex.from_ratings(users[:n_old], anime_ids[:n_old], values[:n_old], n_users=40)
+    old_preferences = UserPreferenceIndex.build(old_index)
+    anime_encoder = IdEncoder(np.unique(anime_ids))
+    ranked_anime_ids = anime_encoder.ids[::-1]
+    old_top_rated = TopRatedMatrix.build(old_preferences, anime_encoder, ranked_anime_ids)
+
+    index = old_index.update(new_users, new_anime_ids, new_values, n_users=42)
+    preferences = old_preferences.update(index, new_users)
+    top_rated = old_top_rated.update(preferences, anime_encoder, ranked_anime_ids, new_users)
+
+    rebuilt_index = UserRatingsIndex.from_ratings(
+        np.concatenate([users[:n_old], new_users]),
+        np.concatenate([anime_ids[:n_old], new_anime_ids]),
+        np.concatenate([values[:n_old], new_values]),
+        n_users=42,
+    )
+    rebuilt_preferences = UserPreferenceIndex.build(rebuilt_index)
+    rebuilt_top_rated = TopRatedMatrix.build(rebuilt_preferences, anime_encoder, ranked_anime_ids)
+
+    assert_same_ratings_index(index, rebuilt_index)
+    assert_same_preferences(preferences, rebuilt_preferences)
+    np.testing.assert_array_equal(top_rated.indptr, rebuilt_top_rated.indptr)
+    np.testing.assert_array_equal(top_rated.indices, rebuilt_top_rated.indices)
+    assert top_rated.n_animes == rebuilt_top_rated.n_animes
+
+
+def write_raw_data(rng, n_users=60, n_animes=40):
+    """Synthetic ratings (in user blocks of varying size) and anime metadata under RAW_DIR"""
+    os.makedirs(RAW_DIR, exist_ok=True)
+    anime_ids = np.arange(1, n_animes + 1) * 7
+    anime = pd.DataFrame({
+        "MAL_ID": anime_ids,
+        "Name": [f"Anime {i}" for i in anime_ids],
+        "Score": rng.uniform(1, 10, n_animes).round(2),
+        "Genres": rng.choice(["Action", "Comedy", "Drama"], n_animes),
+        "English name": "Unknown",
+        "Episodes": 12,
+        "Type": "TV",
+        "Members": rng.integers(100, 10000, n_animes),
+        "Premiered": "Spring 2000",
+    })
+    anime.to_csv(ANIME_CSV, index=False)
+    anime[["MAL_ID", "Name", "Genres"]].assign(sypnopsis="Synopsis").to_csv(ANIME_SYNOPSIS_CSV, index=False)
+
+    counts = rng.integers(5, 40, n_users)
+    ratings = pd.DataFrame({
+        "user_id": np.repeat(np.arange(1000, 1000 + n_users), counts),
+        "anime_id": rng.choice(anime_ids, counts.sum()),
+        "rating": rng.integers(0, 11, counts.sum()),
+    })
+    # Interleave users so that appended rows touch known, pending and new users alike
+    return ratings.sample(frac=1, random_state=3).reset_index(drop=True)
+
+
+def append_rows(rows, header=False):
+    rows.to_csv(ANIMELIST_CSV, mode="a", header=header, index=False)
+
+
+def run_full():
+    """DataProcessor.run with thresholds that suit the small synthetic data"""
+    processor = DataProcessor(ANIMELIST_CSV, PROCESSED_DIR)
+    offset = os.path.getsize(ANIMELIST_CSV)
+    processor.load_data(usecols=["user_id", "anime_id", "rating"])
+    processor.filter_users(min_rating=MIN_RATING)
+    processor.drop_duplicates()
+    processor.scale_ratings()
+    processor.encode_data()
+    processor.split_data(test_size=50)
+    processor.save_artifacts()
+    processor.build_user_index()
+    processor.build_user_preferences()
+    processor.process_anime_data()
+    processor.build_top_rated_matrix()
+    processor.save_state(offset)
+
+
+def assert_matches_rebuild(all_rows):
+    """The incrementally updated artifacts equal those rebuilt from the processed table"""
+    user_encoder, anime_encoder = IdEncoder.load(USER_ENCODER), IdEncoder.load(ANIME_ENCODER)
+    rating_df = load_data(RATING_DF)
+    assert not rating_df.duplicated(["user_id", "anime_id", "rating"]).any()
+    np.testing.assert_array_equal(user_encoder.encode(rating_df["user_id"].values), rating_df["user"].values)
+
+    counts = all_rows["user_id"].value_counts()
+    assert set(user_encoder.ids.tolist()) == set(counts.index[counts >= MIN_RATING])
+    shards = read_record_shards(TRAIN_SHARDS_DIR)
+    assert len(shards) + len(read_record_shards(TEST_SHARDS_DIR)) == len(rating_df)
+
+    index = UserRatingsIndex.from_ratings(
+        rating_df["user"].values, rating_df["anime_id"].values, rating_df["rating"].values, n_users=len(user_encoder)
+    )
+    preferences = UserPreferenceIndex.build(index)
+    top_rated = TopRatedMatrix.build(preferences, anime_encoder, recommendable_anime_ids(load_data(DF)))
+
+    saved_index = UserRatingsIndex.load(USER_RATINGS_INDEX)
+    np.testing.assert_array_equal(saved_index.indptr, index.indptr)
+    np.testing.assert_array_equal(saved_index.anime_ids, index.anime_ids)
+    np.testing.assert_array_equal(saved_index.ratings, index.ratings)
+    saved_preferences = UserPreferenceIndex.load(USER_PREFERENCES_INDEX)
+    np.testing.assert_array_equal(saved_preferences.anime_ids, preferences.anime_ids)
+    np.testing.assert_array_equal(saved_preferences.thresholds, preferences.thresholds)
+    saved_top_rated = TopRatedMatrix.load(TOP_RATED_MATRIX)
+    np.testing.assert_array_equal(saved_top_rated.indptr, top_rated.indptr)
+    np.testing.assert_array_equal(saved_top_rated.indices, top_rated.indices)
+
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+    # Artifact paths are relative to the working directory
+    monkeypatch.chdir(tmp_path)
+    os.makedirs(PROCESSED_DIR)
+    return write_raw_data(np.random.default_rng(11))
+
+
+def test_incremental_runs_match_full_rebuild(workspace):
+    first, second, third = np.array_split(np.arange(len(workspace)), [len(workspace) // 2, len(workspace) * 3 // 4])
+    append_rows(workspace.iloc[first], header=True)
+    run_full()
+    users_before = IdEncoder.load(USER_ENCODER).ids
+
+    for part in [second, third]:
+        append_rows(workspace.iloc[part])
+        DataProcessor(ANIMELIST_CSV, PROCESSED_DIR).run_incremental()
+
+    # Existing codes are kept, new users get the next ones
+    np.testing.assert_array_equal(IdEncoder.load(USER_ENCODER).ids[:len(users_before)], users_before)
+    assert_matches_rebuild(workspace)
+    assert len(os.listdir(RATING_DF)) == 3
+
+
+def test_failed_incremental_run_leaves_state_to_resume_from(workspace, monkeypatch):
+    half = len(workspace) // 2
+    append_rows(workspace.iloc[:half], header=True)
+    run_full()
+    with open(PROCESSING_WATERMARK) as f:
+        watermark = f.read()
+    index_before = UserRatingsIndex.load(USER_RATINGS_INDEX)
+
+    append_rows(workspace.iloc[half:])
+    with monkeypatch.context() as patch:
+        def fail(self, path):
+            raise OSError("disk full")
+        patch.setattr(TopRatedMatrix, "save", fail)
+        DataProcessor(ANIMELIST_CSV, PROCESSED_DIR).run_incremental()
+
+    # Nothing was swapped in, not even the artifacts written before the failure
+    with open(PROCESSING_WATERMARK) as f:
+        assert f.read() == watermark
+    np.testing.assert_array_equal(UserRatingsIndex.load(USER_RATINGS_INDEX).indptr, index_before.indptr)
+    assert os.listdir(RATING_DF) == ["part-00000.parquet"]
+
+    DataProcessor(ANIMELIST_CSV, PROCESSED_DIR).run_incremental()
+    assert_matches_rebuild(workspace)
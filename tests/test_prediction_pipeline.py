@@ -0,0 +1,45 @@
+from types import SimpleNamespace
+import numpy as np
+import pandas as pd
+import pytest
+from pipeline.prediction_pipeline import _fuse_scores
+from utils.anime_catalog import AnimeCatalog
+from utils.id_encoder import IdEncoder
+
+
+@pytest.fixture
+def store():
+    anime_ids = np.arange(100, 120)
+    anime_df = pd.DataFrame({"anime_id": anime_ids, "eng_version": [f"Anime {i}" for i in anime_ids], "Genres": "Action"})
+    synopsis_df = pd.DataFrame({"MAL_ID": anime_ids, "sypnopsis": "Synopsis"})
+    return SimpleNamespace(
+        top_rated=SimpleNamespace(n_animes=len(anime_ids)),
+        anime_encoder=IdEncoder(anime_ids),
+        anime_catalog=AnimeCatalog.from_frames(anime_df, synopsis_df),
+    )
+
+
+def test_equal_weights_give_comparable_contributions(store):
+    # 8, 4 and 2 of the similar users rate codes 0, 1 and 2 highly
+    candidate_codes, counts = np.array([0, 1, 2]), np.array([8, 4, 2])
+    # Ten seeds all neighbour code 5 (similarity 0.6) and code 6 (similarity 0.3)
+    content_codes = np.array([5, 6] * 10)
+    content_similarities = np.array([0.6, 0.3] * 10, dtype=np.float32)
+
+    recommendations = _fuse_scores(candidate_codes, counts, content_codes, content_similarities,
+                                   np.array([], dtype=np.int64), 0.5, 0.5, 4, store)
+    by_name = {recommendation["anime_name"]: recommendation for recommendation in recommendations}
+
+    # The best anime of each signal contributes the same, and so do the runners-up
+    assert by_name["Anime 100"]["user_score"] == pytest.approx(0.5)
+    assert by_name["Anime 105"]["content_score"] == pytest.approx(0.5)
+    assert by_name["Anime 101"]["user_score"] == pytest.approx(by_name["Anime 106"]["content_score"])
+    assert set(by_name) == {"Anime 100", "Anime 105", "Anime 101", "Anime 106"}
+    for recommendation in recommendations:
+        assert 0 <= recommendation["user_score"] <= 0.5 and 0 <= recommendation["content_score"] <= 0.5
+
+
+def test_watched_and_unproposed_animes_are_excluded(store):
+    recommendations = _fuse_scores(np.array([0, 1]), np.array([3, 1]), np.array([2]), np.array([0.9], dtype=np.float32),
+                                   np.array([0]), 0.5, 0.5, 10, store)
+    assert [recommendation["anime_name"] for recommendation in recommendations] == ["Anime 102", "Anime 101"]
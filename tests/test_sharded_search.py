@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+from src.custom_exception import CustomException
+from utils.quantization import QuantizedEmbeddings
+from utils.sharded_search import ShardedSearch, mapped_files
+
+
+@pytest.fixture
+def weights():
+    rng = np.random.default_rng(5)
+    weights = rng.standard_normal((3000, 16), dtype=np.float32)
+    return weights / np.linalg.norm(weights, axis=1, keepdims=True)
+
+
+def assert_same_top_k(search, reference, queries, k, neg=False):
+    ids, scores = search.search(queries, k, neg=neg)
+    expected = (reference @ queries.T).T
+    expected = np.sort(expected, axis=1)[:, :k] if neg else -np.sort(-expected, axis=1)[:, :k]
+    np.testing.assert_allclose(scores, expected, rtol=1e-5, atol=1e-5)
+    np.testing.assert_allclose(np.take_along_axis((reference @ queries.T).T, ids, axis=1), scores, rtol=1e-5, atol=1e-5)
+
+
+def test_workers_search_the_mapped_float32_file(weights, tmp_path):
+    path = str(tmp_path / "user_weights.npy")
+    np.save(path, weights)
+    mapped = np.load(path, mmap_mode="r")
+    assert mapped_files(mapped) == {"values": path}
+
+    with ShardedSearch(mapped, n_shards=3, workers=2) as search:
+        assert_same_top_k(search, weights, weights[:4], k=6)
+        assert_same_top_k(search, weights, weights[:4], k=6, neg=True)
+        ids, _ = search.search(weights[10], k=1)
+        assert ids.tolist() == [10]
+
+
+def test_workers_search_the_mapped_int8_files(weights, tmp_path):
+    path = str(tmp_path / "user_weights_int8.npy")
+    QuantizedEmbeddings.quantize(weights, "int8").save(path)
+    quantized = QuantizedEmbeddings.load(path)
+    assert set(mapped_files(quantized)) == {"values", "scales"}
+
+    with ShardedSearch(quantized, n_shards=4, workers=2) as search:
+        reference = np.asarray(quantized[np.arange(len(weights))])
+        assert_same_top_k(search, reference, weights[:4], k=5)
+
+
+def test_in_memory_weights_are_refused(weights):
+    assert mapped_files(weights) is None
+    with pytest.raises(CustomException):
+        ShardedSearch(weights, n_shards=2)
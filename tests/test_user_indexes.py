@@ -0,0 +1,93 @@
+import io
+import numpy as np
+import pandas as pd
+import pytest
+from utils.csr import take_rows, replace_rows
+from utils.helpers import get_user_preferences
+from utils.id_encoder import IdEncoder
+from utils.ratings_index import UserRatingsIndex
+from utils.recommender_store import RecommenderStore
+from utils.user_preferences import UserPreferenceIndex
+
+
+def test_take_and_replace_rows():
+    indptr = np.array([0, 2, 2, 5])
+    values = np.array([10, 11, 30, 31, 32])
+
+    sub_indptr, positions = take_rows(indptr, [2, 0])
+    np.testing.assert_array_equal(sub_indptr, [0, 3, 5])
+    np.testing.assert_array_equal(values[positions], [30, 31, 32, 10, 11])
+
+    # Replace row 0, fill the empty row 1 and add row 3
+    new_indptr, positions = replace_rows(indptr, [0, 1, 3], np.array([0, 1, 3, 4]), n_rows=4)
+    merged = np.concatenate([values, [90, 91, 92, 93]])[positions]
+    np.testing.assert_array_equal(new_indptr, [0, 1, 3, 6, 7])
+    np.testing.assert_array_equal(merged, [90, 91, 92, 30, 31, 32, 93])
+
+
+def baseline_user_preferences(user_id, rating_df, df):
+    """The DataFrame path get_user_preferences used before the precomputed index"""
+    animes_watched_by_user = rating_df[rating_df["user_id"] == user_id]
+    if len(animes_watched_by_user) == 0:
+        return None
+
+    user_rating_perctile = np.percentile(animes_watched_by_user["rating"], 75)
+    top_rated_animes = animes_watched_by_user[animes_watched_by_user["rating"] >= user_rating_perctile]
+    top_anime_ids = top_rated_animes.sort_values(by="rating", ascending=False)["anime_id"].values
+    anime_df_rows = df[df["anime_id"].isin(top_anime_ids)]
+    return anime_df_rows[["eng_version", "Genres"]], top_rated_animes
+
+
+@pytest.fixture
+def rating_frames():
+    """
+    Raw ratings scaled like the processing stage, written to CSV and read back as the
+    baseline did, plus users whose 75th percentile falls exactly on tied ratings
+    """
+    rng = np.random.default_rng(3)
+    counts = rng.integers(1, 30, size=50)
+    rating_df = pd.DataFrame({
+        "user_id": np.repeat(np.arange(1000, 1050), counts),
+        "anime_id": rng.choice(np.arange(1, 61), counts.sum()),
+        "rating": rng.integers(0, 11, counts.sum()),
+    })
+    ties = pd.DataFrame({
+        "user_id": [2000] * 5 + [2001] * 8,
+        "anime_id": [1, 2, 3, 4, 5] + [6, 7, 8, 9, 10, 11, 12, 13],
+        "rating": [10, 8, 8, 8, 5] + [7, 7, 7, 7, 3, 3, 3, 3],
+    })
+    rating_df = pd.concat([rating_df, ties], ignore_index=True).sample(frac=1, random_state=5)
+    rating_df["rating"] = rating_df["rating"] / 10
+    rating_df = pd.read_csv(io.StringIO(rating_df.to_csv(index=False)))
+
+    df = pd.DataFrame({
+        "anime_id": np.arange(60, 0, -1),
+        "eng_version": [f"Anime {i}" for i in range(60, 0, -1)],
+        "Genres": rng.choice(["Action", "Drama"], 60),
+    })
+    return rating_df, df
+
+
+def test_preferences_match_baseline_dataframe_path(rating_frames):
+    rating_df, df = rating_frames
+    # Serving artifacts as the processing stage builds them (float32 ratings)
+    store = RecommenderStore.__new__(RecommenderStore)
+    store.user_encoder, codes = IdEncoder.factorize(rating_df["user_id"])
+    store.user_ratings_index = UserRatingsIndex.from_ratings(
+        codes, rating_df["anime_id"].values, rating_df["rating"].values.astype(np.float32)
+    )
+    store.user_preferences = UserPreferenceIndex.build(store.user_ratings_index)
+    store.anime_df = df
+
+    for user_id in rating_df["user_id"].unique():
+        expected, top_rated = baseline_user_preferences(user_id, rating_df, df)
+        got = get_user_preferences(int(user_id), store=store)
+        pd.testing.assert_frame_equal(got, expected)
+
+        # Same animes, best rated first; the baseline left the order of ties to
+        # quicksort, the index keeps them in rating order
+        expected_ids = top_rated.sort_values(by="rating", ascending=False, kind="stable")["anime_id"].values
+        np.testing.assert_array_equal(store.user_top_rated(int(user_id)), expected_ids)
+
+    assert get_user_preferences(999, store=store) is None
+
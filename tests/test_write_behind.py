@@ -0,0 +1,58 @@
+import threading
+import utils.write_behind as write_behind
+from utils.write_behind import RecommendationWriter
+
+
+def recording_db(monkeypatch, failures=0):
+    """Patch the batch insert to fail ``failures`` times, then record every batch"""
+    calls = {"attempts": 0, "rows": []}
+    lock = threading.Lock()
+
+    def save(rows):
+        with lock:
+            calls["attempts"] += 1
+            if calls["attempts"] <= failures:
+                raise ConnectionError("database unavailable")
+            calls["rows"].extend(rows)
+
+    monkeypatch.setattr(write_behind, "save_recommendations_batch_to_db", save)
+    return calls
+
+
+def test_rows_are_flushed_on_close(monkeypatch):
+    calls = recording_db(monkeypatch)
+    writer = RecommendationWriter(flush_rows=2, flush_interval=0.05)
+    for user_id in range(5):
+        assert writer.put(user_id, [f"anime {user_id}"])
+    writer.close()
+
+    assert [row[0] for row in calls["rows"]] == [0, 1, 2, 3, 4]
+
+
+def test_failed_flush_is_retried(monkeypatch):
+    calls = recording_db(monkeypatch, failures=2)
+    writer = RecommendationWriter(flush_rows=10, flush_interval=0.05, max_retries=3, retry_backoff=0.01)
+    writer.put(1, ["a"])
+    writer.close()
+
+    assert calls["attempts"] == 3
+    assert [row[0] for row in calls["rows"]] == [1]
+
+
+def test_batch_is_dropped_after_max_retries(monkeypatch):
+    calls = recording_db(monkeypatch, failures=10)
+    writer = RecommendationWriter(flush_rows=10, flush_interval=0.05, max_retries=2, retry_backoff=0.01)
+    writer.put(1, ["a"])
+    writer.close()
+
+    assert calls["attempts"] == 3
+    assert calls["rows"] == []
+
+
+def test_put_after_close_is_rejected(monkeypatch):
+    calls = recording_db(monkeypatch)
+    writer = RecommendationWriter(flush_interval=0.05)
+    writer.close()
+
+    assert writer.put(1, ["a"]) is False
+    assert calls["rows"] == []
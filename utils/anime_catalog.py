@@ -0,0 +1,129 @@
+import joblib
+import numpy as np
+import pandas as pd
+from src.logger import get_logger
+from src.custom_exception import CustomException
+
+logger = get_logger(__name__)
+
+
+class AnimeCatalog:
+    """
+    Id-indexed anime metadata (eng_version, Genres, synopsis) with batch lookups.
+
+    Columns are stored as arrays aligned with the sorted ``anime_ids`` array, so a
+    whole array of ids resolves with one ``searchsorted`` and one gather per column.
+    """
+
+    def __init__(self, anime_ids, eng_version, genres, synopsis, names, name_ids):
+        self.anime_ids = anime_ids
+        self.eng_version = eng_version
+        self.genres = genres
+        self.synopsis = synopsis
+
+        # name -> anime_id, keeping the first (highest scored) anime for duplicated names
+        self.names = names
+        self.name_ids = name_ids
+        self._name_index = pd.Index(names)
+
+    def __len__(self):
+        return len(self.anime_ids)
+
+    @classmethod
+    def from_frames(cls, anime_df, synopsis_df):
+        """Build the catalog from the processed anime and synopsis DataFrames"""
+        try:
+            anime_df = anime_df.drop_duplicates(subset="anime_id")
+            ids = anime_df["anime_id"].values.astype(np.int64)
+            order = np.argsort(ids, kind="stable")
+
+            synopsis = (
+                synopsis_df.drop_duplicates(subset="MAL_ID")
+                .set_index("MAL_ID")["sypnopsis"]
+                .reindex(ids[order])
+                .astype(object)
+            )
+            synopsis = synopsis.where(synopsis.notna(), None).values
+
+            first_names = anime_df.drop_duplicates(subset="eng_version")
+
+            return cls(
+                anime_ids=ids[order],
+                eng_version=anime_df["eng_version"].to_numpy(dtype=object)[order],
+                genres=anime_df["Genres"].to_numpy(dtype=object)[order],
+                synopsis=synopsis,
+                names=first_names["eng_version"].to_numpy(dtype=object),
+                name_ids=first_names["anime_id"].values.astype(np.int64),
+            )
+        except Exception as e:
+            logger.error(f"Failed to build anime catalog: {e}")
+            raise CustomException("Failed to build anime catalog", e)
+
+    # ---------------------------------------------------
+    # Lookups
+    # ---------------------------------------------------
+    def positions(self, anime_ids):
+        """Return the row of each anime id in the catalog, -1 for unknown ids"""
+        anime_ids = np.asarray(anime_ids, dtype=np.int64)
+        if len(self.anime_ids) == 0:
+            return np.full(anime_ids.shape, -1, dtype=np.int64)
+
+        pos = np.minimum(np.searchsorted(self.anime_ids, anime_ids), len(self.anime_ids) - 1)
+        return np.where(self.anime_ids[pos] == anime_ids, pos, -1)
+
+    def ids_for_names(self, names):
+        """Resolve an array of eng_version names to anime ids, -1 for unknown names"""
+        pos = self._name_index.get_indexer(pd.Index(names, dtype=object))
+        return np.where(pos >= 0, self.name_ids[pos], -1)
+
+    def anime_id_for(self, anime):
+        """Resolve a single anime id (int) or eng_version name (str), None if unknown"""
+        if isinstance(anime, int):
+            found = self.positions([anime])[0] >= 0
+            return anime if found else None
+        elif isinstance(anime, str):
+            anime_id = self.ids_for_names([anime])[0]
+            return int(anime_id) if anime_id >= 0 else None
+        return None
+
+    def lookup(self, anime_ids):
+        """Return eng_version, Genres and synopsis for every known id, in input order"""
+        anime_ids = np.asarray(anime_ids, dtype=np.int64)
+        pos = self.positions(anime_ids)
+        found = pos >= 0
+        pos = pos[found]
+
+        return pd.DataFrame({
+            "anime_id": anime_ids[found],
+            "eng_version": self.eng_version[pos],
+            "Genres": self.genres[pos],
+            "synopsis": self.synopsis[pos],
+        })
+
+    # ---------------------------------------------------
+    # Persistence
+    # ---------------------------------------------------
+    def save(self, path):
+        try:
+            joblib.dump({
+                "anime_ids": self.anime_ids,
+                "eng_version": self.eng_version,
+                "genres": self.genres,
+                "synopsis": self.synopsis,
+                "names": self.names,
+                "name_ids": self.name_ids,
+            }, path)
+            logger.info(f"Anime catalog saved -> {path}")
+        except Exception as e:
+            logger.error(f"Failed to save anime catalog: {e}")
+            raise CustomException("Failed to save anime catalog", e)
+
+    @classmethod
+    def load(cls, path):
+        try:
+            catalog = cls(**joblib.load(path))
+            logger.info(f"Anime catalog loaded from {path}")
+            return catalog
+        except Exception as e:
+            logger.error(f"Failed to load anime catalog: {e}")
+            raise CustomException("Failed to load anime catalog", e)
@@ -0,0 +1,160 @@
+import time
+import numpy as np
+from src.logger import get_logger
+from src.custom_exception import CustomException
+from utils.similarity import top_k
+
+logger = get_logger(__name__)
+
+# Bounds the (rows x n_lists) score block materialised while assigning vectors to lists
+ASSIGN_BLOCK_ELEMENTS = 1 << 24
+
+
+class IVFIndex:
+    """
+    Inverted-file (IVF) approximate nearest-neighbour index for inner-product search.
+
+    Vectors are clustered around ``n_lists`` spherical k-means centroids; a query only
+    scores the members of its ``n_probe`` closest lists. Raising ``n_probe`` trades
+    latency for recall, ``n_probe == n_lists`` is an exact search. The index stores
+    row ids only, the embedding matrix itself is passed to ``search``.
+    """
+
+    def __init__(self, centroids, indptr, ids, n_probe=8):
+        self.centroids = centroids
+        self.indptr = indptr
+        self.ids = ids
+        self.n_probe = n_probe
+
+    @property
+    def n_lists(self):
+        return len(self.centroids)
+
+    # ---------------------------------------------------
+    # Build
+    # ---------------------------------------------------
+    @staticmethod
+    def _assign(vectors, centroids):
+        """Closest centroid of every vector, in memory-bounded blocks"""
+        block = max(1, ASSIGN_BLOCK_ELEMENTS // len(centroids))
+        assignments = np.empty(len(vectors), dtype=np.int64)
+        for start in range(0, len(vectors), block):
+            scores = vectors[start:start + block] @ centroids.T
+            assignments[start:start + block] = scores.argmax(axis=1)
+        return assignments
+
+    @classmethod
+    def build(cls, vectors, n_lists=None, n_probe=8, n_iter=10, sample_size=200_000, seed=42):
+        """Cluster ``vectors`` with spherical k-means and bucket every row into its list"""
+        try:
+            vectors = np.asarray(vectors, dtype=np.float32)
+            n = len(vectors)
+            n_lists = min(n_lists or max(1, int(4 * np.sqrt(n))), n)
+
+            rng = np.random.default_rng(seed)
+            sample = vectors[rng.choice(n, size=min(sample_size, n), replace=False)]
+            centroids = sample[rng.choice(len(sample), size=n_lists, replace=False)].copy()
+
+            for _ in range(n_iter):
+                assignments = cls._assign(sample, centroids)
+
+                counts = np.bincount(assignments, minlength=n_lists)
+                order = np.argsort(assignments, kind="stable")
+                starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+
+                sums = np.zeros_like(centroids)
+                non_empty = counts > 0
+                sums[non_empty] = np.add.reduceat(sample[order], starts[non_empty], axis=0)
+
+                # Re-seed empty lists from random sample rows
+                empty = counts == 0
+                sums[empty] = sample[rng.choice(len(sample), size=int(empty.sum()))]
+
+                norms = np.linalg.norm(sums, axis=1, keepdims=True)
+                centroids = sums / np.maximum(norms, 1e-12)
+
+            assignments = cls._assign(vectors, centroids)
+            ids = np.argsort(assignments, kind="stable").astype(np.int64)
+            indptr = np.zeros(n_lists + 1, dtype=np.int64)
+            np.cumsum(np.bincount(assignments, minlength=n_lists), out=indptr[1:])
+
+            logger.info(f"IVF index built over {n} vectors with {n_lists} lists.")
+            return cls(centroids=centroids.astype(np.float32), indptr=indptr, ids=ids, n_probe=n_probe)
+        except Exception as e:
+            logger.error(f"Failed to build IVF index: {e}")
+            raise CustomException("Failed to build IVF index", e)
+
+    # ---------------------------------------------------
+    # Search
+    # ---------------------------------------------------
+    def search(self, vectors, query, k, neg=False, n_probe=None):
+        """Return (row ids, scores) of the ``k`` best rows for ``query``, best first"""
+        n_probe = min(n_probe or self.n_probe, self.n_lists)
+        lists = top_k(self.centroids @ query, n_probe, neg=neg)
+
+        candidates = np.concatenate([self.ids[self.indptr[i]:self.indptr[i + 1]] for i in lists])
+        scores = vectors[candidates] @ query
+
+        best = top_k(scores, k, neg=neg)
+        return candidates[best], scores[best]
+
+    # ---------------------------------------------------
+    # Persistence
+    # ---------------------------------------------------
+    def save(self, path):
+        try:
+            np.savez(path, centroids=self.centroids, indptr=self.indptr, ids=self.ids, n_probe=self.n_probe)
+            logger.info(f"IVF index saved -> {path}")
+        except Exception as e:
+            logger.error(f"Failed to save IVF index: {e}")
+            raise CustomException("Failed to save IVF index", e)
+
+    @classmethod
+    def load(cls, path, n_probe=None):
+        try:
+            with np.load(path) as data:
+                index = cls(
+                    centroids=data["centroids"],
+                    indptr=data["indptr"],
+                    ids=data["ids"],
+                    n_probe=n_probe or int(data["n_probe"]),
+                )
+            logger.info(f"IVF index loaded from {path}")
+            return index
+        except Exception as e:
+            logger.error(f"Failed to load IVF index: {e}")
+            raise CustomException("Failed to load IVF index", e)
+
+
+def recall_at_k(index, vectors, k=10, n_queries=1000, n_probe=None, seed=42):
+    """
+    Measure recall@k of ``index`` against exact search on random rows of ``vectors``.
+
+    Returns a dict with the mean recall and the mean per-query latency (ms) of both paths.
+    """
+    vectors = np.asarray(vectors)
+    rng = np.random.default_rng(seed)
+    queries = rng.choice(len(vectors), size=min(n_queries, len(vectors)), replace=False)
+
+    hits, exact_s, ann_s = 0, 0.0, 0.0
+    for q in queries:
+        query = vectors[q]
+
+        start = time.perf_counter()
+        exact = top_k(vectors @ query, k)
+        exact_s += time.perf_counter() - start
+
+        start = time.perf_counter()
+        approx, _ = index.search(vectors, query, k, n_probe=n_probe)
+        ann_s += time.perf_counter() - start
+
+        hits += len(np.intersect1d(exact, approx))
+
+    return {
+        "k": k,
+        "n_probe": n_probe or index.n_probe,
+        "n_lists": index.n_lists,
+        "recall": hits / (len(queries) * min(k, len(vectors))),
+        "exact_ms": exact_s / len(queries) * 1e3,
+        "ann_ms": ann_s / len(queries) * 1e3,
+    }
@@ -0,0 +1,104 @@
+import threading
+import time
+from collections import OrderedDict
+from src.logger import get_logger
+from utils.db_utils import get_recommendations_from_db
+from utils.recommender_store import add_reload_listener
+from utils.serialization import is_default_scoring
+
+logger = get_logger(__name__)
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries also expire ``ttl`` seconds after being set"""
+
+    def __init__(self, maxsize=10_000, ttl=300.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[1] <= time.monotonic():
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_recommendation_cache():
+    """Return the process-wide recommendation cache; it is cleared whenever artifacts are reloaded"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = TTLCache()
+                add_reload_listener(lambda store: _cache.clear())
+    return _cache
+
+
+def _cache_key(user_id, user_weight, content_weight, top_n):
+    return (user_id, user_weight, content_weight, top_n)
+
+
+def get_cached_recommendations(user_id, user_weight=0.5, content_weight=0.5, top_n=10):
+    """
+    Look up recommendations in memory first, then in the Postgres recommendation cache.
+    Postgres rows carry no scoring parameters, so they only answer default-param lookups.
+    """
+    cache = get_recommendation_cache()
+    key = _cache_key(user_id, user_weight, content_weight, top_n)
+
+    recommendations = cache.get(key)
+    if recommendations is not None:
+        return recommendations
+    if not is_default_scoring(user_weight, content_weight, top_n):
+        return None
+
+    recommendations = get_recommendations_from_db(user_id)
+    if recommendations is not None:
+        cache.set(key, recommendations)
+    return recommendations
+
+
+def cache_recommendations(user_id, recommendations, user_weight=0.5, content_weight=0.5, top_n=10):
+    """Store freshly computed recommendations in the in-process cache"""
+    get_recommendation_cache().set(_cache_key(user_id, user_weight, content_weight, top_n), recommendations)
@@ -48,15 +48,29 @@ def read_json_credentials(file_path):
         raise CustomException("Failed to read JSON credentials file", e)
 
 
-def load_data(path):
+def _read_frame(path, columns=None):
+    """Read one table, dispatching on the file extension"""
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".parquet":
+        return pd.read_parquet(path, columns=columns)
+    elif ext == ".feather":
+        return pd.read_feather(path, columns=columns)
+    return pd.read_csv(path, usecols=columns)
+
+
+def load_data(path, columns=None):
+    """
+    Load a Parquet, Feather or CSV table. ``columns`` restricts the read to those
+    columns, which for the columnar formats skips the other columns on disk entirely.
+    """
     try:
         logger.info(f"Loading data from {path}")
 
         if isinstance(path, str):
-            return pd.read_csv(path)
+            return _read_frame(path, columns)
         elif isinstance(path, list):
             # If multiple paths are given, load each and return a list of DataFrames
-            return [pd.read_csv(p) for p in path]
+            return [_read_frame(p, columns) for p in path]
         else:
             raise ValueError("Path must be a string or a list of strings.")
 
@@ -0,0 +1,49 @@
+import numpy as np
+
+
+def take_rows(indptr, rows):
+    """
+    Select ``rows`` of a CSR layout. Returns (indptr, positions): ``values[positions]``
+    are the entries of those rows, in the given row order.
+    """
+    rows = np.asarray(rows, dtype=np.int64)
+    starts = indptr[rows]
+    lengths = indptr[rows + 1] - starts
+
+    sub_indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=sub_indptr[1:])
+    positions = np.repeat(starts - sub_indptr[:-1], lengths) + np.arange(sub_indptr[-1])
+    return sub_indptr, positions
+
+
+def replace_rows(indptr, rows, row_indptr, n_rows):
+    """
+    Splice new contents for ``rows`` into a CSR layout grown to ``n_rows`` rows (added
+    rows start empty). Row ``i`` of ``row_indptr`` replaces ``rows[i]``.
+
+    Returns (indptr, positions): the entries of the result are
+    ``np.concatenate([values, row_values])[positions]``.
+    """
+    rows = np.asarray(rows, dtype=np.int64)
+    n_old = len(indptr) - 1
+
+    starts = np.zeros(n_rows, dtype=np.int64)
+    lengths = np.zeros(n_rows, dtype=np.int64)
+    starts[:n_old] = indptr[:-1]
+    lengths[:n_old] = np.diff(indptr)
+    starts[rows] = indptr[-1] + row_indptr[:-1]
+    lengths[rows] = np.diff(row_indptr)
+
+    new_indptr = np.zeros(n_rows + 1, dtype=np.int64)
+    np.cumsum(lengths, out=new_indptr[1:])
+    positions = np.repeat(starts - new_indptr[:-1], lengths) + np.arange(new_indptr[-1])
+    return new_indptr, positions
+
+
+def stack_rows(indptrs):
+    """
+    Indptr of the CSR layout whose rows are those of ``indptrs`` one after another,
+    with the values concatenated in the same order.
+    """
+    offsets = np.cumsum([0] + [indptr[-1] for indptr in indptrs[:-1]])
+    return np.concatenate([[0]] + [indptr[1:] + offset for indptr, offset in zip(indptrs, offsets)]).astype(np.int64)
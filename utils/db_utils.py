@@ -1,25 +1,243 @@
-import psycopg2
+import json
+import queue
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
 from datetime import datetime
+import psycopg2
+from psycopg2.extras import execute_values
 from config.db_config import DB_CONFIG
+from src.logger import get_logger
+
+logger = get_logger(__name__)
 
-# Function to retrieve recommendations from the database
-def get_recommendations_from_db(user_id):
-    try:
-        conn = psycopg2.connect(**DB_CONFIG)
-        cur = conn.cursor()
 
-        select_query = """
+# A named SQL statement; PostgreSQL connections PREPARE it once and EXECUTE it afterwards
+Statement = namedtuple("Statement", ["name", "sql", "arg_types"])
+
+GET_RECOMMENDATIONS = Statement(
+    name="get_recommendations",
+    sql="""
         SELECT recommended_animes, timestamp
         FROM user_recommendations
         WHERE user_id = %s
         ORDER BY timestamp DESC
-        LIMIT 1;
-        """
-        cur.execute(select_query, (user_id,))
-        result = cur.fetchone()
+        LIMIT 1
+        """,
+    arg_types=["bigint"],
+)
+
+SAVE_RECOMMENDATIONS = Statement(
+    name="save_recommendations",
+    sql="""
+        INSERT INTO user_recommendations (user_id, recommended_animes, timestamp)
+        VALUES (%s, %s, %s)
+        """,
+    arg_types=["bigint", "text[]", "timestamp"],
+)
+
+# Multi-row form of SAVE_RECOMMENDATIONS for psycopg2's execute_values
+SAVE_RECOMMENDATIONS_VALUES = """
+    INSERT INTO user_recommendations (user_id, recommended_animes, timestamp)
+    VALUES %s
+    """
+
+
+class ConnectionPool:
+    """
+    Thread-safe, bounded pool of DB-API connections.
+
+    ``driver`` is the DB-API module (``psycopg2`` in production, ``sqlite3`` works as a
+    local stand-in) and ``connect_kwargs`` are passed to ``driver.connect``. Idle
+    connections are health-checked before reuse and replaced when they are broken.
+
+    psycopg2 binds lists as PostgreSQL arrays; other drivers cannot, so list
+    parameters are stored as JSON text there (see ``driver_params``/``driver_array``).
+    """
+
+    def __init__(self, driver=psycopg2, maxconn=10, timeout=30.0, health_check_interval=30.0, **connect_kwargs):
+        self.driver = driver
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+        self.connect_kwargs = connect_kwargs
+
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(maxconn)
+        self._prepared = {}
+        self._lock = threading.Lock()
+
+    @property
+    def is_postgres(self):
+        return self.driver.__name__ == "psycopg2"
+
+    @property
+    def connection_errors(self):
+        """Driver errors that mean the connection itself is unusable"""
+        return (self.driver.OperationalError, self.driver.InterfaceError)
+
+    # ---------------------------------------------------
+    # Checkout / checkin
+    # ---------------------------------------------------
+    @contextmanager
+    def connection(self):
+        """Borrow a connection; it is rolled back on error and discarded if broken"""
+        if not self._slots.acquire(timeout=self.timeout):
+            raise TimeoutError(f"No database connection available within {self.timeout}s")
+
+        conn = None
+        try:
+            conn = self._checkout()
+            yield conn
+        except Exception:
+            if conn is not None:
+                try:
+                    conn.rollback()
+                    self._checkin(conn)
+                except Exception:
+                    self._discard(conn)
+                conn = None
+            raise
+        else:
+            self._checkin(conn)
+        finally:
+            self._slots.release()
+
+    def _checkout(self):
+        while True:
+            try:
+                conn, last_used = self._idle.get_nowait()
+            except queue.Empty:
+                return self._connect()
+
+            if time.monotonic() - last_used < self.health_check_interval or self._is_healthy(conn):
+                return conn
+            logger.warning("Discarding unhealthy pooled database connection.")
+            self._discard(conn)
+
+    def _checkin(self, conn):
+        self._idle.put((conn, time.monotonic()))
+
+    def _connect(self):
+        conn = self.driver.connect(**self.connect_kwargs)
+        logger.info("Opened new pooled database connection.")
+        return conn
+
+    def _is_healthy(self, conn):
+        try:
+            cur = conn.cursor()
+            cur.execute("SELECT 1")
+            cur.fetchall()
+            cur.close()
+            conn.rollback()
+            return True
+        except Exception:
+            return False
+
+    def _discard(self, conn):
+        with self._lock:
+            self._prepared.pop(id(conn), None)
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def closeall(self):
+        """Close every idle connection"""
+        while True:
+            try:
+                conn, _ = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(conn)
+
+    # ---------------------------------------------------
+    # Statements
+    # ---------------------------------------------------
+    def driver_sql(self, sql):
+        """Rewrite ``%s`` placeholders for drivers using the qmark paramstyle"""
+        return sql.replace("%s", "?") if self.driver.paramstyle == "qmark" else sql
+
+    def driver_params(self, params):
+        """Parameters as the driver can bind them: list values become JSON text off PostgreSQL"""
+        if self.is_postgres:
+            return params
+        return tuple(json.dumps(value) if isinstance(value, (list, tuple)) else value for value in params)
 
+    def driver_array(self, value):
+        """Read back a list column written with ``driver_params``"""
+        if self.is_postgres or value is None:
+            return value
+        return json.loads(value)
+
+    def execute(self, cur, statement, params):
+        """Run ``statement`` on ``cur``, preparing it once per connection on PostgreSQL"""
+        if not self.is_postgres:
+            return cur.execute(self.driver_sql(statement.sql), self.driver_params(params))
+
+        key = id(cur.connection)
+        with self._lock:
+            prepared = self._prepared.setdefault(key, set())
+
+        if statement.name not in prepared:
+            sql = statement.sql
+            for i in range(1, len(statement.arg_types) + 1):
+                sql = sql.replace("%s", f"${i}", 1)
+            cur.execute(f"PREPARE {statement.name} ({', '.join(statement.arg_types)}) AS {sql}")
+            prepared.add(statement.name)
+
+        placeholders = ", ".join(["%s"] * len(params))
+        return cur.execute(f"EXECUTE {statement.name} ({placeholders})", params)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Return the process-wide connection pool, creating it from DB_CONFIG on first use"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(psycopg2, **DB_CONFIG)
+    return _pool
+
+
+def set_pool(pool):
+    """Replace the process-wide pool (e.g. with a SQLite stand-in); returns the previous one"""
+    global _pool
+    with _pool_lock:
+        previous, _pool = _pool, pool
+    return previous
+
+
+def run_with_retry(operation, retries=1):
+    """Run ``operation(conn, pool)`` on a pooled connection, reconnecting on connection errors"""
+    pool = get_pool()
+    for attempt in range(retries + 1):
+        try:
+            with pool.connection() as conn:
+                return operation(conn, pool)
+        except pool.connection_errors as e:
+            if attempt == retries:
+                raise
+            logger.warning(f"Database connection error, retrying: {e}")
+
+
+# Function to retrieve recommendations from the database
+def get_recommendations_from_db(user_id):
+    def select(conn, pool):
+        cur = conn.cursor()
+        pool.execute(cur, GET_RECOMMENDATIONS, (user_id,))
+        result = cur.fetchone()
         cur.close()
-        conn.close()
+        conn.rollback()  # end the read-only transaction before returning the connection
+        return None if result is None else (pool.driver_array(result[0]),) + tuple(result[1:])
+
+    try:
+        result = run_with_retry(select)
 
         if result is None:
             return None
@@ -31,24 +249,31 @@ def get_recommendations_from_db(user_id):
 
 # Function to save recommendations to the database
 def save_recommendations_to_db(user_id, recommendations):
-    try:
-        conn = psycopg2.connect(**DB_CONFIG)
+    def insert(conn, pool):
         cur = conn.cursor()
-
-        # Insert query to save recommendations for the user
-        insert_query = """
-        INSERT INTO user_recommendations (user_id, recommended_animes, timestamp)
-        VALUES (%s, %s, %s)
-        """
-        cur.execute(insert_query, (
+        pool.execute(cur, SAVE_RECOMMENDATIONS, (
             user_id,
             recommendations,  # This should be a list of recommended anime names
             datetime.now()  # Current timestamp
         ))
-
         conn.commit()
         cur.close()
-        conn.close()
+
+    try:
+        run_with_retry(insert)
         print(f"Recommendations saved to DB for user {user_id}")
     except Exception as e:
         print(f"Failed to save recommendations: {e}")
+
+# Function to save many (user_id, recommendations, timestamp) rows in one statement
+def save_recommendations_batch_to_db(rows):
+    def insert(conn, pool):
+        cur = conn.cursor()
+        if pool.is_postgres:
+            execute_values(cur, SAVE_RECOMMENDATIONS_VALUES, rows, page_size=len(rows))
+        else:
+            cur.executemany(pool.driver_sql(SAVE_RECOMMENDATIONS.sql), [pool.driver_params(row) for row in rows])
+        conn.commit()
+        cur.close()
+
+    run_with_retry(insert)
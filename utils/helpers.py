@@ -1,12 +1,72 @@
 import pandas as pd
 import numpy as np
-import joblib
 from config.path_config import *
+from utils.recommender_store import get_store
+from utils.similarity import top_k, block_top_k
+
+
+def _resolve_store(store):
+    return get_store() if store is None else store
+
+
+def _embedded_code(encoder, weights, raw_id):
+    """Code of a raw id, None for unknown ids and ids encoded after the weights were trained"""
+    code = encoder.get(raw_id)
+    return None if code is None or code >= len(weights) else code
+
+
+def _nearest(weights, encoded_index, n, neg=False, neighbours=None, ann_index=None, search=None):
+    """
+    Return (closest rows, similarities), best first. Answered by lookup from a
+    precomputed neighbour table when it covers the query, then by the ANN index
+    when one is loaded, and by exact search otherwise (sharded over worker
+    processes when a ShardedSearch is given).
+    """
+    if neighbours is not None and not neg and n <= neighbours.k:
+        return neighbours.lookup(encoded_index, n)
+
+    query = weights[encoded_index]
+    if ann_index is not None:
+        return ann_index.search(weights, query, n, neg=neg)
+    if search is not None:
+        return search.search(query, n, neg=neg)
+
+    dists = weights @ query
+    closest = top_k(dists, n, neg=neg)
+    return closest, dists[closest]
+
+
+def _nearest_batch(weights, rows, n, neighbours=None, ann_index=None, search=None):
+    """
+    Batched _nearest: (closest rows, similarities) of shape (len(rows), n), best first,
+    answered in the same order (neighbour table, ANN index, sharded search, exact
+    search) so batch and single-item results agree. Where the ANN index finds fewer
+    than n candidates, the row is padded with the query row itself.
+    """
+    rows = np.asarray(rows, dtype=np.int64)
+    if neighbours is not None and n <= neighbours.k:
+        return neighbours.lookup(rows, n)
+
+    if ann_index is not None:
+        closest = np.repeat(rows[:, None], n, axis=1)
+        similarities = np.zeros((len(rows), n), dtype=np.float32)
+        for i, row in enumerate(rows):
+            ids, scores = ann_index.search(weights, weights[row], n)
+            closest[i, :len(ids)] = ids
+            similarities[i, :len(ids)] = scores
+        return closest, similarities
+
+    if search is not None:
+        return search.search(weights[rows], n)
+
+    # Block-wise matrix multiplies, then a row-wise top-k
+    return block_top_k(weights[rows], weights, n)
+
 
 # GET ANIME FRAME
 
-def get_anime_frame(anime, path_df):
-    df = pd.read_csv(path_df)
+def get_anime_frame(anime, store=None):
+    df = _resolve_store(store).anime_df
     if isinstance(anime, int):
         return df[df["anime_id"] == anime]
     elif isinstance(anime, str):
@@ -16,79 +76,61 @@ def get_anime_frame(anime, path_df):
 
 # GET SYNOPSIS
 
-def get_synopsis(anime, path_synopsis_df):
-    synopsis_df = pd.read_csv(path_synopsis_df)
-    try:
-        if isinstance(anime, int):
-            return synopsis_df[synopsis_df["MAL_ID"] == anime]["sypnopsis"].values[0]
-        elif isinstance(anime, str):
-            return synopsis_df[synopsis_df["Name"] == anime]["sypnopsis"].values[0]
-    except IndexError:
+def get_synopsis(anime, store=None):
+    catalog = _resolve_store(store).anime_catalog
+    anime_id = catalog.anime_id_for(anime)
+    if anime_id is None:
         return None  # Return None if there's no matching synopsis
 
+    return catalog.lookup([anime_id])["synopsis"].values[0]
+
 
 # CONTENT RECOMMENDATION
 
-def find_similar_animes(name, path_anime_weights, path_anime2anime_encoded, path_anime2anime_decoded,
-                        path_anime_df, n=10, return_dist=False, neg=False):
-    anime_weights = joblib.load(path_anime_weights)
-    anime2anime_encoded = joblib.load(path_anime2anime_encoded)
-    anime2anime_decoded = joblib.load(path_anime2anime_decoded)
+def find_similar_animes(name, n=10, return_dist=False, neg=False, store=None):
+    store = _resolve_store(store)
+    anime_weights = store.anime_weights
+    anime_encoder = store.anime_encoder
+    catalog = store.anime_catalog
 
     try:
         # Get anime ID from name
-        anime_frame = get_anime_frame(name, path_anime_df)
-        if anime_frame.empty:
+        index = catalog.anime_id_for(name)
+        if index is None:
             print(f"Error: Anime '{name}' not found in database")
             return None
 
-        index = anime_frame["anime_id"].values[0]  # type: ignore
-        encoded_index = anime2anime_encoded.get(index)
+        encoded_index = _embedded_code(anime_encoder, anime_weights, index)
         if encoded_index is None:
             print(f"Error: Anime ID {index} not found in encoded mapping")
             return None
 
         # Calculate similarities
-        dists = np.dot(anime_weights, anime_weights[encoded_index])
-        sorted_dists = np.argsort(dists)
-
         n += 1
-        closest = sorted_dists[:n] if neg else sorted_dists[-n:]
-
         if return_dist:
-            return dists, closest
-
-        # Build similarity array
-        SimilarityArr = []
-        for close in closest:
-            try:
-                decoded_id = anime2anime_decoded.get(close)
-                if decoded_id is None:
-                    continue
-
-                anime_frame = get_anime_frame(decoded_id, path_anime_df)
-                if anime_frame.empty:
-                    continue
-
-                anime_name = anime_frame["eng_version"].values[0]  # type: ignore
-                genre = anime_frame["Genres"].values[0]  # type: ignore
-                similarity = dists[close]
-
-                SimilarityArr.append({
-                    "anime_id": decoded_id,
-                    "anime_name": anime_name,
-                    "similarity": similarity,
-                    "genre": genre
-                })
-            except Exception as e:
-                print(f"Error while processing similar anime: {str(e)}")
-                continue
+            dists = anime_weights @ anime_weights[encoded_index]
+            return dists, top_k(dists, n, neg=neg)
+
+        closest, similarities = _nearest(anime_weights, encoded_index, n, neg=neg,
+                                         neighbours=store.anime_neighbours, ann_index=store.anime_ann_index)
+
+        # Build similarity frame with one batch metadata lookup
+        decoded_ids = anime_encoder.decode(closest)
 
-        if not SimilarityArr:
+        positions = catalog.positions(decoded_ids)
+        found = positions >= 0
+        metadata = catalog.lookup(decoded_ids[found])
+
+        if metadata.empty:
             print("Error: No similar animes found")
             return None
 
-        Frame = pd.DataFrame(SimilarityArr)
+        Frame = pd.DataFrame({
+            "anime_id": metadata["anime_id"].values,
+            "anime_name": metadata["eng_version"].values,
+            "similarity": similarities[found],
+            "genre": metadata["Genres"].values,
+        })
         Frame = Frame.sort_values(by=["similarity"], ascending=False)
         return Frame[Frame["anime_id"] != index].drop(["anime_id"], axis=1)
 
@@ -97,45 +139,102 @@ def find_similar_animes(name, path_anime_weights, path_anime2anime_encoded, path
         return None
 
 
+# BATCH CONTENT RECOMMENDATION
+
+def similar_anime_codes(encoded_seeds, n, store=None):
+    """
+    (closest, similarities), each of shape (len(encoded_seeds), n), for an array of
+    encoded animes, best first and including each seed itself.
+    """
+    store = _resolve_store(store)
+    return _nearest_batch(store.anime_weights, encoded_seeds, n,
+                          neighbours=store.anime_neighbours, ann_index=store.anime_ann_index)
+
+
+def find_similar_animes_batch(names, n=10, store=None):
+    """
+    Content neighbours for many seed animes (names or ids) with a single matrix multiply.
+
+    Returns one frame with a ``seed`` column; within each seed, rows are ordered by
+    descending similarity and the seed itself is excluded, as in find_similar_animes.
+    """
+    store = _resolve_store(store)
+    anime_encoder = store.anime_encoder
+    catalog = store.anime_catalog
+
+    columns = ["seed", "anime_name", "similarity", "genre"]
+
+    try:
+        seeds, seed_ids, encoded_seeds = [], [], []
+        for name in names:
+            index = catalog.anime_id_for(name)
+            encoded_index = None if index is None else _embedded_code(anime_encoder, store.anime_weights, index)
+            if encoded_index is None:
+                print(f"No similar anime found {name}")
+                continue
+
+            seeds.append(name)
+            seed_ids.append(index)
+            encoded_seeds.append(encoded_index)
+
+        if not seeds:
+            return pd.DataFrame(columns=columns)
+
+        closest, similarities = similar_anime_codes(encoded_seeds, n + 1, store=store)
+
+        seed_rows = np.repeat(np.arange(len(seeds)), closest.shape[1])
+        closest = closest.ravel()
+        similarities = similarities.ravel()
+
+        decoded_ids = anime_encoder.decode(closest)
+        keep = (catalog.positions(decoded_ids) >= 0) & (decoded_ids != np.asarray(seed_ids)[seed_rows])
+        metadata = catalog.lookup(decoded_ids[keep])
+
+        return pd.DataFrame({
+            "seed": np.asarray(seeds, dtype=object)[seed_rows[keep]],
+            "anime_name": metadata["eng_version"].values,
+            "similarity": similarities[keep],
+            "genre": metadata["Genres"].values,
+        }, columns=columns)
+
+    except Exception as e:
+        print(f"Error: {str(e)}")
+        return pd.DataFrame(columns=columns)
+
+
 # FIND SIMILAR USERS
 
-def find_similar_users(item_input, path_user_weights, path_user2user_encoded,
-                       path_user2user_decoded, n=10, return_dist=False, neg=False):
-    user_weights = joblib.load(path_user_weights)
-    user2user_encoded = joblib.load(path_user2user_encoded)
-    user2user_decoded = joblib.load(path_user2user_decoded)
+def _similarity_frame(user_encoder, closest, similarities):
+    """Frame of (decoded user_id, similarity), dropping rows that do not decode"""
+    decoded_ids = user_encoder.decode(closest)
+    found = decoded_ids >= 0
+    return pd.DataFrame({"user_id": decoded_ids[found], "similarity": np.asarray(similarities)[found]})
+
+
+def find_similar_users(item_input, n=10, return_dist=False, neg=False, store=None):
+    store = _resolve_store(store)
+    user_weights = store.user_weights
+    user_encoder = store.user_encoder
 
     try:
         # Get encoded index for input user
-        encoded_index = user2user_encoded.get(item_input)
+        encoded_index = _embedded_code(user_encoder, user_weights, item_input)
         if encoded_index is None:
             print(f"Error: User '{item_input}' not found in encoded mapping")
             return None
 
-        # Calculate similarities
-        dists = np.dot(user_weights, user_weights[encoded_index])
-        sorted_dists = np.argsort(dists)
-
         # Get n closest users
         n += 1  # Add 1 to include the input user
-        closest = sorted_dists[:n] if neg else sorted_dists[-n:]  # Sort based on neg parameter
-
         if return_dist:
-            return dists, closest
-
-        # Build similarity array
-        SimilarityArr = []
-        for close in closest:
-            similarity = dists[close]
-            decoded_id = user2user_decoded.get(close)
-            if decoded_id is not None:
-                SimilarityArr.append({
-                    "user_id": decoded_id,
-                    "similarity": similarity
-                })
+            dists = user_weights @ user_weights[encoded_index]
+            return dists, top_k(dists, n, neg=neg)  # Best first; lowest similarity first when neg
+
+        closest, similarities = _nearest(user_weights, encoded_index, n, neg=neg,
+                                         neighbours=store.user_neighbours, ann_index=store.user_ann_index,
+                                         search=store.user_search)
 
         # Create and sort DataFrame
-        similar_users = pd.DataFrame(SimilarityArr)
+        similar_users = _similarity_frame(user_encoder, closest, similarities)
         similar_users = similar_users.sort_values(by=["similarity"], ascending=False)
 
         # Remove the input user and return
@@ -146,32 +245,70 @@ def find_similar_users(item_input, path_user_weights, path_user2user_encoded,
         return None
 
 
+# BATCH SIMILAR USERS
+
+def find_similar_users_batch(user_ids, n=10, store=None):
+    """
+    Similar users for many users at once, answered like find_similar_users (neighbour
+    table, ANN index, sharded search) or scored block-wise with matrix multiplies.
+
+    Returns {user_id: frame} with the same frames find_similar_users returns;
+    unknown users map to None.
+    """
+    store = _resolve_store(store)
+    user_weights = store.user_weights
+    user_encoder = store.user_encoder
+
+    results = {}
+    known, rows = [], []
+    for user_id in user_ids:
+        encoded_index = _embedded_code(user_encoder, user_weights, user_id)
+        if encoded_index is None:
+            print(f"Error: User '{user_id}' not found in encoded mapping")
+            results[user_id] = None
+        else:
+            known.append(user_id)
+            rows.append(encoded_index)
+
+    if not known:
+        return results
+
+    closest, similarities = _nearest_batch(user_weights, rows, n + 1, neighbours=store.user_neighbours,
+                                           ann_index=store.user_ann_index, search=store.user_search)
+
+    for user_id, user_closest, user_similarities in zip(known, closest, similarities):
+        similar_users = _similarity_frame(user_encoder, user_closest, user_similarities)
+        similar_users = similar_users.sort_values(by=["similarity"], ascending=False)
+        results[user_id] = similar_users[similar_users["user_id"] != user_id]
+
+    return results
+
+
 # USER PREFERENCES
 
-def get_user_preferences(user_id, path_rating_df, path_anime_df, verbose=0, plot=False):
-    rating_df = pd.read_csv(path_rating_df)
-    df = pd.read_csv(path_anime_df)
+def get_user_preferences(user_id, verbose=0, plot=False, store=None):
+    store = _resolve_store(store)
+    df = store.anime_df
 
     try:
-        # Get all animes watched by user
-        animes_watched_by_user = rating_df[rating_df["user_id"] == user_id]
+        # Get all animes watched by user (a slice of the per-user ratings index)
+        watched = store.user_ratings(user_id)
+        anime_ids, ratings = watched if watched is not None else (np.empty(0), np.empty(0))
 
         if verbose:
-            print(f"User {user_id} has watched {len(animes_watched_by_user)} animes")
+            print(f"User {user_id} has watched {len(anime_ids)} animes")
 
-        if len(animes_watched_by_user) == 0:
+        if len(anime_ids) == 0:
             print(f"Error: User {user_id} has not watched any animes")
             return None
 
-        # Get top rated animes (75th percentile)
-        user_rating_perctile = np.percentile(animes_watched_by_user["rating"], 75)
-        top_rated_animes = animes_watched_by_user[animes_watched_by_user["rating"] >= user_rating_perctile]
+        # Top rated animes (75th percentile), precomputed by the processing stage
+        top_anime_ids = store.user_top_rated(user_id)
 
         if verbose:
-            print(f"Found {len(top_rated_animes)} top rated animes")
+            print(f"Found {len(top_anime_ids)} top rated animes")
 
         # Get anime details
-        top_anime_ids = top_rated_animes.sort_values(by="rating", ascending=False)["anime_id"].values
         anime_df_rows = df[df["anime_id"].isin(top_anime_ids)]
         anime_df_rows = anime_df_rows[["eng_version", "Genres"]]
 
@@ -184,36 +321,40 @@ def get_user_preferences(user_id, path_rating_df, path_anime_df, verbose=0, plot
 
 # GET USER RECOMMENDATION
 
-def get_user_recommendations(similar_users, user_pref, path_anime_df, path_synopsis_df, path_rating_df, n=10):
-    recommended_animes = []
-    anime_list = []
-
-    for user_id in similar_users.user_id.values:
-        pref_list = get_user_preferences(int(user_id), path_rating_df, path_anime_df)
-        if pref_list is not None:
-            pref_list = pref_list[~pref_list.eng_version.isin(user_pref.eng_version.values)]  # type: ignore
-            if not pref_list.empty:
-                anime_list.append(pref_list.eng_version.values)
-
-    if anime_list:
-        # Flatten and count frequency
-        flat_anime_list = [anime for sublist in anime_list for anime in sublist]
-        sorted_list = pd.Series(flat_anime_list).value_counts().head(n)
-
-        for anime_name, n_users_pref in sorted_list.items():
-            if isinstance(anime_name, str):
-                frame = get_anime_frame(anime_name, path_anime_df)
-                if not frame.empty:
-                    anime_id = frame.anime_id.values[0]
-                    genre = frame.Genres.values[0]
-                    synopsis = get_synopsis(int(anime_id), path_synopsis_df)
-                    recommended_animes.append({
-                        "n": n_users_pref,
-                        "anime_name": anime_name,
-                        "Genres": genre,
-                        "synopsis": synopsis,
-                    })
-
-        return pd.DataFrame(recommended_animes).head(n)
-    else:
+def user_candidate_counts(user_id, similar_users, store=None):
+    """
+    Encoded animes top-rated by ``similar_users`` but not by ``user_id``, with the
+    number of similar users rating each highly; most shared first.
+    """
+    store = _resolve_store(store)
+    own_codes = store.anime_encoder.encode(store.user_top_rated(user_id))
+
+    user_codes = store.user_encoder.encode(similar_users.user_id.values)
+    return store.top_rated.row_counts(user_codes[user_codes >= 0], exclude=own_codes[own_codes >= 0])
+
+
+def get_user_recommendations(similar_users, user_pref, n=10, store=None):
+    store = _resolve_store(store)
+
+    # Animes the user already rates highly are never recommended back
+    pref_ids = store.anime_catalog.ids_for_names(user_pref.eng_version.values)
+    pref_codes = store.anime_encoder.encode(pref_ids[pref_ids >= 0])
+
+    # Sum the similar users' top-rated rows, on encoded ids
+    user_codes = store.user_encoder.encode(similar_users.user_id.values)
+    anime_codes, counts = store.top_rated.row_counts(user_codes[user_codes >= 0], exclude=pref_codes[pref_codes >= 0])
+
+    if len(anime_codes) == 0:
         return pd.DataFrame(columns=["n", "anime_name", "Genres", "synopsis"])
+
+    # Resolve ids -> metadata only for the top n
+    anime_ids = store.anime_encoder.decode(anime_codes[:n])
+    found = store.anime_catalog.positions(anime_ids) >= 0
+    metadata = store.anime_catalog.lookup(anime_ids[found])
+
+    return pd.DataFrame({
+        "n": counts[:n][found],
+        "anime_name": metadata["eng_version"].values,
+        "Genres": metadata["Genres"].values,
+        "synopsis": metadata["synopsis"].values,
+    })
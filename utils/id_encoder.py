@@ -0,0 +1,96 @@
+import numpy as np
+import pandas as pd
+from src.logger import get_logger
+from src.custom_exception import CustomException
+
+logger = get_logger(__name__)
+
+
+class IdEncoder:
+    """
+    Raw id <-> dense code mapping backed by two int arrays.
+
+    ``ids[code]`` is the raw id of a code (the decode side), codes being assigned in
+    order of first appearance. Encoding binary-searches ``sorted_ids``, the same ids
+    in ascending order, and maps the hit back through ``order``. Whole arrays encode
+    and decode in one vectorised call; ``get`` keeps the scalar dict-style lookup.
+    """
+
+    def __init__(self, ids=None):
+        self.ids = np.asarray([] if ids is None else ids, dtype=np.int64)
+        self.order = np.argsort(self.ids, kind="stable").astype(np.int64)
+        self.sorted_ids = self.ids[self.order]
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, raw_id):
+        return self.get(raw_id) is not None
+
+    @classmethod
+    def factorize(cls, values):
+        """Return (encoder, codes) numbering the distinct values by first appearance"""
+        codes, uniques = pd.factorize(np.asarray(values))
+        return cls(uniques), codes
+
+    # ---------------------------------------------------
+    # Lookups
+    # ---------------------------------------------------
+    def encode(self, values):
+        """Codes of an array of raw ids, -1 for unknown ids"""
+        values = np.asarray(values, dtype=np.int64)
+        if len(self.ids) == 0:
+            return np.full(values.shape, -1, dtype=np.int64)
+
+        pos = np.minimum(np.searchsorted(self.sorted_ids, values), len(self.ids) - 1)
+        return np.where(self.sorted_ids[pos] == values, self.order[pos], -1)
+
+    def decode(self, codes):
+        """Raw ids of an array of codes, -1 for codes out of range"""
+        codes = np.asarray(codes, dtype=np.int64)
+        valid = (codes >= 0) & (codes < len(self.ids))
+        return np.where(valid, self.ids[np.where(valid, codes, 0)] if len(self.ids) else -1, -1)
+
+    def get(self, raw_id, default=None):
+        """Code of a single raw id, ``default`` if unknown"""
+        if not isinstance(raw_id, (int, np.integer)):
+            return default
+        code = int(self.encode([raw_id])[0])
+        return default if code < 0 else code
+
+    def extend(self, values):
+        """Append unseen ids in order of first appearance and return the codes of ``values``"""
+        values = np.asarray(values, dtype=np.int64)
+        uniques = pd.unique(values)
+        new_ids = uniques[self.encode(uniques) < 0]
+
+        if len(new_ids):
+            self.__init__(np.concatenate([self.ids, new_ids]))
+        return self.encode(values)
+
+    # ---------------------------------------------------
+    # Persistence
+    # ---------------------------------------------------
+    def save(self, path):
+        try:
+            np.savez(path, ids=self.ids)
+            logger.info(f"Id encoder saved -> {path}")
+        except Exception as e:
+            logger.error(f"Failed to save id encoder: {e}")
+            raise CustomException("Failed to save id encoder", e)
+
+    @classmethod
+    def load(cls, path):
+        try:
+            with np.load(path) as data:
+                encoder = cls(data["ids"])
+            logger.info(f"Id encoder loaded from {path}")
+            return encoder
+        except Exception as e:
+            logger.error(f"Failed to load id encoder: {e}")
+            raise CustomException("Failed to load id encoder", e)
+
+    @classmethod
+    def from_decoded(cls, decoded):
+        """Build from a legacy {code: raw id} dict"""
+        return cls([decoded[code] for code in range(len(decoded))])
@@ -0,0 +1,60 @@
+import numpy as np
+from src.logger import get_logger
+from src.custom_exception import CustomException
+from utils.similarity import block_top_k
+
+logger = get_logger(__name__)
+
+
+class NeighbourTable:
+    """
+    Precomputed top-K most similar rows of an embedding matrix.
+
+    Row ``i`` holds the ``k`` rows with the highest dot product against row ``i``,
+    best first and including ``i`` itself, exactly as an exact search would return
+    them. Ids are stored as int32 and scores as float16.
+    """
+
+    def __init__(self, ids, scores):
+        self.ids = ids
+        self.scores = scores
+
+    @property
+    def k(self):
+        return self.ids.shape[1]
+
+    @classmethod
+    def build(cls, weights, k=50, max_block_bytes=256 << 20):
+        """Compute the table in row blocks whose score matrix fits in ``max_block_bytes``"""
+        try:
+            weights = np.asarray(weights, dtype=np.float32)
+            ids, scores = block_top_k(weights, weights, k, max_block_bytes=max_block_bytes)
+
+            logger.info(f"Neighbour table built: {len(weights)} rows x top-{ids.shape[1]}.")
+            return cls(ids=ids.astype(np.int32), scores=scores.astype(np.float16))
+        except Exception as e:
+            logger.error(f"Failed to build neighbour table: {e}")
+            raise CustomException("Failed to build neighbour table", e)
+
+    def lookup(self, rows, n):
+        """Return (ids, scores) of the ``n`` best neighbours of one row or an array of rows"""
+        return self.ids[rows, :n], self.scores[rows, :n].astype(np.float32)
+
+    def save(self, path):
+        try:
+            np.savez(path, ids=self.ids, scores=self.scores)
+            logger.info(f"Neighbour table saved -> {path}")
+        except Exception as e:
+            logger.error(f"Failed to save neighbour table: {e}")
+            raise CustomException("Failed to save neighbour table", e)
+
+    @classmethod
+    def load(cls, path):
+        try:
+            with np.load(path) as data:
+                table = cls(ids=data["ids"], scores=data["scores"])
+            logger.info(f"Neighbour table loaded from {path}")
+            return table
+        except Exception as e:
+            logger.error(f"Failed to load neighbour table: {e}")
+            raise CustomException("Failed to load neighbour table", e)
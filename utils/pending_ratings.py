@@ -0,0 +1,115 @@
+import os
+import numpy as np
+import pandas as pd
+from src.logger import get_logger
+from src.custom_exception import CustomException
+
+logger = get_logger(__name__)
+
+# One raw rating of a pending user (9 bytes, little-endian), as read from the input CSV
+PENDING_DTYPE = np.dtype([("user_id", "<i4"), ("anime_id", "<i4"), ("rating", "u1")])
+
+# Records scanned at a time when collecting the rows of admitted users
+SCAN_ROWS = 1_000_000
+
+
+class PendingRatings:
+    """
+    Ratings of users below the activity threshold, kept so incremental runs can admit
+    them once they reach it.
+
+    The rows go to an append-only file of fixed-length records and only the per-user
+    counts are held in memory. ``size`` is the committed length of the file: loading
+    truncates anything past it, which drops rows appended by a run that failed before
+    saving its state.
+    """
+
+    def __init__(self, path, counts=None, size=0):
+        self.path = path
+        self.counts = counts if counts is not None else pd.Series(dtype=np.int64)
+        self.size = size
+
+    def __len__(self):
+        return int(self.counts.sum())
+
+    @classmethod
+    def create(cls, path):
+        """Start an empty pending file at ``path``, replacing any previous one"""
+        try:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            open(path, "wb").close()
+            return cls(path)
+        except Exception as e:
+            logger.error(f"Failed to create pending ratings: {e}")
+            raise CustomException("Failed to create pending ratings", e)
+
+    def append(self, frame):
+        """Append the raw (user_id, anime_id, rating) rows of ``frame`` and count them"""
+        try:
+            if not len(frame):
+                return
+            records = np.empty(len(frame), dtype=PENDING_DTYPE)
+            for name in PENDING_DTYPE.names:
+                records[name] = frame[name].values
+
+            with open(self.path, "ab") as f:
+                records.tofile(f)
+            self.size += records.nbytes
+            self.counts = self.counts.add(frame["user_id"].value_counts(), fill_value=0).astype(np.int64)
+        except Exception as e:
+            logger.error(f"Failed to append pending ratings: {e}")
+            raise CustomException("Failed to append pending ratings", e)
+
+    def admit(self, min_rating):
+        """
+        Remove the users with at least ``min_rating`` pending ratings and return all of
+        their rows, in the order they were appended. The file is scanned in blocks of
+        ``SCAN_ROWS`` records; the rows stay in it and are dropped by the next full run.
+        """
+        try:
+            admitted = self.counts.index[self.counts >= min_rating].values
+            parts = [np.empty(0, dtype=PENDING_DTYPE)]
+            n_records = self.size // PENDING_DTYPE.itemsize
+            if len(admitted) and n_records:
+                records = np.memmap(self.path, dtype=PENDING_DTYPE, mode="r", shape=(n_records,))
+                for start in range(0, n_records, SCAN_ROWS):
+                    block = np.asarray(records[start:start + SCAN_ROWS])
+                    parts.append(block[np.isin(block["user_id"], admitted)])
+                del records
+
+            self.counts = self.counts.drop(admitted)
+            rows = np.concatenate(parts)
+            logger.info(f"Admitted {len(admitted)} pending users with {len(rows)} ratings.")
+            return pd.DataFrame({name: rows[name] for name in PENDING_DTYPE.names})
+        except Exception as e:
+            logger.error(f"Failed to admit pending users: {e}")
+            raise CustomException("Failed to admit pending users", e)
+
+    # ---------------------------------------------------
+    # Persistence
+    # ---------------------------------------------------
+    def save_counts(self, path):
+        """Save the per-user counts; the rows themselves are already on disk"""
+        try:
+            np.savez(path, user_ids=self.counts.index.values.astype(np.int64), counts=self.counts.values)
+            logger.info(f"Pending counts of {len(self.counts)} users saved -> {path}")
+        except Exception as e:
+            logger.error(f"Failed to save pending counts: {e}")
+            raise CustomException("Failed to save pending counts", e)
+
+    @classmethod
+    def load(cls, path, counts_path, size):
+        """Open the pending file, truncated to the committed ``size``, and its counts"""
+        try:
+            if not os.path.exists(path):
+                return cls.create(path)
+
+            with open(path, "r+b") as f:
+                f.truncate(size)
+            with np.load(counts_path) as data:
+                counts = pd.Series(data["counts"], index=data["user_ids"])
+            logger.info(f"Pending ratings loaded: {len(counts)} users, {size} bytes.")
+            return cls(path, counts, size)
+        except Exception as e:
+            logger.error(f"Failed to load pending ratings: {e}")
+            raise CustomException("Failed to load pending ratings", e)
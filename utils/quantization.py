@@ -0,0 +1,145 @@
+import os
+import time
+import numpy as np
+from src.logger import get_logger
+from src.custom_exception import CustomException
+from utils.similarity import top_k
+
+logger = get_logger(__name__)
+
+PRECISIONS = ("float16", "int8")
+
+
+class QuantizedEmbeddings:
+    """
+    Embedding matrix stored as float16, or as int8 with one float32 scale per row.
+
+    Behaves like the float32 matrix where the serving helpers need it: indexing
+    returns dequantized float32 rows and ``embeddings @ x`` scores every row against
+    one query (``x`` of shape (d,)) or many (``x`` of shape (d, m)). Scoring reads
+    the compact values in cache-sized row blocks and widens only one block at a time.
+
+    int8 widens with SIMD casts and scores about as fast as float32 (see
+    benchmarks/quantization_benchmark.py). NumPy has no vectorised float16 -> float32
+    cast, so float16 only saves memory: its scoring is several times slower.
+    """
+
+    def __init__(self, values, scales=None, block_rows=1024):
+        self.values = values
+        self.scales = scales
+        self.block_rows = block_rows
+
+    @property
+    def precision(self):
+        return "int8" if self.scales is not None else "float16"
+
+    @property
+    def shape(self):
+        return self.values.shape
+
+    @property
+    def nbytes(self):
+        return self.values.nbytes + (self.scales.nbytes if self.scales is not None else 0)
+
+    def __len__(self):
+        return len(self.values)
+
+    @classmethod
+    def quantize(cls, weights, precision="float16"):
+        """Quantize a float matrix; int8 uses symmetric per-row scaling"""
+        try:
+            weights = np.asarray(weights, dtype=np.float32)
+            if precision == "float16":
+                return cls(weights.astype(np.float16))
+            elif precision == "int8":
+                scales = np.abs(weights).max(axis=1) / 127.0
+                scales[scales == 0] = 1.0
+                values = np.clip(np.rint(weights / scales[:, None]), -127, 127).astype(np.int8)
+                return cls(values, scales.astype(np.float32))
+            raise ValueError(f"Unsupported precision '{precision}', expected one of {PRECISIONS}")
+        except Exception as e:
+            logger.error(f"Failed to quantize embeddings: {e}")
+            raise CustomException("Failed to quantize embeddings", e)
+
+    def __getitem__(self, rows):
+        values = self.values[rows].astype(np.float32)
+        if self.scales is None:
+            return values
+        return values * np.asarray(self.scales[rows], dtype=np.float32)[..., None]
+
+    def __matmul__(self, other):
+        other = np.asarray(other, dtype=np.float32)
+        scores = np.empty((len(self),) + other.shape[1:], dtype=np.float32)
+
+        for start in range(0, len(self), self.block_rows):
+            stop = start + self.block_rows
+            scores[start:stop] = self.values[start:stop].astype(np.float32) @ other
+
+        if self.scales is not None:
+            scores *= self.scales.reshape((-1,) + (1,) * (other.ndim - 1))
+        return scores
+
+    # ---------------------------------------------------
+    # Persistence
+    # ---------------------------------------------------
+    @staticmethod
+    def _scales_path(path):
+        return f"{os.path.splitext(path)[0]}.scales.npy"
+
+    def save(self, path):
+        """Write the values to ``path`` (.npy) and, for int8, the row scales next to it"""
+        try:
+            np.save(path, self.values)
+            if self.scales is not None:
+                np.save(self._scales_path(path), self.scales)
+            logger.info(f"{self.precision} embeddings saved -> {path}")
+        except Exception as e:
+            logger.error(f"Failed to save quantized embeddings: {e}")
+            raise CustomException("Failed to save quantized embeddings", e)
+
+    @classmethod
+    def load(cls, path, mmap_mode="r"):
+        try:
+            values = np.load(path, mmap_mode=mmap_mode)
+            scales = np.load(cls._scales_path(path), mmap_mode=mmap_mode) if values.dtype == np.int8 else None
+            logger.info(f"Quantized embeddings loaded from {path}")
+            return cls(values, scales)
+        except Exception as e:
+            logger.error(f"Failed to load quantized embeddings: {e}")
+            raise CustomException("Failed to load quantized embeddings", e)
+
+
+def topk_overlap_report(weights, quantized, k=10, n_queries=1000, seed=42):
+    """
+    Compare top-k neighbours found on ``quantized`` against full-precision ``weights``.
+
+    Both searches use the full-precision query row, so the report isolates the
+    effect of the compact matrix. Returns mean overlap@k, memory and per-query latency.
+    """
+    weights = np.asarray(weights, dtype=np.float32)
+    rng = np.random.default_rng(seed)
+    queries = rng.choice(len(weights), size=min(n_queries, len(weights)), replace=False)
+
+    overlap, exact_s, quantized_s = 0, 0.0, 0.0
+    for q in queries:
+        query = weights[q]
+
+        start = time.perf_counter()
+        exact = top_k(weights @ query, k)
+        exact_s += time.perf_counter() - start
+
+        start = time.perf_counter()
+        approx = top_k(quantized @ query, k)
+        quantized_s += time.perf_counter() - start
+
+        overlap += len(np.intersect1d(exact, approx))
+
+    return {
+        "precision": quantized.precision,
+        "k": k,
+        "overlap": overlap / (len(queries) * min(k, len(weights))),
+        "float32_bytes": weights.nbytes,
+        "quantized_bytes": quantized.nbytes,
+        "float32_ms": exact_s / len(queries) * 1e3,
+        "quantized_ms": quantized_s / len(queries) * 1e3,
+    }
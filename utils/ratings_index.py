@@ -0,0 +1,103 @@
+import numpy as np
+from src.logger import get_logger
+from src.custom_exception import CustomException
+from utils.csr import take_rows, replace_rows
+
+logger = get_logger(__name__)
+
+
+class UserRatingsIndex:
+    """
+    Ratings laid out contiguously per user (CSR layout).
+
+    Row ``u`` of the index is the encoded user ``u``; its ratings live in
+    ``anime_ids[indptr[u]:indptr[u + 1]]`` and ``ratings[indptr[u]:indptr[u + 1]]``,
+    so fetching one user's history is a constant-time slice.
+    """
+
+    def __init__(self, indptr, anime_ids, ratings):
+        self.indptr = indptr
+        self.anime_ids = anime_ids
+        self.ratings = ratings
+
+    @property
+    def n_users(self):
+        return len(self.indptr) - 1
+
+    @classmethod
+    def from_ratings(cls, user_codes, anime_ids, ratings, n_users=None):
+        """Build the index from parallel arrays of encoded users, anime ids and ratings"""
+        try:
+            user_codes = np.asarray(user_codes, dtype=np.int64)
+            if n_users is None:
+                n_users = int(user_codes.max()) + 1 if len(user_codes) else 0
+
+            order = np.argsort(user_codes, kind="stable")
+            counts = np.bincount(user_codes, minlength=n_users)
+
+            indptr = np.zeros(n_users + 1, dtype=np.int64)
+            np.cumsum(counts, out=indptr[1:])
+
+            return cls(
+                indptr=indptr,
+                anime_ids=np.asarray(anime_ids, dtype=np.int32)[order],
+                ratings=np.asarray(ratings, dtype=np.float32)[order],
+            )
+        except Exception as e:
+            logger.error(f"Failed to build user ratings index: {e}")
+            raise CustomException("Failed to build user ratings index", e)
+
+    def update(self, user_codes, anime_ids, ratings, n_users):
+        """
+        Return the index with new ratings appended after each user's existing ones, as
+        from_ratings over the old rows followed by the new ones would lay them out.
+        Only the rows of the users in ``user_codes`` are rebuilt.
+        """
+        try:
+            user_codes = np.asarray(user_codes, dtype=np.int64)
+            users = np.unique(user_codes)
+            # New users have no earlier ratings
+            grown = np.concatenate([self.indptr, np.full(max(n_users - self.n_users, 0), self.indptr[-1])])
+            old_indptr, old_positions = take_rows(grown, users)
+
+            merged = UserRatingsIndex.from_ratings(
+                np.concatenate([np.repeat(np.arange(len(users)), np.diff(old_indptr)),
+                                np.searchsorted(users, user_codes)]),
+                np.concatenate([self.anime_ids[old_positions], np.asarray(anime_ids, dtype=np.int32)]),
+                np.concatenate([self.ratings[old_positions], np.asarray(ratings, dtype=np.float32)]),
+                n_users=len(users)
+            )
+
+            indptr, positions = replace_rows(self.indptr, users, merged.indptr, n_users)
+            return UserRatingsIndex(
+                indptr=indptr,
+                anime_ids=np.concatenate([self.anime_ids, merged.anime_ids])[positions],
+                ratings=np.concatenate([self.ratings, merged.ratings])[positions],
+            )
+        except Exception as e:
+            logger.error(f"Failed to update user ratings index: {e}")
+            raise CustomException("Failed to update user ratings index", e)
+
+    def get(self, user_code):
+        """Return the (anime_ids, ratings) of an encoded user"""
+        start, end = self.indptr[user_code], self.indptr[user_code + 1]
+        return self.anime_ids[start:end], self.ratings[start:end]
+
+    def save(self, path):
+        try:
+            np.savez(path, indptr=self.indptr, anime_ids=self.anime_ids, ratings=self.ratings)
+            logger.info(f"User ratings index saved -> {path}")
+        except Exception as e:
+            logger.error(f"Failed to save user ratings index: {e}")
+            raise CustomException("Failed to save user ratings index", e)
+
+    @classmethod
+    def load(cls, path):
+        try:
+            with np.load(path) as data:
+                index = cls(indptr=data["indptr"], anime_ids=data["anime_ids"], ratings=data["ratings"])
+            logger.info(f"User ratings index loaded from {path}")
+            return index
+        except Exception as e:
+            logger.error(f"Failed to load user ratings index: {e}")
+            raise CustomException("Failed to load user ratings index", e)
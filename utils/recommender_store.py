@@ -0,0 +1,245 @@
+import os
+import threading
+import joblib
+import numpy as np
+from src.logger import get_logger
+from src.custom_exception import CustomException
+from utils.ratings_index import UserRatingsIndex
+from utils.anime_catalog import AnimeCatalog
+from utils.ann_index import IVFIndex
+from utils.neighbour_table import NeighbourTable
+from utils.id_encoder import IdEncoder
+from utils.user_preferences import UserPreferenceIndex
+from utils.top_rated import TopRatedMatrix, recommendable_anime_ids
+from utils.common_function import load_data
+from utils.quantization import QuantizedEmbeddings
+from utils.sharded_search import ShardedSearch, mapped_files
+from config.path_config import *
+
+logger = get_logger(__name__)
+
+# Precision of the embeddings used for serving: float32, float16 or int8
+EMBEDDING_PRECISION = os.environ.get("EMBEDDING_PRECISION", "float32")
+
+# Row shards of user_weights scored in parallel by exact user searches; 0 or 1 searches on one core
+SEARCH_SHARDS = int(os.environ.get("SEARCH_SHARDS", 0))
+
+
+class RecommenderStore:
+    """
+    In-memory snapshot of every artifact the serving helpers need.
+
+    A store is loaded once and never mutated afterwards; reloading builds a
+    fresh store and swaps the process-wide reference, so a request that holds
+    a store keeps a consistent view even while new artifacts are loaded.
+    """
+
+    def __init__(self, rating_df_path=RATING_DF, user_ratings_index_path=USER_RATINGS_INDEX,
+                 user_preferences_path=USER_PREFERENCES_INDEX, top_rated_matrix_path=TOP_RATED_MATRIX, anime_df_path=DF, synopsis_df_path=SYNOPSIS_DF, anime_metadata_path=ANIME_METADATA,
+                 user_weights_path=USER_WEIGHTS_PATH, anime_weights_path=ANIME_WEIGHTS_PATH,
+                 user_weights_npy=USER_WEIGHTS_NPY, anime_weights_npy=ANIME_WEIGHTS_NPY,
+                 user_encoder_path=USER_ENCODER, anime_encoder_path=ANIME_ENCODER,
+                 user2user_decoded_path=USER2USER_DECODED, anime2anime_decoded_path=ANIME2ANIME_DECODED,
+                 user_ann_index_path=USER_ANN_INDEX_PATH, anime_ann_index_path=ANIME_ANN_INDEX_PATH,
+                 use_ann=True, ann_n_probe=None,
+                 user_neighbours_path=USER_NEIGHBOURS_PATH, anime_neighbours_path=ANIME_NEIGHBOURS_PATH,
+                 embedding_precision=EMBEDDING_PRECISION, search_shards=SEARCH_SHARDS):
+        self.rating_df_path = rating_df_path
+        self.user_ratings_index_path = user_ratings_index_path
+        self.user_preferences_path = user_preferences_path
+        self.top_rated_matrix_path = top_rated_matrix_path
+        self.anime_df_path = anime_df_path
+        self.synopsis_df_path = synopsis_df_path
+        self.anime_metadata_path = anime_metadata_path
+        self.user_weights_path = user_weights_path
+        self.anime_weights_path = anime_weights_path
+        self.user_weights_npy = user_weights_npy
+        self.anime_weights_npy = anime_weights_npy
+        self.user_encoder_path = user_encoder_path
+        self.anime_encoder_path = anime_encoder_path
+        self.user2user_decoded_path = user2user_decoded_path
+        self.anime2anime_decoded_path = anime2anime_decoded_path
+        self.user_ann_index_path = user_ann_index_path
+        self.anime_ann_index_path = anime_ann_index_path
+        self.use_ann = use_ann
+        self.ann_n_probe = ann_n_probe
+        self.user_neighbours_path = user_neighbours_path
+        self.anime_neighbours_path = anime_neighbours_path
+        self.embedding_precision = embedding_precision
+        self.search_shards = search_shards
+
+        self.load()
+
+    def load(self):
+        """Read every serving artifact from disk"""
+        try:
+            self.anime_df = load_data(self.anime_df_path)
+            self.anime_catalog = self._load_anime_catalog()
+            logger.info("Loaded anime DataFrame and metadata catalog.")
+
+            self.user_weights = self._load_weights(
+                self.user_weights_npy, self.user_weights_path,
+                {"float16": USER_WEIGHTS_FLOAT16, "int8": USER_WEIGHTS_INT8}
+            )
+            self.anime_weights = self._load_weights(
+                self.anime_weights_npy, self.anime_weights_path,
+                {"float16": ANIME_WEIGHTS_FLOAT16, "int8": ANIME_WEIGHTS_INT8}
+            )
+            logger.info(f"Loaded user and anime weights ({self.embedding_precision}).")
+
+            self.user_search = self._load_sharded_search(self.user_weights)
+
+            self.user_encoder = self._load_encoder(self.user_encoder_path, self.user2user_decoded_path)
+            self.anime_encoder = self._load_encoder(self.anime_encoder_path, self.anime2anime_decoded_path)
+            logger.info("Loaded user and anime encodings.")
+
+            self.user_ratings_index = self._load_user_ratings_index()
+            self.user_preferences = self._load_user_preferences()
+            self.top_rated = self._load_top_rated_matrix()
+
+            self.user_ann_index = self._load_ann_index(self.user_ann_index_path)
+            self.anime_ann_index = self._load_ann_index(self.anime_ann_index_path)
+
+            self.user_neighbours = self._load_neighbour_table(self.user_neighbours_path)
+            self.anime_neighbours = self._load_neighbour_table(self.anime_neighbours_path)
+        except Exception as e:
+            logger.error(f"Failed to load recommender artifacts: {e}")
+            raise CustomException("Failed to load recommender artifacts", e)
+
+    def _load_weights(self, npy_path, pkl_path, quantized_paths):
+        """
+        Memory-map the .npy weights when present: every process opening the file
+        shares the same page-cached copy. Older artifacts fall back to the pickle.
+        A float16/int8 precision serves the quantized export when it exists.
+        """
+        quantized_path = quantized_paths.get(self.embedding_precision)
+        if quantized_path is not None:
+            if os.path.exists(quantized_path):
+                if self.embedding_precision == "float16":
+                    logger.warning("float16 weights halve memory but score several times slower than "
+                                   "float32; use int8 for both smaller and fast scoring.")
+                return QuantizedEmbeddings.load(quantized_path)
+            logger.warning(f"{quantized_path} not found, serving float32 weights.")
+
+        if os.path.exists(npy_path):
+            return np.load(npy_path, mmap_mode="r")
+        return joblib.load(pkl_path)
+
+    def _load_sharded_search(self, weights):
+        """
+        Search the weights with a pool of shard workers when more than one shard is
+        configured. The workers map the same .npy files, so weights loaded from the
+        pickle fallback are searched in-process instead.
+        """
+        if self.search_shards <= 1:
+            return None
+        if mapped_files(weights) is None:
+            logger.warning("Sharded search needs .npy weights, searching in-process.")
+            return None
+        return ShardedSearch(weights, n_shards=self.search_shards,
+                             workers=min(self.search_shards, os.cpu_count()))
+
+    def _load_encoder(self, path, decoded_path):
+        """Load an id encoder, converting the pickled decode dict of older artifacts"""
+        if os.path.exists(path):
+            return IdEncoder.load(path)
+        return IdEncoder.from_decoded(joblib.load(decoded_path))
+
+    def _load_user_ratings_index(self):
+        """Load the per-user ratings index, rebuilding it from rating_df for older artifacts"""
+        if os.path.exists(self.user_ratings_index_path):
+            return UserRatingsIndex.load(self.user_ratings_index_path)
+
+        logger.info(f"{self.user_ratings_index_path} not found, building index from {self.rating_df_path}")
+        rating_df = load_data(self.rating_df_path, columns=["user_id", "anime_id", "rating"])
+        user_codes = self.user_encoder.encode(rating_df["user_id"].values)
+        return UserRatingsIndex.from_ratings(
+            user_codes, rating_df["anime_id"].values, rating_df["rating"].values,
+            n_users=len(self.user_encoder)
+        )
+
+    def _load_user_preferences(self):
+        """Load the users' top-rated animes, rebuilding them from the ratings index for older artifacts"""
+        if os.path.exists(self.user_preferences_path):
+            return UserPreferenceIndex.load(self.user_preferences_path)
+
+        logger.info(f"{self.user_preferences_path} not found, building it from the ratings index")
+        return UserPreferenceIndex.build(self.user_ratings_index)
+
+    def _load_top_rated_matrix(self):
+        """Load the users' top-rated matrix, rebuilding it from the preferences for older artifacts"""
+        if os.path.exists(self.top_rated_matrix_path):
+            return TopRatedMatrix.load(self.top_rated_matrix_path)
+
+        logger.info(f"{self.top_rated_matrix_path} not found, building it from the user preferences")
+        return TopRatedMatrix.build(
+            self.user_preferences, self.anime_encoder, recommendable_anime_ids(self.anime_df)
+        )
+
+    def _load_anime_catalog(self):
+        """Load the anime metadata catalog, rebuilding it from the CSVs for older artifacts"""
+        if os.path.exists(self.anime_metadata_path):
+            return AnimeCatalog.load(self.anime_metadata_path)
+
+        logger.info(f"{self.anime_metadata_path} not found, building catalog from {self.synopsis_df_path}")
+        synopsis_df = load_data(self.synopsis_df_path, columns=["MAL_ID", "sypnopsis"])
+        return AnimeCatalog.from_frames(self.anime_df, synopsis_df)
+
+    def _load_ann_index(self, path):
+        """Load an optional IVF index; None falls back to exact search"""
+        if not self.use_ann or not os.path.exists(path):
+            return None
+        return IVFIndex.load(path, n_probe=self.ann_n_probe)
+
+    def _load_neighbour_table(self, path):
+        """Load an optional precomputed neighbour table; None falls back to searching"""
+        if not os.path.exists(path):
+            return None
+        return NeighbourTable.load(path)
+
+    def user_ratings(self, user_id):
+        """Return the (anime_ids, ratings) of a raw user id, or None for unknown users"""
+        user_code = self.user_encoder.get(user_id)
+        if user_code is None:
+            return None
+        return self.user_ratings_index.get(user_code)
+
+    def user_top_rated(self, user_id):
+        """Return the top-rated anime ids of a raw user id (best first), or None for unknown users"""
+        user_code = self.user_encoder.get(user_id)
+        if user_code is None:
+            return None
+        return self.user_preferences.get(user_code)
+
+
+_store = None
+_store_lock = threading.Lock()
+_reload_listeners = []
+
+
+def get_store():
+    """Return the process-wide store, loading it on first use"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = RecommenderStore()
+    return _store
+
+
+def add_reload_listener(callback):
+    """Call ``callback(store)`` after every reload, e.g. to invalidate derived caches"""
+    _reload_listeners.append(callback)
+
+
+def reload_store():
+    """Load fresh artifacts from disk and make them the process-wide store"""
+    global _store
+    store = RecommenderStore()
+    with _store_lock:
+        _store = store
+    logger.info("Recommender store reloaded.")
+
+    for callback in _reload_listeners:
+        callback(store)
+    return store
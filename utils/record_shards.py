@@ -0,0 +1,56 @@
+import glob
+import os
+import numpy as np
+from src.logger import get_logger
+from src.custom_exception import CustomException
+
+logger = get_logger(__name__)
+
+# One training example: encoded user, encoded anime, scaled rating (12 bytes, little-endian)
+RECORD_DTYPE = np.dtype([("user", "<i4"), ("anime", "<i4"), ("rating", "<f4")])
+RECORD_BYTES = RECORD_DTYPE.itemsize
+
+ROWS_PER_SHARD = 1_000_000
+
+
+def write_record_shards(users, animes, ratings, output_dir, rows_per_shard=ROWS_PER_SHARD, prefix="part"):
+    """
+    Write parallel (user, anime, rating) arrays as fixed-length binary records split
+    over ``<prefix>-XXXXX.bin`` shards, replacing any shards of ``output_dir`` whose
+    names start with ``prefix``. The default prefix replaces every shard; a longer
+    one (e.g. ``part-delta...``) adds shards next to the existing ones.
+    """
+    try:
+        os.makedirs(output_dir, exist_ok=True)
+        for stale in glob.glob(os.path.join(output_dir, f"{prefix}-*.bin")):
+            os.remove(stale)
+
+        paths = []
+        for shard, start in enumerate(range(0, len(users), rows_per_shard)):
+            stop = start + rows_per_shard
+            records = np.empty(len(users[start:stop]), dtype=RECORD_DTYPE)
+            records["user"] = users[start:stop]
+            records["anime"] = animes[start:stop]
+            records["rating"] = ratings[start:stop]
+
+            path = os.path.join(output_dir, f"{prefix}-{shard:05d}.bin")
+            records.tofile(path)
+            paths.append(path)
+
+        logger.info(f"Wrote {len(users)} records in {len(paths)} shards -> {output_dir}")
+        return paths
+    except Exception as e:
+        logger.error(f"Failed to write record shards: {e}")
+        raise CustomException("Failed to write record shards", e)
+
+
+def list_record_shards(shard_dir):
+    return sorted(glob.glob(os.path.join(shard_dir, "part-*.bin")))
+
+
+def read_record_shards(shard_dir):
+    """Read every shard of a directory back as one structured array (for inspection)"""
+    paths = list_record_shards(shard_dir)
+    if not paths:
+        return np.empty(0, dtype=RECORD_DTYPE)
+    return np.concatenate([np.fromfile(path, dtype=RECORD_DTYPE) for path in paths])
@@ -0,0 +1,44 @@
+import math
+
+# Scoring parameters of the plain recommendation lists kept in Postgres (keyed by user_id only)
+DEFAULT_SCORING_PARAMS = {"user_weight": 0.5, "content_weight": 0.5, "top_n": 10}
+
+
+def scoring_params(source):
+    """
+    Read user_weight, content_weight and top_n from a request mapping, with the defaults.
+    Raises ValueError unless the weights are finite and top_n is positive.
+    """
+    params = {
+        "user_weight": float(source.get("user_weight", DEFAULT_SCORING_PARAMS["user_weight"])),
+        "content_weight": float(source.get("content_weight", DEFAULT_SCORING_PARAMS["content_weight"])),
+        "top_n": int(source.get("top_n", DEFAULT_SCORING_PARAMS["top_n"])),
+    }
+    if not (math.isfinite(params["user_weight"]) and math.isfinite(params["content_weight"])):
+        raise ValueError("user_weight and content_weight must be finite numbers")
+    if params["top_n"] <= 0:
+        raise ValueError("top_n must be a positive integer")
+    return params
+
+
+def is_default_scoring(user_weight, content_weight, top_n):
+    """True when the parameters are the defaults, the only ones Postgres rows may be served for"""
+    return {"user_weight": user_weight, "content_weight": content_weight, "top_n": top_n} == DEFAULT_SCORING_PARAMS
+
+
+def serialize_recommendations(recommendations):
+    """Scores plus provenance: which recommenders contributed to each anime"""
+    return [
+        {
+            "anime_name": recommendation["anime_name"],
+            "score": float(recommendation["score"]),
+            "user_score": float(recommendation["user_score"]),
+            "content_score": float(recommendation["content_score"]),
+            "sources": [
+                source for source, score in (("collaborative", recommendation["user_score"]),
+                                             ("content", recommendation["content_score"]))
+                if score
+            ],
+        }
+        for recommendation in recommendations
+    ]
@@ -0,0 +1,169 @@
+import os
+import threading
+import weakref
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from src.logger import get_logger
+from src.custom_exception import CustomException
+from utils.quantization import QuantizedEmbeddings
+from utils.similarity import top_k
+
+logger = get_logger(__name__)
+
+
+# ---------------------------------------------------
+# Worker side
+# ---------------------------------------------------
+_worker_arrays = {}
+
+
+def _attach(paths):
+    """Memory-map the weight files into a worker process once, when the pool starts it"""
+    for key, path in paths.items():
+        _worker_arrays[key] = np.load(path, mmap_mode="r")
+
+
+def _search_shard(start, stop, queries, k, neg):
+    """Top-k of rows [start, stop) against every query, as global row ids"""
+    values = _worker_arrays["values"][start:stop]
+    scales = _worker_arrays.get("scales")
+    shard = values if values.dtype == np.float32 else QuantizedEmbeddings(
+        values, None if scales is None else scales[start:stop]
+    )
+
+    dists = (shard @ queries.T).T
+    closest = top_k(dists, k, neg=neg)
+    return closest + start, np.take_along_axis(dists, closest, axis=1)
+
+
+# ---------------------------------------------------
+# Parent side
+# ---------------------------------------------------
+def mapped_files(weights):
+    """
+    The .npy files behind memory-mapped ``weights`` (float32 or QuantizedEmbeddings),
+    keyed like the worker arrays; None when any part is held in memory only.
+    """
+    arrays = {"values": weights.values, "scales": weights.scales} if isinstance(weights, QuantizedEmbeddings) \
+        else {"values": weights}
+    paths = {}
+    for key, array in arrays.items():
+        if array is None:
+            continue
+        if not isinstance(array, np.memmap) or array.filename is None:
+            return None
+        paths[key] = array.filename
+    return paths
+
+
+def _release(state):
+    """Stop the pool, only in the process that started it"""
+    if state.get("pid") != os.getpid():
+        return
+    state["executor"].shutdown(wait=False)
+    state.clear()
+
+
+class ShardedSearch:
+    """
+    Exact top-k search over an embedding matrix split into ``n_shards`` row shards.
+
+    The matrix must be memory-mapped from .npy files (see ``mapped_files``): a process
+    pool maps the same files on start-up, so every worker reads the one page-cached
+    copy the serving processes already share, and scores the shards in parallel,
+    each keeping its own top-k. The per-shard winners are merged into the global
+    top-k. Float32 and QuantizedEmbeddings matrices are supported.
+
+    The pool is started on the first search in each process, so a copy inherited
+    through fork (e.g. a gunicorn worker forked from a preloading master) starts
+    its own and never shuts down its parent's. Pool workers are spawned rather
+    than forked, which is safe from a threaded server process.
+    """
+
+    def __init__(self, weights, n_shards=None, workers=None, max_block_bytes=256 << 20):
+        try:
+            self._paths = mapped_files(weights)
+            if self._paths is None:
+                raise ValueError("sharded search needs weights memory-mapped from .npy files")
+
+            self.n_rows, self.dim = weights.shape
+            self.workers = workers or os.cpu_count()
+            self.n_shards = max(1, min(n_shards or self.workers, self.n_rows))
+            self.max_block_bytes = max_block_bytes
+            bounds = np.linspace(0, self.n_rows, self.n_shards + 1).astype(np.int64)
+            self.shards = list(zip(bounds[:-1].tolist(), bounds[1:].tolist()))
+
+            # Per-process pool; "pid" names the process that started it
+            self._state = {}
+            self._lock = threading.Lock()
+            self._finalizer = weakref.finalize(self, _release, self._state)
+            logger.info(f"Sharded search ready: {self.n_rows} rows in {self.n_shards} shards, {self.workers} workers.")
+        except Exception as e:
+            logger.error(f"Failed to build sharded search: {e}")
+            raise CustomException("Failed to build sharded search", e)
+
+    def __len__(self):
+        return self.n_rows
+
+    def start(self):
+        """Start the pool for the current process, if not done yet"""
+        self._pool()
+
+    def _pool(self):
+        """The pool of the current process, started on first use"""
+        pid = os.getpid()
+        if self._state.get("pid") != pid:
+            with self._lock:
+                if self._state.get("pid") != pid:
+                    # A pool inherited from a parent process is not ours to use or stop
+                    self._state.clear()
+                    executor = ProcessPoolExecutor(
+                        max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"),
+                        initializer=_attach, initargs=(self._paths,)
+                    )
+                    self._state.update(pid=pid, executor=executor)
+        return self._state["executor"]
+
+    def search(self, queries, k, neg=False):
+        """
+        Return (ids, scores) of the ``k`` best rows for each query, best first
+        (lowest scores first with ``neg=True``). A single query of shape (d,)
+        yields 1-D results, a (m, d) batch one row per query.
+        """
+        queries = np.asarray(queries, dtype=np.float32)
+        single = queries.ndim == 1
+        queries = np.atleast_2d(queries)
+        k = min(k, self.n_rows)
+
+        # Bound the (query block x shard) score matrix every worker materialises
+        shard_rows = max(stop - start for start, stop in self.shards)
+        block = max(1, self.max_block_bytes // (4 * shard_rows))
+
+        ids = np.empty((len(queries), k), dtype=np.int64)
+        scores = np.empty((len(queries), k), dtype=np.float32)
+        pool = self._pool()
+
+        for q in range(0, len(queries), block):
+            query_block = queries[q:q + block]
+            futures = [pool.submit(_search_shard, start, stop, query_block, k, neg) for start, stop in self.shards]
+            results = [future.result() for future in futures]
+
+            # Merge: the global top-k is among the per-shard winners
+            shard_ids = np.concatenate([shard_ids for shard_ids, _ in results], axis=1)
+            shard_scores = np.concatenate([shard_scores for _, shard_scores in results], axis=1)
+            best = top_k(shard_scores, k, neg=neg)
+            ids[q:q + block] = np.take_along_axis(shard_ids, best, axis=1)
+            scores[q:q + block] = np.take_along_axis(shard_scores, best, axis=1)
+
+        return (ids[0], scores[0]) if single else (ids, scores)
+
+    def close(self):
+        """Stop this process's worker pool"""
+        self._finalizer()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
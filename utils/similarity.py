@@ -0,0 +1,50 @@
+import numpy as np
+
+
+def top_k(scores, k, neg=False):
+    """
+    Return the indices of the ``k`` highest scores (lowest with ``neg=True``), best first.
+
+    Uses ``argpartition`` to select the winners in O(N) and only sorts those ``k``,
+    instead of a full O(N log N) ``argsort``. A 2-D ``scores`` array is handled
+    row by row and yields one row of indices per input row.
+    """
+    scores = np.asarray(scores)
+    n = scores.shape[-1]
+    k = max(min(k, n), 0)
+    if k == 0:
+        return np.empty(scores.shape[:-1] + (0,), dtype=np.intp)
+
+    keys = scores if neg else -scores
+    if k < n:
+        candidates = np.argpartition(keys, k - 1, axis=-1)[..., :k]
+    else:
+        candidates = np.broadcast_to(np.arange(n), keys.shape).copy()
+
+    order = np.argsort(np.take_along_axis(keys, candidates, axis=-1), axis=-1, kind="stable")
+    return np.take_along_axis(candidates, order, axis=-1)
+
+
+def block_top_k(queries, weights, k, max_block_bytes=256 << 20):
+    """
+    Return (ids, scores) of the ``k`` rows of ``weights`` with the highest dot product
+    against every row of ``queries``, best first.
+
+    Scores are computed in blocks of query rows so that the materialised
+    (block x len(weights)) score matrix stays under ``max_block_bytes``. ``weights``
+    may be any matrix-like supporting ``weights @ x``, e.g. QuantizedEmbeddings.
+    """
+    n = len(weights)
+    k = min(k, n)
+    block = max(1, max_block_bytes // (4 * max(n, 1)))
+
+    ids = np.empty((len(queries), k), dtype=np.int64)
+    scores = np.empty((len(queries), k), dtype=np.float32)
+
+    for start in range(0, len(queries), block):
+        dists = (weights @ queries[start:start + block].T).T
+        closest = top_k(dists, k)
+        ids[start:start + block] = closest
+        scores[start:start + block] = np.take_along_axis(dists, closest, axis=1)
+
+    return ids, scores
@@ -0,0 +1,28 @@
+import asyncio
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key onto one in-flight computation.
+
+    The first caller for a key starts the computation; callers arriving while it
+    runs await the same task and get the same result (or exception). Once it
+    finishes the key is forgotten, so later calls compute afresh.
+    """
+
+    def __init__(self):
+        self._inflight = {}
+
+    def __len__(self):
+        return len(self._inflight)
+
+    async def do(self, key, fn):
+        """Return ``await fn()``, sharing one call among concurrent callers with the same key"""
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+
+        # Shield so that one cancelled caller does not cancel the shared computation
+        return await asyncio.shield(task)
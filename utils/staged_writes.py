@@ -0,0 +1,86 @@
+import json
+import os
+import shutil
+from src.logger import get_logger
+from src.custom_exception import CustomException
+
+logger = get_logger(__name__)
+
+MANIFEST = "manifest.json"
+
+
+class StagedWrites:
+    """
+    Replace a set of artifacts all together.
+
+    Every artifact is first written to the path ``stage(final_path)`` hands out, inside
+    ``staging_dir``. ``commit()`` then records the planned moves in a manifest and
+    renames each staged file over its final path, in the order they were staged (so
+    the file that marks a run as done should be staged last).
+
+    A crash before the manifest is written leaves every artifact as it was, and
+    ``recover()`` discards the partial staging; a crash after it is rolled forward
+    by ``recover()``, which finishes the remaining moves.
+    """
+
+    def __init__(self, staging_dir):
+        self.staging_dir = staging_dir
+        self.moves = []
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        os.makedirs(staging_dir)
+
+    def stage(self, final_path):
+        """Path to write the new version of ``final_path`` to (keeps its extension)"""
+        staged = os.path.join(self.staging_dir, f"{len(self.moves):05d}-{os.path.basename(final_path)}")
+        self.moves.append((staged, final_path))
+        return staged
+
+    def add(self, staged_path, final_path):
+        """Register a file already written inside the staging directory"""
+        self.moves.append((staged_path, final_path))
+
+    def commit(self):
+        try:
+            missing = [staged for staged, _ in self.moves if not os.path.exists(staged)]
+            if missing:
+                raise FileNotFoundError(f"Staged files were never written: {missing}")
+
+            tmp_path = os.path.join(self.staging_dir, f"{MANIFEST}.tmp")
+            with open(tmp_path, "w") as f:
+                json.dump(self.moves, f)
+            os.replace(tmp_path, os.path.join(self.staging_dir, MANIFEST))
+
+            self._apply(self.staging_dir, self.moves)
+            logger.info(f"Committed {len(self.moves)} staged artifacts.")
+        except Exception as e:
+            logger.error(f"Failed to commit staged artifacts: {e}")
+            raise CustomException("Failed to commit staged artifacts", e)
+
+    @staticmethod
+    def _apply(staging_dir, moves):
+        for staged, final_path in moves:
+            # Already moved by an interrupted commit
+            if os.path.exists(staged):
+                os.makedirs(os.path.dirname(final_path) or ".", exist_ok=True)
+                os.replace(staged, final_path)
+        shutil.rmtree(staging_dir)
+
+    @classmethod
+    def recover(cls, staging_dir):
+        """Finish a commit that was interrupted, or drop writes that were never committed"""
+        try:
+            if not os.path.isdir(staging_dir):
+                return
+
+            manifest = os.path.join(staging_dir, MANIFEST)
+            if os.path.exists(manifest):
+                with open(manifest, "r") as f:
+                    moves = json.load(f)
+                cls._apply(staging_dir, moves)
+                logger.info(f"Finished an interrupted commit of {len(moves)} artifacts.")
+            else:
+                shutil.rmtree(staging_dir)
+                logger.info(f"Discarded uncommitted artifacts in {staging_dir}.")
+        except Exception as e:
+            logger.error(f"Failed to recover staged artifacts: {e}")
+            raise CustomException("Failed to recover staged artifacts", e)
@@ -0,0 +1,137 @@
+import numpy as np
+from src.logger import get_logger
+from src.custom_exception import CustomException
+from utils.csr import take_rows, replace_rows
+from utils.user_preferences import UserPreferenceIndex
+
+logger = get_logger(__name__)
+
+
+def recommendable_anime_ids(anime_df):
+    """Ids of the named animes of the processed anime table, in table order"""
+    named = anime_df[anime_df["eng_version"].notna()].drop_duplicates(subset="anime_id")
+    return named["anime_id"].values
+
+
+class TopRatedMatrix:
+    """
+    Sparse user x anime matrix of each user's top-rated animes (CSR layout).
+
+    Row ``u`` is the encoded user ``u``; ``indices[indptr[u]:indptr[u + 1]]`` holds the
+    encoded ids of the animes rated at or above the user's 75th percentile, ordered
+    like the processed anime table (highest Score first). Only animes with a name in
+    that table are kept, since nothing else can be recommended.
+    """
+
+    def __init__(self, indptr, indices, n_animes):
+        self.indptr = indptr
+        self.indices = indices
+        self.n_animes = int(n_animes)
+
+    @property
+    def n_users(self):
+        return len(self.indptr) - 1
+
+    @classmethod
+    def build(cls, user_preferences, anime_encoder, ranked_anime_ids):
+        """
+        Build from the per-user top-rated animes of a UserPreferenceIndex.
+        ``ranked_anime_ids`` lists the recommendable anime ids in the order rows
+        should be kept in.
+        """
+        try:
+            n_animes = len(anime_encoder)
+            rank = np.full(n_animes, -1, dtype=np.int64)
+            ranked_codes = anime_encoder.encode(ranked_anime_ids)
+            known = ranked_codes >= 0
+            rank[ranked_codes[known]] = np.arange(len(ranked_codes))[known]
+
+            n_users = user_preferences.n_users
+            users = np.repeat(np.arange(n_users), np.diff(user_preferences.indptr))
+            codes = anime_encoder.encode(user_preferences.anime_ids)
+
+            keep = (codes >= 0) & (rank[np.maximum(codes, 0)] >= 0)
+            users, codes = users[keep], codes[keep]
+
+            order = np.lexsort((rank[codes], users))
+            indptr = np.zeros(n_users + 1, dtype=np.int64)
+            np.cumsum(np.bincount(users, minlength=n_users), out=indptr[1:])
+
+            logger.info(f"Top-rated matrix built: {n_users} users, {len(codes)} entries.")
+            return cls(indptr=indptr, indices=codes[order].astype(np.int32), n_animes=n_animes)
+        except Exception as e:
+            logger.error(f"Failed to build top-rated matrix: {e}")
+            raise CustomException("Failed to build top-rated matrix", e)
+
+    def update(self, user_preferences, anime_encoder, ranked_anime_ids, user_codes):
+        """
+        Return the matrix with the rows of ``user_codes`` rebuilt from updated user
+        preferences, grown to their number of users and to the encoder's animes.
+        """
+        try:
+            users = np.unique(np.asarray(user_codes, dtype=np.int64))
+            sub_indptr, positions = take_rows(user_preferences.indptr, users)
+            sub_preferences = UserPreferenceIndex(
+                sub_indptr, user_preferences.anime_ids[positions], user_preferences.thresholds[users]
+            )
+            updated = TopRatedMatrix.build(sub_preferences, anime_encoder, ranked_anime_ids)
+
+            indptr, positions = replace_rows(self.indptr, users, updated.indptr, user_preferences.n_users)
+            return TopRatedMatrix(
+                indptr=indptr,
+                indices=np.concatenate([self.indices, updated.indices])[positions],
+                n_animes=len(anime_encoder),
+            )
+        except Exception as e:
+            logger.error(f"Failed to update top-rated matrix: {e}")
+            raise CustomException("Failed to update top-rated matrix", e)
+
+    def row(self, user_code):
+        return self.indices[self.indptr[user_code]:self.indptr[user_code + 1]]
+
+    def gather(self, user_codes):
+        """Concatenate the rows of ``user_codes``, in the given order"""
+        user_codes = np.asarray(user_codes, dtype=np.int64)
+        starts = self.indptr[user_codes]
+        lengths = self.indptr[user_codes + 1] - starts
+        if lengths.sum() == 0:
+            return np.empty(0, dtype=self.indices.dtype)
+
+        # Position of every gathered entry: its row start plus its offset within the row
+        offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        return self.indices[np.repeat(starts, lengths) + offsets]
+
+    def row_counts(self, user_codes, exclude=None):
+        """
+        Sum the rows of ``user_codes`` and return (anime codes, counts) ordered by
+        count, ties broken by first appearance. Codes in ``exclude`` are masked out.
+        """
+        codes = self.gather(user_codes)
+        if exclude is not None and len(codes):
+            mask = np.zeros(self.n_animes, dtype=bool)
+            mask[np.asarray(exclude, dtype=np.int64)] = True
+            codes = codes[~mask[codes]]
+
+        counts = np.bincount(codes, minlength=self.n_animes)
+        candidates, first_seen = np.unique(codes, return_index=True)
+        order = np.lexsort((first_seen, -counts[candidates]))
+        return candidates[order], counts[candidates[order]]
+
+    def save(self, path):
+        try:
+            np.savez(path, indptr=self.indptr, indices=self.indices, n_animes=self.n_animes)
+            logger.info(f"Top-rated matrix saved -> {path}")
+        except Exception as e:
+            logger.error(f"Failed to save top-rated matrix: {e}")
+            raise CustomException("Failed to save top-rated matrix", e)
+
+    @classmethod
+    def load(cls, path):
+        try:
+            with np.load(path) as data:
+                matrix = cls(indptr=data["indptr"], indices=data["indices"], n_animes=data["n_animes"])
+            logger.info(f"Top-rated matrix loaded from {path}")
+            return matrix
+        except Exception as e:
+            logger.error(f"Failed to load top-rated matrix: {e}")
+            raise CustomException("Failed to load top-rated matrix", e)
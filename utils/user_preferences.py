@@ -0,0 +1,116 @@
+import numpy as np
+from src.logger import get_logger
+from src.custom_exception import CustomException
+from utils.csr import take_rows, replace_rows
+from utils.ratings_index import UserRatingsIndex
+
+logger = get_logger(__name__)
+
+
+class UserPreferenceIndex:
+    """
+    Each user's rating threshold and top-rated animes, computed once offline.
+
+    ``thresholds[u]`` is the 75th percentile of encoded user ``u``'s ratings and
+    ``anime_ids[indptr[u]:indptr[u + 1]]`` the animes rated at or above it, best
+    rated first (ties in rating order), exactly as get_user_preferences used to
+    derive them per request.
+    """
+
+    def __init__(self, indptr, anime_ids, thresholds):
+        self.indptr = indptr
+        self.anime_ids = anime_ids
+        self.thresholds = thresholds
+
+    @property
+    def n_users(self):
+        return len(self.indptr) - 1
+
+    @staticmethod
+    def percentiles(ratings_index, percentile=75):
+        """
+        Per-user percentile of the ratings. Users with the same number of ratings
+        are computed together with one np.percentile call over a 2-D gather, which
+        gives the same values as calling it on each user's slice.
+        """
+        counts = np.diff(ratings_index.indptr)
+        thresholds = np.full(len(counts), np.nan, dtype=np.float64)
+
+        for count in np.unique(counts[counts > 0]):
+            users = np.flatnonzero(counts == count)
+            rows = ratings_index.indptr[users][:, None] + np.arange(count)
+            thresholds[users] = np.percentile(ratings_index.ratings[rows], percentile, axis=1)
+
+        return thresholds
+
+    @classmethod
+    def build(cls, ratings_index, percentile=75):
+        try:
+            thresholds = cls.percentiles(ratings_index, percentile)
+
+            counts = np.diff(ratings_index.indptr)
+            users = np.repeat(np.arange(len(counts)), counts)
+            ratings = ratings_index.ratings
+            top_rated = ratings >= thresholds[users]
+
+            # Within each user: highest rating first, ties kept in rating order
+            order = np.lexsort((-ratings[top_rated], users[top_rated]))
+            indptr = np.zeros(len(counts) + 1, dtype=np.int64)
+            np.cumsum(np.bincount(users[top_rated], minlength=len(counts)), out=indptr[1:])
+
+            index = cls(indptr=indptr, anime_ids=ratings_index.anime_ids[top_rated][order], thresholds=thresholds)
+            logger.info(f"User preference index built for {index.n_users} users.")
+            return index
+        except Exception as e:
+            logger.error(f"Failed to build user preference index: {e}")
+            raise CustomException("Failed to build user preference index", e)
+
+    def update(self, ratings_index, user_codes):
+        """
+        Return the index with the entries of ``user_codes`` recomputed from an updated
+        ratings index, grown to its number of users; other users are kept as they are.
+        """
+        try:
+            users = np.unique(np.asarray(user_codes, dtype=np.int64))
+            sub_indptr, positions = take_rows(ratings_index.indptr, users)
+            sub_ratings = UserRatingsIndex(sub_indptr, ratings_index.anime_ids[positions], ratings_index.ratings[positions])
+            updated = UserPreferenceIndex.build(sub_ratings)
+
+            n_users = ratings_index.n_users
+            indptr, positions = replace_rows(self.indptr, users, updated.indptr, n_users)
+
+            thresholds = np.full(n_users, np.nan, dtype=np.float64)
+            thresholds[:len(self.thresholds)] = self.thresholds
+            thresholds[users] = updated.thresholds
+
+            return UserPreferenceIndex(
+                indptr=indptr,
+                anime_ids=np.concatenate([self.anime_ids, updated.anime_ids])[positions],
+                thresholds=thresholds,
+            )
+        except Exception as e:
+            logger.error(f"Failed to update user preference index: {e}")
+            raise CustomException("Failed to update user preference index", e)
+
+    def get(self, user_code):
+        """Return the top-rated anime ids of an encoded user, best rated first"""
+        return self.anime_ids[self.indptr[user_code]:self.indptr[user_code + 1]]
+
+    def save(self, path):
+        try:
+            np.savez(path, indptr=self.indptr, anime_ids=self.anime_ids, thresholds=self.thresholds)
+            logger.info(f"User preference index saved -> {path}")
+        except Exception as e:
+            logger.error(f"Failed to save user preference index: {e}")
+            raise CustomException("Failed to save user preference index", e)
+
+    @classmethod
+    def load(cls, path):
+        try:
+            with np.load(path) as data:
+                index = cls(indptr=data["indptr"], anime_ids=data["anime_ids"], thresholds=data["thresholds"])
+            logger.info(f"User preference index loaded from {path}")
+            return index
+        except Exception as e:
+            logger.error(f"Failed to load user preference index: {e}")
+            raise CustomException("Failed to load user preference index", e)
@@ -0,0 +1,121 @@
+import atexit
+import queue
+import threading
+import time
+from datetime import datetime
+from src.logger import get_logger
+from utils.db_utils import save_recommendations_batch_to_db, save_recommendations_to_db
+
+logger = get_logger(__name__)
+
+
+class RecommendationWriter:
+    """
+    Write-behind buffer for recommendation rows.
+
+    ``put`` only enqueues; a background thread flushes the buffer with one
+    multi-row INSERT once ``flush_rows`` rows are pending or ``flush_interval``
+    seconds have passed. The buffer holds at most ``max_pending`` rows: when it is
+    full, ``put`` blocks up to ``put_timeout`` seconds and then writes the row
+    synchronously, so a slow database pushes back on producers instead of growing
+    memory.
+
+    A batch that fails to flush is retried up to ``max_retries`` times, waiting
+    ``retry_backoff`` seconds and doubling the wait after each failure, before it
+    is dropped. After ``close`` no more rows are accepted.
+    """
+
+    def __init__(self, flush_rows=500, flush_interval=1.0, max_pending=10_000, put_timeout=1.0,
+                 max_retries=3, retry_backoff=0.5):
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._stop = threading.Event()
+        self._closed = False
+        self._put_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="recommendation-writer", daemon=True)
+        self._thread.start()
+        logger.info("Recommendation writer started.")
+
+    def put(self, user_id, recommendations):
+        """
+        Queue recommendations for a user; returns True as soon as the row is buffered
+        (or written), False when the writer is already closed.
+        """
+        row = (user_id, recommendations, datetime.now())
+        # close() takes the same lock, so every accepted row is queued before the
+        # background thread is told to drain and stop
+        with self._put_lock:
+            if self._closed:
+                logger.warning(f"Recommendation writer is closed, dropping row for user {user_id}.")
+                return False
+            try:
+                self._queue.put(row, timeout=self.put_timeout)
+                return True
+            except queue.Full:
+                pass
+
+        logger.warning("Recommendation writer buffer full, writing synchronously.")
+        save_recommendations_to_db(user_id, recommendations)
+        return True
+
+    def _run(self):
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+
+        while not (self._stop.is_set() and self._queue.empty()):
+            try:
+                batch.append(self._queue.get(timeout=max(0.0, deadline - time.monotonic())))
+            except queue.Empty:
+                pass
+
+            if len(batch) >= self.flush_rows or (batch and time.monotonic() >= deadline):
+                self._flush(batch)
+                batch = []
+            if time.monotonic() >= deadline:
+                deadline = time.monotonic() + self.flush_interval
+
+        self._flush(batch)
+
+    def _flush(self, batch):
+        if not batch:
+            return
+        for attempt in range(self.max_retries + 1):
+            try:
+                save_recommendations_batch_to_db(batch)
+                logger.info(f"Flushed {len(batch)} recommendation rows to DB.")
+                return
+            except Exception as e:
+                if attempt == self.max_retries:
+                    logger.error(f"Dropping {len(batch)} recommendation rows after {attempt + 1} failed flushes: {e}")
+                    return
+                delay = self.retry_backoff * 2 ** attempt
+                logger.warning(f"Failed to flush {len(batch)} recommendation rows, retrying in {delay:.1f}s: {e}")
+                time.sleep(delay)
+
+    def close(self, timeout=None):
+        """Flush everything still buffered and stop the background thread"""
+        with self._put_lock:
+            self._closed = True
+        self._stop.set()
+        self._thread.join(timeout)
+        logger.info("Recommendation writer stopped.")
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_writer():
+    """Return the process-wide writer, starting it on first use"""
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = RecommendationWriter()
+                atexit.register(_writer.close)
+    return _writer